@@ -19,10 +19,37 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
+import logging
+import os
+
 from . import controllers
 from . import model
+from .utils import sdk
+from .utils.metrics import registry
 
 from odoo.addons.payment import setup_provider, reset_payment_provider
+from odoo.tools import config, str2bool
+
+_logger = logging.getLogger(__name__)
+
+
+def post_load():
+    """ Share the checkout metrics between the workers, and load the
+    CyberSource SDK while the server starts, before the workers fork, when
+    the ``cybersource_preload_sdk`` option is set. """
+    if config['workers'] or config.get('cybersource_metrics_dir'):
+        registry.set_directory(
+            config.get('cybersource_metrics_dir')
+            or os.path.join(config['data_dir'], 'cybersource_metrics'))
+    if not str2bool(config.get('cybersource_preload_sdk') or '0', False):
+        return
+    try:
+        sdk.preload()
+    except ImportError:
+        _logger.warning("CyberSource SDK not installed, not preloaded")
+        return
+    _logger.info("CyberSource SDK preloaded in %.2fs",
+                 sdk.sdk_stats()['load_seconds'])
 
 
 def post_init_hook(env):
@@ -35,11 +35,16 @@
     'website': 'https://www.cybrosys.com',
     'depends': ['payment', 'website_sale'],
     'data': [
+        'security/ir.model.access.csv',
         'views/payment_templates.xml',
         'data/cybersource_payment_method_data.xml',
         'data/cybersource_payment_provider_data.xml',
+        'data/ir_actions_server_data.xml',
+        'data/ir_cron_data.xml',
         'views/payment_provider_views.xml',
         'views/payment_transaction_views.xml',
+        'views/cybersource_reconciliation_views.xml',
+        'views/cybersource_payment_stat_views.xml',
     ],
     'assets': {
         'web.assets_frontend': [
@@ -49,6 +54,7 @@
     'external_dependencies': {
         'python': ['cybersource-rest-client-python']
     },
+    'post_load': 'post_load',
     'post_init_hook': 'post_init_hook',
     'uninstall_hook': 'uninstall_hook',
     'images': ['static/description/banner.jpg'],
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the billTo block of the payment payload.
+
+Fills scratch copies of res_partner, res_country_state and res_country
+(100k partners by default) and builds the billing block of random
+partners:
+
+* the former way, one query for the partner row and one lazy load for
+  each of its state and country, as the ORM does for a cold ``browse``;
+* one query joining the three tables (``BILL_TO_QUERY``);
+* the worker cache of the module, after one warm-up pass.
+
+The building of the rest of the payload is timed as well, with the dict
+literal of the former controller against ``build_payment_payload``.
+
+The scratch tables are temporary: nothing is written to the database.
+Requires psycopg2 and a PostgreSQL database::
+
+    python3 benchmarks/bench_bill_to.py "dbname=bench" [partners]
+"""
+import os
+import random
+import sys
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.payload import (BILL_TO_QUERY, PartnerCache, build_bill_to,  # noqa: E402
+                           build_payment_payload)
+
+SETUP = """
+CREATE TEMP TABLE res_country (id serial PRIMARY KEY, code varchar);
+INSERT INTO res_country (code)
+     SELECT chr(65 + i / 26) || chr(65 + i %% 26)
+       FROM generate_series(0, 249) i;
+CREATE TEMP TABLE res_country_state (
+    id serial PRIMARY KEY, country_id integer, code varchar);
+INSERT INTO res_country_state (country_id, code)
+     SELECT 1 + i %% 250, 'S' || i FROM generate_series(1, 3000) i;
+CREATE TEMP TABLE res_partner (
+    id serial PRIMARY KEY, name varchar, street varchar, city varchar,
+    state_id integer, zip varchar, country_id integer, email varchar,
+    phone varchar);
+INSERT INTO res_partner (name, street, city, state_id, zip, country_id,
+                         email, phone)
+     SELECT 'Partner ' || i, i || ' Main Street', 'City ' || i %% 500,
+            1 + i %% 3000, lpad((i %% 99999)::text, 5, '0'), 1 + i %% 250,
+            'p' || i || '@example.com', '+502 ' || i
+       FROM generate_series(1, %s) i;
+ANALYZE res_partner;
+"""
+PARTNER_QUERY = """
+SELECT name, street, city, state_id, zip, country_id, email, phone
+  FROM res_partner WHERE id = %s
+"""
+STATE_QUERY = "SELECT code FROM res_country_state WHERE id = %s"
+COUNTRY_QUERY = "SELECT code FROM res_country WHERE id = %s"
+CARD = {"number": "4111111111111111", "expirationMonth": "12",
+        "expirationYear": "2030", "securityCode": "123", "type": "001"}
+
+
+def former_bill_to(cr, partner_id):
+    cr.execute(PARTNER_QUERY, [partner_id])
+    name, street, city, state_id, zip_code, country_id, email, phone = \
+        cr.fetchone()
+    cr.execute(STATE_QUERY, [state_id])
+    state_code = cr.fetchone()[0]
+    cr.execute(COUNTRY_QUERY, [country_id])
+    country_code = cr.fetchone()[0]
+    return build_bill_to(name, street, city, state_code, zip_code,
+                         country_code, email, phone)
+
+
+def joined_bill_to(cr, partner_id):
+    cr.execute(BILL_TO_QUERY, [partner_id])
+    return build_bill_to(*cr.fetchone())
+
+
+def former_payload(reference, bill_to):
+    return {
+        "clientReferenceInformation": {"code": reference},
+        "processingInformation": {"capture": True,
+                                  "commerceIndicator": "internet"},
+        "paymentInformation": {"card": dict(CARD)},
+        "orderInformation": {
+            "amountDetails": {"totalAmount": str(10.5), "currency": "USD"},
+            "billTo": {
+                "firstName": bill_to["firstName"] or "Customer",
+                "lastName": bill_to["lastName"] or "Customer",
+                "address1": bill_to["address1"] or "N/A",
+                "locality": bill_to["locality"] or "N/A",
+                "administrativeArea": bill_to["administrativeArea"] or "N/A",
+                "postalCode": bill_to["postalCode"] or "00000",
+                "country": bill_to["country"] or "GT",
+                "email": bill_to["email"] or "customer@example.com",
+                "phoneNumber": bill_to["phoneNumber"] or "00000000",
+            },
+        },
+    }
+
+
+def timed(label, ids, func, queries):
+    start = time.perf_counter()
+    for partner_id in ids:
+        func(partner_id)
+    elapsed = time.perf_counter() - start
+    print("%-28s %8.1f us/payment %6.2f queries/payment"
+          % (label, elapsed / len(ids) * 1e6, queries))
+    return elapsed
+
+
+def main():
+    dsn = sys.argv[1] if len(sys.argv) > 1 else "dbname=postgres"
+    partners = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    conn = psycopg2.connect(dsn)
+    cr = conn.cursor()
+    print("Creating %d scratch partners..." % partners)
+    cr.execute(SETUP % partners)
+    ids = [random.randint(1, partners) for _ in range(20000)]
+
+    cache = PartnerCache(ttl=300.0, maxsize=partners)
+
+    def cached_bill_to(partner_id):
+        key = ("bench", partner_id)
+        bill_to = cache.get(key)
+        if bill_to is None:
+            bill_to = cache.set(key, joined_bill_to(cr, partner_id))
+        return bill_to
+
+    former = timed("former (3 queries)", ids,
+                   lambda pid: former_bill_to(cr, pid), 3)
+    joined = timed("joined (1 query)", ids,
+                   lambda pid: joined_bill_to(cr, pid), 1)
+    for partner_id in ids:
+        cached_bill_to(partner_id)
+    cached = timed("worker cache (warm)", ids, cached_bill_to, 0)
+    print("speed-up: joined x%.1f, cached x%.1f"
+          % (former / joined, former / cached))
+
+    bill_to = cached_bill_to(ids[0])
+    rounds = 200000
+    start = time.perf_counter()
+    for index in range(rounds):
+        former_payload("S%d" % index, bill_to)
+    literal = time.perf_counter() - start
+    start = time.perf_counter()
+    for index in range(rounds):
+        build_payment_payload("S%d" % index, dict(CARD), 10.5, "USD", bill_to)
+    builder = time.perf_counter() - start
+    print("payload literal %.2f us, builder %.2f us"
+          % (literal / rounds * 1e6, builder / rounds * 1e6))
+    conn.rollback()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
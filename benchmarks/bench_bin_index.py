@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmark of the BIN index and Luhn pre-validation.
+
+Run from the module directory, without Odoo::
+
+    python3 benchmarks/bench_bin_index.py [number_of_pans]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bin_index import BinIndex, luhn_valid, validate_card  # noqa: E402
+
+PREFIXES = ['4', '51', '2221', '2720', '34', '37', '6011', '65', '3528',
+            '36', '5018', '6304', '62', '9']
+
+
+def synthetic_pans(count, seed=42):
+    """ Return ``count`` random 16 digit PANs, 90% of them Luhn valid. """
+    rng = random.Random(seed)
+    pans = []
+    for __ in range(count):
+        prefix = rng.choice(PREFIXES)
+        body = prefix + ''.join(rng.choice('0123456789')
+                                for __ in range(15 - len(prefix)))
+        for check in '0123456789':
+            if luhn_valid(body + check):
+                break
+        if rng.random() < 0.1:
+            check = str((int(check) + 1) % 10)
+        pans.append(body + check)
+    return pans
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    started = time.perf_counter()
+    index = BinIndex.load()
+    load_time = time.perf_counter() - started
+    print("BIN table %s: %d prefixes, depth %d, loaded in %.1f ms"
+          % (index.version, index.size, index.depth, load_time * 1000))
+
+    pans = synthetic_pans(count)
+    for label, func in (
+            ("lookup", index.lookup),
+            ("lookup + luhn + length", lambda pan: validate_card(index, pan)),
+    ):
+        started = time.perf_counter()
+        for pan in pans:
+            func(pan)
+        elapsed = time.perf_counter() - started
+        print("%-24s %10.0f lookups/s (%d PANs in %.2fs)"
+              % (label, count / elapsed, count, elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""Load benchmark of the checkout route ``/payment/cybersource/simulate_payment``.
+
+For each concurrency level, creates draft transactions on the provider
+through XML-RPC, then submits one card payment per transaction from that
+many concurrent clients (keep-alive connections). It reports:
+
+* client side p50/p95/p99 latency, throughput and error rate;
+* the mean per-stage timings returned by the route when the provider is
+  in test mode.
+
+Run it against a provider in test mode whose *Gateway Endpoint Override*
+points to ``benchmarks/mock_gateway.py``. Every payment comes from one IP
+address and one partner, so the rate limits of the provider are set to 0
+during the run and restored afterwards (``--keep-rate-limits`` measures
+the limiter instead); payments refused by the load shedding or the rate
+limits are counted apart as ``shed`` and ``limited``. The results are
+written as JSON so that runs of different versions can be compared::
+
+    python3 benchmarks/mock_gateway.py --port 8099 &
+    python3 benchmarks/bench_checkout.py --url http://localhost:8069 \\
+        --db bench --provider-id 14 --levels 1,4,16,64 --requests 400 \\
+        --output checkout.json
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+import uuid
+import xmlrpc.client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+ROUTE = '/payment/cybersource/simulate_payment'
+CARD = {'card_num': '4111 1111 1111 1111', 'exp_month': '12',
+        'exp_year': '2030', 'cvv': '123'}
+RATE_LIMIT_FIELDS = ['cyber_rate_limit_ip', 'cyber_rate_limit_partner',
+                     'cyber_rate_limit_reference']
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def connect(options):
+    """ Return the uid of the benchmark user and an XML-RPC model caller """
+    common = xmlrpc.client.ServerProxy(options.url + '/xmlrpc/2/common')
+    uid = common.authenticate(options.db, options.login, options.password, {})
+    models = xmlrpc.client.ServerProxy(options.url + '/xmlrpc/2/object')
+
+    def call(model, method, *args, **kwargs):
+        return models.execute_kw(options.db, uid, options.password, model,
+                                 method, list(args), kwargs)
+    return uid, call
+
+
+def set_rate_limits(options, values):
+    """ Write the rate limits of the provider and return the former ones """
+    call = connect(options)[1]
+    former = call('payment.provider', 'read', [options.provider_id],
+                  fields=RATE_LIMIT_FIELDS)[0]
+    call('payment.provider', 'write', [options.provider_id], values)
+    return {field: former[field] for field in RATE_LIMIT_FIELDS}
+
+
+def prepare_transactions(options, count):
+    """ Create ``count`` draft transactions and return their values """
+    uid, call = connect(options)
+    provider = call('payment.provider', 'read', [options.provider_id],
+                    fields=['payment_method_ids', 'state'])[0]
+    if provider['state'] != 'test':
+        raise SystemExit("The provider must be in test mode")
+    partner_id = options.partner_id or call(
+        'res.users', 'read', [uid], fields=['partner_id'])[0]['partner_id'][0]
+    currency_id = call('res.currency', 'search',
+                       [('name', '=', options.currency)], limit=1)[0]
+    run = uuid.uuid4().hex[:6]
+    vals_list = [{
+        'reference': 'BENCH-%s-%s' % (run, index),
+        'provider_id': options.provider_id,
+        'payment_method_id': provider['payment_method_ids'][0],
+        'partner_id': partner_id,
+        'currency_id': currency_id,
+        'amount': options.amount,
+        'operation': 'online_direct',
+    } for index in range(count)]
+    call('payment.transaction', 'create', vals_list)
+    return [{
+        'reference': vals['reference'],
+        'provider_id': options.provider_id,
+        'values': {'partner': partner_id, 'currency': currency_id,
+                   'amount': options.amount},
+        'customer_input': CARD,
+    } for vals in vals_list]
+
+
+def run_level(options, concurrency, jobs):
+    """ Submit ``jobs`` from ``concurrency`` clients """
+    url = urlsplit(options.url)
+    local = threading.local()
+    results = []
+    lock = threading.Lock()
+
+    def submit(params):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(
+                url.hostname, url.port or 80, timeout=options.timeout)
+        body = json.dumps({'jsonrpc': '2.0', 'method': 'call',
+                           'params': params, 'id': 1})
+        start = time.perf_counter()
+        try:
+            conn.request('POST', ROUTE, body,
+                         {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            payload = json.loads(response.read())
+            result = payload.get('result') or {}
+            error = None if response.status == 200 and 'error' not in payload \
+                else (payload.get('error') or {}).get('message', response.status)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            local.conn = None
+            result, error = {}, repr(e)
+        elapsed = time.perf_counter() - start
+        with lock:
+            results.append((elapsed, result, error))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(submit, jobs))
+    wall = time.perf_counter() - start
+
+    latencies = [elapsed * 1000 for elapsed, _result, _error in results]
+    outcomes = defaultdict(int)
+    stages = defaultdict(list)
+    for _elapsed, result, error in results:
+        if error:
+            outcomes['error'] += 1
+        elif result.get('success'):
+            outcomes['approved'] += 1
+        elif result.get('status') == 429:
+            # Refused by the load shedding or the rate limits of the route
+            outcomes['limited' if result.get('limited') else 'shed'] += 1
+        elif result.get('pending'):
+            outcomes['pending'] += 1
+        elif result.get('retry'):
+            outcomes['retry'] += 1
+        else:
+            outcomes['declined'] += 1
+        for stage, value in (result.get('timings') or {}).items():
+            stages[stage].append(value)
+    return {
+        'concurrency': concurrency,
+        'requests': len(results),
+        'wall_seconds': round(wall, 3),
+        'throughput': round(len(results) / wall, 2) if wall else None,
+        'error_rate': round(outcomes['error'] / len(results), 4)
+        if results else None,
+        'outcomes': dict(outcomes),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'max': round(max(latencies), 2),
+        } if latencies else {},
+        'stage_ms': {stage: round(statistics.fmean(values), 2)
+                     for stage, values in stages.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--login', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--provider-id', type=int, required=True)
+    parser.add_argument('--partner-id', type=int)
+    parser.add_argument('--currency', default='USD')
+    parser.add_argument('--amount', type=float, default=10.0)
+    parser.add_argument('--levels', default='1,2,4,8,16,32')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='payments submitted per level')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--output', default='bench_checkout.json')
+    parser.add_argument('--keep-rate-limits', action='store_true',
+                        help='run with the rate limits of the provider')
+    options = parser.parse_args()
+    former_limits = None
+    if not options.keep_rate_limits:
+        former_limits = set_rate_limits(
+            options, dict.fromkeys(RATE_LIMIT_FIELDS, 0))
+    try:
+        run(options)
+    finally:
+        if former_limits:
+            set_rate_limits(options, former_limits)
+
+
+def run(options):
+    """ Benchmark every concurrency level and write the report """
+
+    report = {
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'url': options.url,
+        'requests_per_level': options.requests,
+        'levels': [],
+    }
+    print("%6s %8s %9s %9s %9s %8s %7s %7s %7s" % (
+        'conc', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors', 'decl',
+        'limited', 'shed'))
+    for concurrency in [int(level) for level in options.levels.split(',')]:
+        jobs = prepare_transactions(options, options.requests)
+        level = run_level(options, concurrency, jobs)
+        report['levels'].append(level)
+        latency = level['latency_ms']
+        outcomes = level['outcomes']
+        print("%6d %8.1f %9.1f %9.1f %9.1f %7.2f%% %7d %7d %7d" % (
+            concurrency, level['throughput'] or 0, latency.get('p50', 0),
+            latency.get('p95', 0), latency.get('p99', 0),
+            (level['error_rate'] or 0) * 100, outcomes.get('declined', 0),
+            outcomes.get('limited', 0), outcomes.get('shed', 0)))
+        if level['stage_ms']:
+            print("       stages: %s" % ', '.join(
+                '%s=%.1f' % item for item in level['stage_ms'].items()))
+    with open(options.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print("Results written to %s" % options.output)
+
+
+if __name__ == '__main__':
+    main()
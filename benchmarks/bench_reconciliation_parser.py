@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the streaming reconciliation report parser.
+
+Generates a synthetic Transaction Detail report (CSV and XML) and
+measures the parsing throughput and the peak memory. Run from the module
+directory, without Odoo::
+
+    python3 benchmarks/bench_reconciliation_parser.py [number_of_rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.report_parser import iter_chunks, iter_report_rows  # noqa: E402
+
+
+def write_csv(path, count):
+    rng = random.Random(1)
+    with open(path, 'w') as file:
+        file.write('Transaction Detail Report,1.0,2024-10-01,merchant\n')
+        file.write('request_id,merchant_ref_number,transaction_type,'
+                   'currency,amount,reason_code\n')
+        for index in range(count):
+            file.write('%d,S%08d,ics_bill,USD,%.2f,100\n'
+                       % (7000000000000000 + index, index,
+                          rng.uniform(1, 500)))
+
+
+def write_xml(path, count):
+    rng = random.Random(1)
+    with open(path, 'w') as file:
+        file.write('<?xml version="1.0" encoding="utf-8"?>\n'
+                   '<Report Name="TransactionDetailReport"><Requests>\n')
+        for index in range(count):
+            file.write('<Request RequestID="%d" MerchantReferenceNumber='
+                       '"S%08d"><PaymentData><Amount>%.2f</Amount>'
+                       '<CurrencyCode>USD</CurrencyCode></PaymentData>'
+                       '<ApplicationReplies><ApplicationReply Name="ics_bill">'
+                       '<RCode>1</RCode></ApplicationReply>'
+                       '</ApplicationReplies></Request>\n'
+                       % (7000000000000000 + index, index,
+                          rng.uniform(1, 500)))
+        file.write('</Requests></Report>\n')
+
+
+def parse(path):
+    rows = 0
+    with open(path, 'rb') as stream:
+        for chunk in iter_chunks(iter_report_rows(stream), 2000):
+            rows += len(chunk)
+    return rows
+
+
+def measure(path, count):
+    """ Time a plain pass, then trace the peak memory of a second one. """
+    started = time.perf_counter()
+    rows = parse(path)
+    elapsed = time.perf_counter() - started
+    assert rows == count, (rows, count)
+    tracemalloc.start()
+    parse(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt, writer in (('csv', write_csv), ('xml', write_xml)):
+            path = os.path.join(directory, 'report.' + fmt)
+            writer(path, count)
+            size = os.path.getsize(path) / 1024 / 1024
+            elapsed, peak = measure(path, count)
+            print("%s: %d rows (%.0f MiB) in %.2fs, %.0f rows/s, "
+                  "peak memory %.1f MiB"
+                  % (fmt, count, size, elapsed, count / elapsed,
+                     peak / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Micro benchmark of the payment response handling.
+
+Compares, on a typical authorization response body:
+
+* the former path: SDK deserialization into ``PtsV2PaymentsPost201Response``
+  models, ``to_dict()`` and ``json.dumps`` of the result returned to the
+  browser (only when the CyberSource SDK is installed);
+* the lean path: ``parse_payment_response`` on the raw body.
+
+For each path it reports the time per response and the memory allocated
+per response (``tracemalloc``, in a separate pass so that tracing does not
+skew the timings)::
+
+    python3 benchmarks/bench_response_parser.py [rounds]
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.response_parser import parse_payment_response  # noqa: E402
+
+BODY = json.dumps({
+    "_links": {
+        "authReversal": {"method": "POST",
+                         "href": "/pts/v2/payments/7301851556476789304951/reversals"},
+        "self": {"method": "GET",
+                 "href": "/pts/v2/payments/7301851556476789304951"},
+        "capture": {"method": "POST",
+                    "href": "/pts/v2/payments/7301851556476789304951/captures"},
+    },
+    "clientReferenceInformation": {"code": "S00042-1"},
+    "id": "7301851556476789304951",
+    "orderInformation": {"amountDetails": {"authorizedAmount": "102.21",
+                                           "currency": "USD"}},
+    "paymentAccountInformation": {"card": {"type": "001"}},
+    "paymentInformation": {
+        "tokenizedCard": {"type": "001"},
+        "card": {"type": "001"},
+    },
+    "pointOfSaleInformation": {"terminalId": "111111"},
+    "processorInformation": {
+        "merchantNumber": "000123456789012",
+        "approvalCode": "888888",
+        "networkTransactionId": "123456789619999",
+        "transactionId": "123456789619999",
+        "responseCode": "100",
+        "avs": {"code": "X", "codeRaw": "I1"},
+    },
+    "reconciliationId": "7301851556476789304951",
+    "status": "AUTHORIZED",
+    "submitTimeUtc": "2024-10-29T07:05:55Z",
+    "tokenInformation": {
+        "customer": {"id": "A0B1C2D3E4F5A6B7C8D9E0F1A2B3C4D5"},
+        "paymentInstrument": {"id": "F5E4D3C2B1A0F9E8D7C6B5A4F3E2D1C0"},
+        "instrumentIdentifier": {"id": "7010000000016241111",
+                                 "state": "ACTIVE"},
+    },
+}).encode('utf-8')
+
+
+class RawResponse:
+    """ The part of the urllib3 response read by the SDK deserializer """
+
+    def __init__(self, data):
+        self.data = data.decode('utf-8')
+
+    def getheader(self, name, default=None):
+        return default
+
+
+def sdk_path(api_client):
+    def handle(body):
+        model = api_client.deserialize(RawResponse(body),
+                                       'PtsV2PaymentsPost201Response')
+        return json.dumps({"status": model.status, "data": model.to_dict()})
+    return handle
+
+
+def lean_path(body):
+    return parse_payment_response(body)
+
+
+def measure(label, func, rounds):
+    func(BODY)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(BODY)
+    elapsed = time.perf_counter() - start
+    traced = max(rounds // 20, 1)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(traced):
+        func(BODY)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("%-28s %9.1f us/response %9.1f KiB peak over %d responses"
+          % (label, elapsed / rounds * 1e6, (peak - before) / 1024.0, traced))
+    return elapsed
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    try:
+        import CyberSource
+    except ImportError:
+        CyberSource = None
+        print("CyberSource SDK not installed: only the lean path is timed")
+    lean = measure("lean parse_payment_response", lean_path, rounds)
+    if CyberSource is not None:
+        sdk = measure("SDK models + to_dict", sdk_path(CyberSource.ApiClient()),
+                      rounds)
+        print("speed-up: x%.1f" % (sdk / lean))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Startup time and per-worker memory of the CyberSource SDK loading modes.
+
+Each mode runs in a fresh interpreter which "boots" (loads the addon
+utilities, and the SDK when preloading), then forks prefork-like workers.
+Every worker optionally builds a ``PaymentsApi`` client, as its first
+payment would, and reports its memory from ``/proc/self/smaps_rollup``:
+
+* ``eager``: the former behaviour, SDK imported at module load;
+* ``lazy-idle``: SDK deferred, worker never takes a payment;
+* ``lazy``: SDK deferred, each worker loads it on its first payment;
+* ``preload``: SDK deferred, loaded by the post_load hook before forking.
+
+``RSS`` counts every resident page, ``USS`` only the pages private to the
+worker, i.e. what each extra worker really costs. Linux only; requires
+the CyberSource SDK::
+
+    python3 benchmarks/bench_sdk_startup.py [workers]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ('eager', 'lazy-idle', 'lazy', 'preload')
+
+CONFIG = {
+    "authentication_type": "http_signature",
+    "run_environment": "apitest.cybersource.com",
+    "merchantid": "bench_merchant",
+    "merchant_keyid": "00000000-0000-0000-0000-000000000000",
+    "merchant_secretkey": "c2VjcmV0",
+}
+
+
+def memory():
+    """ Return the RSS and the private memory of this process in KiB """
+    values = {}
+    with open('/proc/self/smaps_rollup') as smaps:
+        for line in smaps:
+            name, __, rest = line.partition(':')
+            if name in ('Rss', 'Private_Clean', 'Private_Dirty'):
+                values[name] = int(rest.split()[0])
+    return values['Rss'], values['Private_Clean'] + values['Private_Dirty']
+
+
+def child(mode, workers):
+    """ Boot in ``mode``, fork the workers and print the measures as JSON """
+    started = time.perf_counter()
+    from utils import sdk  # noqa: E402
+    from utils import client_cache, connection_pool, payload  # noqa: F401,E402
+    if mode == 'eager':
+        sdk.get_sdk()
+    elif mode == 'preload':
+        sdk.preload()
+    boot = time.perf_counter() - started
+
+    pids = []
+    reader, writer = os.pipe()
+    for __ in range(workers):
+        pid = os.fork()
+        if not pid:
+            os.close(reader)
+            first = time.perf_counter()
+            if mode != 'lazy-idle':
+                sdk.build_api('PaymentsApi', CONFIG)
+            first = time.perf_counter() - first
+            rss, uss = memory()
+            os.write(writer, (json.dumps([rss, uss, first]) + '\n').encode())
+            # Stay alive until every worker measured, sharing the pages
+            time.sleep(1)
+            os._exit(0)
+        pids.append(pid)
+    os.close(writer)
+    with os.fdopen(reader) as lines:
+        measures = [json.loads(line) for line in lines]
+    for pid in pids:
+        os.waitpid(pid, 0)
+    print(json.dumps({'boot': boot, 'workers': measures}))
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print("%-10s %9s %14s %12s %12s %14s" % (
+        "mode", "boot (s)", "1st pay (ms)", "RSS (MiB)", "USS (MiB)",
+        "total (MiB)"))
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', __file__, '--child', mode,
+             str(workers)], check=True, capture_output=True, text=True,
+            cwd=ROOT).stdout
+        result = json.loads(output)
+        rows = result['workers']
+        rss = sum(row[0] for row in rows) / len(rows) / 1024
+        uss = sum(row[1] for row in rows) / len(rows) / 1024
+        first = sum(row[2] for row in rows) / len(rows) * 1000
+        print("%-10s %9.3f %14.1f %12.1f %12.1f %14.1f" % (
+            mode, result['boot'], first, rss, uss, uss * workers))
+    print("\n%d workers; total is the private memory of all the workers"
+          % workers)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
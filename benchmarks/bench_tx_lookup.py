@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Database benchmark of the notification transaction lookup.
+
+Fills scratch copies of the payment_transaction and payment_provider
+tables with synthetic rows (10M transactions by default) and compares:
+
+* the former lookup, filtering on the related ``provider_code`` field,
+  which Odoo compiles to a sub-select on payment_provider;
+* the lookup on the unique reference index with the provider ids
+  resolved once;
+* one bulk query for 1000 references against 1000 single lookups;
+* the same lookups once a composite ``(reference, provider_id)`` index is
+  added, which brings nothing since ``reference`` is unique.
+
+The scratch tables are temporary: nothing is written to the database.
+Requires psycopg2 and a PostgreSQL database::
+
+    python3 benchmarks/bench_tx_lookup.py "dbname=bench" [rows]
+"""
+import random
+import sys
+import time
+
+import psycopg2
+
+SETUP = """
+CREATE TEMP TABLE bench_provider (id serial PRIMARY KEY, code varchar);
+INSERT INTO bench_provider (code)
+     SELECT (ARRAY['cybersource', 'stripe', 'demo', 'cybersource'])[i]
+       FROM generate_series(1, 4) i;
+CREATE TEMP TABLE bench_tx (
+    id serial PRIMARY KEY,
+    reference varchar NOT NULL,
+    provider_id integer NOT NULL,
+    amount numeric,
+    state varchar
+);
+INSERT INTO bench_tx (reference, provider_id, amount, state)
+     SELECT 'S' || lpad(i::text, 10, '0'), 1 + i %% 4, i %% 1000, 'done'
+       FROM generate_series(1, %s) i;
+CREATE UNIQUE INDEX bench_tx_reference_uniq ON bench_tx (reference);
+"""
+COMPOSITE_INDEX = """
+CREATE INDEX bench_tx_reference_provider_idx
+    ON bench_tx (reference, provider_id);
+ANALYZE bench_tx;
+"""
+OLD_LOOKUP = """
+SELECT id FROM bench_tx
+ WHERE reference = %s
+   AND provider_id IN (SELECT id FROM bench_provider
+                        WHERE code = 'cybersource')
+"""
+NEW_LOOKUP = """
+SELECT id FROM bench_tx
+ WHERE reference = %s AND provider_id = ANY(%s)
+ LIMIT 1
+"""
+BULK_LOOKUP = """
+SELECT id, reference FROM bench_tx
+ WHERE reference = ANY(%s) AND provider_id = ANY(%s)
+"""
+
+
+def timed(label, count, func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print("%-36s %9.1f us/reference" % (label, elapsed / count * 1e6))
+
+
+def main():
+    dsn = sys.argv[1]
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10000000
+    connection = psycopg2.connect(dsn)
+    cr = connection.cursor()
+    started = time.perf_counter()
+    cr.execute(SETUP % rows)
+    cr.execute("ANALYZE bench_tx")
+    print("Loaded %d transactions in %.0fs" % (rows,
+                                               time.perf_counter() - started))
+    cr.execute("SELECT id FROM bench_provider WHERE code = 'cybersource'")
+    provider_ids = [row[0] for row in cr.fetchall()]
+    rng = random.Random(3)
+    references = ['S%010d' % rng.randint(1, rows) for __ in range(1000)]
+
+    def single(query, *params):
+        def run():
+            for reference in references:
+                cr.execute(query, (reference,) + params)
+                cr.fetchall()
+        return run
+
+    def bulk():
+        cr.execute(BULK_LOOKUP, (references, provider_ids))
+        cr.fetchall()
+
+    for title in ("unique reference index", "with a composite index"):
+        print("\n%s" % title)
+        timed("related field (sub-select)", len(references),
+              single(OLD_LOOKUP))
+        timed("provider ids resolved once", len(references),
+              single(NEW_LOOKUP, provider_ids))
+        timed("bulk, 1000 references per query", len(references), bulk)
+        cr.execute("EXPLAIN " + NEW_LOOKUP, (references[0], provider_ids))
+        print("\n".join(row[0] for row in cr.fetchall()))
+        cr.execute(COMPOSITE_INDEX)
+    connection.rollback()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""Local stand-in for the CyberSource REST API.
+
+Answers the calls the module makes, so that checkout can be load-tested
+without reaching ``apitest.cybersource.com``:
+
+* ``POST /pts/v2/payments`` (with ``TOKEN_CREATE`` support);
+* ``POST /pts/v2/payments/<id>/captures``;
+* ``POST /pts/v2/payments/<id>/refunds`` and
+  ``POST /pts/v2/captures/<id>/refunds``;
+* ``POST /tss/v2/searches`` on ``clientReferenceInformation.code``.
+
+Request signatures are not checked. Each call sleeps for a log-normal
+latency, then answers a decline, a server error or a hang (no answer until
+the client gives up) at the configured rates.
+
+Point a provider in test mode at it through its *Gateway Endpoint
+Override*::
+
+    python3 benchmarks/mock_gateway.py --port 8099 --latency-median 120 \\
+        --latency-sigma 0.4 --decline-rate 0.05 --error-rate 0.01
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAYMENT_PATH = re.compile(r'^/pts/v2/payments/?$')
+CAPTURE_PATH = re.compile(r'^/pts/v2/payments/(?P<id>[^/]+)/captures/?$')
+REFUND_PATH = re.compile(
+    r'^/pts/v2/(?:payments|captures)/(?P<id>[^/]+)/refunds/?$')
+SEARCH_PATH = re.compile(r'^/tss/v2/searches/?$')
+SEARCH_CODE = re.compile(r'clientReferenceInformation\.code:(?P<code>\S+)')
+
+
+class GatewayState:
+    """ Payments seen by the server, by merchant reference. """
+
+    def __init__(self, options):
+        self.options = options
+        self.lock = threading.Lock()
+        self.payments = {}
+        self.counters = {'requests': 0, 'declined': 0, 'errors': 0,
+                         'hangs': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def latency(self):
+        """ Seconds to wait before answering """
+        median = self.options.latency_median / 1000.0
+        if self.options.latency_sigma <= 0:
+            return median
+        return random.lognormvariate(math.log(median or 1e-6),
+                                     self.options.latency_sigma)
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MockCyberSource/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.state.options.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/hal+json;charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('v-c-correlation-id', str(uuid.uuid4()))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        state = self.server.state
+        options = state.options
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._reply(400, {'status': 'INVALID_REQUEST',
+                                     'reason': 'MISSING_FIELD'})
+        state.count('requests')
+        time.sleep(state.latency())
+        draw = random.random()
+        if draw < options.hang_rate:
+            state.count('hangs')
+            time.sleep(options.hang_seconds)
+            self.close_connection = True
+            return
+        if draw < options.hang_rate + options.error_rate:
+            state.count('errors')
+            return self._reply(random.choice((500, 502, 503)), {
+                'status': 'SERVER_ERROR', 'reason': 'SYSTEM_ERROR',
+                'message': 'Injected server error'})
+        path = self.path.split('?')[0]
+        if PAYMENT_PATH.match(path):
+            return self._payment(payload)
+        match = CAPTURE_PATH.match(path)
+        if match:
+            return self._follow_on(payload, match['id'], 'capture')
+        match = REFUND_PATH.match(path)
+        if match:
+            return self._follow_on(payload, match['id'], 'refund')
+        if SEARCH_PATH.match(path):
+            return self._search(payload)
+        return self._reply(404, {'status': 'NOT_FOUND'})
+
+    def _payment(self, payload):
+        state = self.server.state
+        reference = payload.get('clientReferenceInformation', {}).get('code')
+        payment_id = uuid.uuid4().hex[:22]
+        if random.random() < state.options.decline_rate:
+            state.count('declined')
+            body = {
+                'id': payment_id,
+                'status': 'DECLINED',
+                'errorInformation': {'reason': 'INSUFFICIENT_FUND',
+                                     'message': 'Decline - Insufficient '
+                                                'funds in the account.'},
+            }
+        else:
+            processing = payload.get('processingInformation', {})
+            body = {
+                'id': payment_id,
+                'status': 'AUTHORIZED',
+                'submitTimeUtc': time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                               time.gmtime()),
+                'clientReferenceInformation': {'code': reference},
+                'orderInformation': payload.get('orderInformation', {}),
+            }
+            if 'TOKEN_CREATE' in processing.get('actionList', ()):
+                customer = payload.get('paymentInformation', {}).get(
+                    'customer', {}).get('id') or uuid.uuid4().hex.upper()
+                body['tokenInformation'] = {
+                    'customer': {'id': customer},
+                    'paymentInstrument': {'id': uuid.uuid4().hex.upper()},
+                    'instrumentIdentifier': {'id': uuid.uuid4().hex[:19],
+                                             'state': 'ACTIVE'},
+                }
+        with state.lock:
+            state.payments[reference] = body
+        self._reply(201, body)
+
+    def _follow_on(self, payload, target_id, kind):
+        self._reply(201, {
+            'id': uuid.uuid4().hex[:22],
+            'status': 'PENDING',
+            'clientReferenceInformation': payload.get(
+                'clientReferenceInformation', {}),
+            'linkedId': target_id,
+            'kind': kind,
+        })
+
+    def _search(self, payload):
+        match = SEARCH_CODE.search(payload.get('query') or '')
+        payment = match and self.server.state.payments.get(match['code'])
+        summaries = [{
+            'id': payment['id'],
+            'clientReferenceInformation': {'code': match['code']},
+            'applicationInformation': {
+                'reasonCode': '100' if payment['status'] != 'DECLINED'
+                else '204'},
+        }] if payment else []
+        self._reply(201, {
+            'id': uuid.uuid4().hex[:22],
+            'totalCount': len(summaries),
+            '_embedded': {'transactionSummaries': summaries},
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-median', type=float, default=100.0,
+                        help='median latency in milliseconds')
+    parser.add_argument('--latency-sigma', type=float, default=0.3,
+                        help='log-normal shape, 0 for a fixed latency')
+    parser.add_argument('--decline-rate', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='share of 5xx answers')
+    parser.add_argument('--hang-rate', type=float, default=0.0,
+                        help='share of calls left without answer')
+    parser.add_argument('--hang-seconds', type=float, default=60.0)
+    parser.add_argument('--verbose', action='store_true')
+    options = parser.parse_args()
+
+    server = ThreadingHTTPServer((options.host, options.port),
+                                 GatewayHandler)
+    server.daemon_threads = True
+    server.state = GatewayState(options)
+    print("Mock CyberSource listening on http://%s:%s"
+          % (options.host, options.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.state.counters))
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
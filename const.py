@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+# Transaction state applied for each CyberSource webhook event type; the
+# events missing from this mapping are stored and ignored. An accepted
+# authorization only completes the transactions of the providers capturing
+# automatically: the others stay authorized until captured.
+WEBHOOK_EVENT_STATES = {
+    'payments.payments.accept': 'authorized',
+    'payments.capture.accept': 'done',
+    'payments.credits.accept': 'done',
+    'payments.refunds.accept': 'done',
+    'payments.payments.review': 'pending',
+    'payments.payments.reject': 'cancel',
+    'payments.reversals.accept': 'cancel',
+    'payments.voids.accept': 'cancel',
+    'payments.capture.reject': 'error',
+    'payments.refunds.reject': 'error',
+    'payments.credits.reject': 'error',
+}
+
+# CyberSource card type codes, as detected from the BIN ranges
+CARD_TYPES = [
+    ('000', 'Unknown'),
+    ('001', 'Visa'),
+    ('002', 'Mastercard'),
+    ('003', 'American Express'),
+    ('004', 'Discover'),
+    ('005', 'Diners Club'),
+    ('007', 'JCB'),
+    ('042', 'Maestro'),
+    ('062', 'China UnionPay'),
+]
+
+# Outcomes of the checkout payment flow, as recorded in the statistics
+FLOW_OUTCOMES = [
+    ('approved', 'Approved'),
+    ('declined', 'Declined'),
+    ('pending', 'Pending'),
+    ('retry', 'Retry'),
+    ('rejected', 'Rejected'),
+    ('error', 'Error'),
+]
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import hmac
 import json
 import os
 import logging
@@ -6,14 +7,40 @@ import time
 import uuid
 
 from odoo import _, http
-from odoo.exceptions import ValidationError
 from odoo.http import request
 
-from CyberSource import PaymentsApi
-from CyberSource.logging.log_configuration import LogConfiguration
+from ..utils import bin_index
+from ..utils.bin_index import get_bin_index, validate_card
+from ..utils.client_cache import client_cache
+from ..utils.connection_pool import PoolExhaustedError, pool_stats
+from ..utils.flow_logger import StageTimer, get_flow_logger, mask_card_data
+from ..utils.gateway_executor import GatewayUnavailableError, guard_stats
+from ..utils.metrics import limited_total, record_flow, registry, shed_total, stats_gauges
+from ..utils.payload import bill_to_cache, build_payment_payload, token_cache
+from ..utils.recovery import FOUND, UNKNOWN, is_ambiguous
+from ..utils.response_parser import parse_payment_response
+from ..utils.sdk import sdk_stats
+from ..utils.webhook import extract_event, parse_signature_header, verify_signature
 
 _logger = logging.getLogger(__name__)
 
+# Respuesta cuando no se sabe todavía si el pago fue cobrado
+PENDING_RESULT = {
+    "success": False,
+    "pending": True,
+    "status": "PENDING",
+    "message": "No pudimos confirmar su pago todavía. No lo intente de nuevo: "
+               "le notificaremos el resultado en unos minutos.",
+}
+
+CARD_ERROR_MESSAGES = {
+    bin_index.INVALID_NUMBER: "Número de tarjeta inválido.",
+    bin_index.UNKNOWN_BRAND: "Tipo de tarjeta no soportado.",
+    bin_index.INVALID_LENGTH: "Número de tarjeta inválido.",
+    bin_index.INVALID_CHECKSUM: "Número de tarjeta inválido.",
+    bin_index.INVALID_CVV: "Código de seguridad inválido.",
+}
+
 
 class WebsiteSaleFormCyberSource(http.Controller):
 
@@ -21,224 +48,462 @@ class WebsiteSaleFormCyberSource(http.Controller):
     def payment_with_flex_token(self, **post):
         flow_id = str(uuid.uuid4())[:8]  # ID único para rastreo
         start_time = time.time()
+        timer = StageTimer()
+        flog = get_flow_logger(__name__, flow_id, db=request.db)
 
-        _logger.info(f"🔵 [{flow_id}] ⟶ INICIO flujo CyberSource simulate_payment")
-        _logger.debug(f"🔵 [{flow_id}] Payload recibido desde frontend: {json.dumps(post, indent=4)}")
+        # Datos de tarjeta enmascarados una sola vez para todos los logs
+        masked_post = mask_card_data(post) if flog.isEnabledFor(logging.DEBUG) else None
+        flog.info("flow_start", route="simulate_payment")
+        flog.debug("frontend_payload", post=masked_post)
 
+        outcome, reason = "error", None
+        routed = {}
         try:
-            # ================================
-            # 1) OBTENER DATOS PRINCIPALES
-            # ================================
-            _logger.info(f"🔵 [{flow_id}] Extrayendo datos principales (values, card, reference)")
-            values = post.get('values', {}) or {}
-            card = post.get('customer_input', {}) or {}
-            reference = post.get('reference')
-
-            _logger.debug(f"🔵 [{flow_id}] values: {values}")
-            _logger.debug(f"🔵 [{flow_id}] card_data: {card}")
-            _logger.debug(f"🔵 [{flow_id}] reference: {reference}")
-
-            _logger.info(f"🔵 [{flow_id}] Buscando partner, currency y amount en Odoo…")
-
-            partner = request.env['res.partner'].sudo().browse(values.get('partner'))
-            currency = request.env['res.currency'].sudo().browse(values.get('currency'))
-            amount = values.get('amount')
-
-            if not partner:
-                _logger.error(f"🔴 [{flow_id}] Partner no encontrado → ID: {values.get('partner')}")
-                return {"success": False, "message": "Cliente no encontrado"}
-
-            if not currency:
-                _logger.error(f"🔴 [{flow_id}] Moneda no encontrada → ID: {values.get('currency')}")
-                return {"success": False, "message": "Moneda no válida"}
-
-            if not amount:
-                _logger.error(f"🔴 [{flow_id}] Monto no válido")
-                return {"success": False, "message": "Monto no válido"}
-
-            _logger.info(f"🟢 [{flow_id}] Partner, currency y amount validados correctamente")
-
-            # ================================
-            # 2) VALIDAR TARJETA
-            # ================================
-            _logger.info(f"🔵 [{flow_id}] Validando tarjeta…")
-
-            card_number = (card.get('card_num') or '').replace(' ', '')
-            exp_month = (card.get('exp_month') or '').zfill(2)
-            exp_year = str(card.get('exp_year') or '')
-            cvv = (card.get('cvv') or '').strip()
-
-            _logger.debug(f"🔵 [{flow_id}] Card Number: {card_number}")
-            _logger.debug(f"🔵 [{flow_id}] Exp Month: {exp_month}")
-            _logger.debug(f"🔵 [{flow_id}] Exp Year: {exp_year}")
-            _logger.debug(f"🔵 [{flow_id}] CVV: {cvv}")
-
-            if not card_number or not exp_month or not exp_year or not cvv:
-                _logger.warning(f"🟡 [{flow_id}] Faltan datos de tarjeta")
-                return {"success": False, "message": "Datos de tarjeta incompletos."}
-
-            card_type = self.detect_card_type(card_number)
-            _logger.info(f"🟢 [{flow_id}] Tipo de tarjeta detectado: {card_type}")
-
-            # ================================
-            # 3) CONSTRUIR JSON
-            # ================================
-            _logger.info(f"🔵 [{flow_id}] Construyendo payload JSON para CyberSource…")
-
-            payload = {
-                "clientReferenceInformation": {"code": reference},
-                "processingInformation": {"capture": True, "commerceIndicator": "internet"},
-                "paymentInformation": {
-                    "card": {
-                        "number": card_number,
-                        "expirationMonth": exp_month,
-                        "expirationYear": exp_year,
-                        "securityCode": cvv,
-                        "type": card_type,
-                    }
-                },
-                "orderInformation": {
-                    "amountDetails": {
-                        "totalAmount": str(amount),
-                        "currency": currency.name,
-                    },
-                    "billTo": {
-                        "firstName": partner.name or "Customer",
-                        "lastName": partner.name or "Customer",
-                        "address1": partner.street or "N/A",
-                        "locality": partner.city or "N/A",
-                        "administrativeArea": partner.state_id.code or "N/A",
-                        "postalCode": partner.zip or "00000",
-                        "country": partner.country_id.code or "GT",
-                        "email": partner.email or "customer@example.com",
-                        "phoneNumber": partner.phone or "00000000",
-                    }
+            # Descartar el exceso de carga antes de cualquier trabajo del ORM
+            if not request.env['cybersource.rate.limit'].sudo()._acquire_slot():
+                outcome = "shed"
+                shed_total.inc()
+                flog.warning("load_shed")
+                return {
+                    "success": False,
+                    "retry": True,
+                    "status": 429,
+                    "message": "Hay demasiados pagos en curso. Intente de nuevo en unos segundos.",
                 }
-            }
-
-            _logger.info(f"📦 [{flow_id}] Payload listo (enviado a CyberSource):")
-            _logger.info(json.dumps(payload, indent=4))
-
-            # ================================
-            # 4) OBTENER CONFIGURACIÓN
-            # ================================
-            _logger.info(f"🔵 [{flow_id}] Obteniendo configuración del proveedor CyberSource…")
-            client_config = self.get_configuration()
+            timer.lap("admission")
 
-            _logger.info(f"🛠️ [{flow_id}] Configuración final:")
-            _logger.info(json.dumps({
-                "merchantid": client_config["merchantid"],
-                "keyid": client_config["merchant_keyid"],
-                "environment": client_config["run_environment"],
-            }, indent=4))
+            result = self.process_payment(flog, timer, post, routed)
+            outcome, reason = self.flow_outcome(result)
+            return result
 
-            # ================================
-            # 5) ENVIAR A CYBERSOURCE
-            # ================================
-            _logger.info(f"🟦 [{flow_id}] ⟶ Enviando solicitud a CyberSource.create_payment()")
-
-            api_instance = PaymentsApi(client_config)
-            return_data, status, response_body = api_instance.create_payment(json.dumps(payload))
-
-            _logger.info(f"🔵 [{flow_id}] Respuesta cruda desde CyberSource (status HTTP {status})")
-            _logger.debug(response_body)
-
-            # ================================
-            # 6) PARSEAR RESPUESTA
-            # ================================
-            _logger.info(f"🔵 [{flow_id}] Procesando respuesta…")
+        except Exception as e:
+            flog.exception("unexpected_error", error=e)
+            return {"success": False, "message": f"Error interno: {str(e)}"}
 
-            if hasattr(return_data, "to_dict"):
-                return_dict = return_data.to_dict()
+        finally:
+            duration = time.time() - start_time
+            record_flow(timer.timings, outcome, duration, reason)
+            if outcome not in ("shed", "limited"):
+                # Estadísticas del tablero de rendimiento
+                card_num = str((post.get('customer_input') or {}).get('card_num') or '')
+                request.env['cybersource.payment.stat'].sudo()._record(
+                    routed.get("provider_id"),
+                    self.detect_card_type(card_num.replace(' ', '')),
+                    outcome, reason, round(duration * 1000, 2),
+                    timer.timings.get("gateway"))
+            flog.info("flow_end", duration=round(duration, 3), outcome=outcome,
+                      timings=timer.timings)
+
+    def process_payment(self, flog, timer, post, routed=None):
+        """ Validate the card, then send the payment once per reference;
+        the provider the payment is routed to is stored in ``routed`` """
+        # ================================
+        # 1) OBTENER DATOS PRINCIPALES
+        # ================================
+        values = post.get('values', {}) or {}
+        card = post.get('customer_input', {}) or {}
+        reference = post.get('reference')
+        flog.debug("extract", reference=reference, values=values)
+
+        # Dirección de facturación: una consulta, cacheada por cliente
+        partner_id = int(values.get('partner') or 0)
+        bill_to = partner_id and request.env['res.partner'].sudo()._cybersource_get_bill_to(
+            partner_id)
+        currency = request.env['res.currency'].sudo().browse(values.get('currency'))
+        amount = values.get('amount')
+
+        if not bill_to:
+            flog.error("partner_not_found", partner_id=values.get('partner'))
+            return {"success": False, "message": "Cliente no encontrado"}
+
+        if not currency:
+            flog.error("currency_not_found", currency_id=values.get('currency'))
+            return {"success": False, "message": "Moneda no válida"}
+
+        if not amount:
+            flog.error("invalid_amount", amount=amount)
+            return {"success": False, "message": "Monto no válido"}
+
+        tx = request.env['payment.transaction'].sudo()._get_txs_from_notification_batch(
+            'cybersource', [reference]).get(reference)
+        if not tx:
+            flog.error("transaction_not_found", reference=reference)
+            return {"success": False, "message": "Transacción no encontrada"}
+        if tx.state != 'draft':
+            # Ya enviada: nunca cobrar de nuevo una referencia, aunque su
+            # reclamo haya expirado; se devuelve el resultado conocido
+            flog.info("transaction_not_draft", reference=reference, state=tx.state)
+            return self.transaction_result(tx)
+        timer.lap("extract")
+
+        # Límites por IP, cliente y transacción del proveedor de la
+        # transacción, una vez resueltas la referencia y el cliente
+        limited = self.check_rate_limits(tx)
+        if limited:
+            for key in limited:
+                limited_total.inc(1, key.split(":")[1])
+            flog.warning("rate_limited", buckets=limited)
+            return {
+                "success": False,
+                "limited": True,
+                "retry": True,
+                "status": 429,
+                "message": "Demasiados intentos de pago. Espere un minuto e intente de nuevo.",
+            }
+        timer.lap("rate_limit")
+
+        # ================================
+        # 2) VALIDAR TARJETA
+        # ================================
+        card_number = (card.get('card_num') or '').replace(' ', '')
+        exp_month = (card.get('exp_month') or '').zfill(2)
+        exp_year = str(card.get('exp_year') or '')
+        cvv = (card.get('cvv') or '').strip()
+
+        if not card_number or not exp_month or not exp_year or not cvv:
+            flog.warning("card_incomplete")
+            return {"success": False, "message": "Datos de tarjeta incompletos."}
+
+        # Rechazar tarjetas inválidas antes de cualquier llamada de red
+        card_info, card_error = validate_card(get_bin_index(), card_number, cvv)
+        if card_error:
+            flog.warning("card_rejected", reason=card_error,
+                         brand=card_info and card_info.brand)
+            return {"success": False, "message": CARD_ERROR_MESSAGES[card_error]}
+
+        card_type = card_info.card_type
+        flog.info("card_validated", card_type=card_type, brand=card_info.brand)
+        timer.lap("validate")
+
+        # ================================
+        # 3) CONSTRUIR JSON
+        # ================================
+        payload = build_payment_payload(reference, {
+            "number": card_number,
+            "expirationMonth": exp_month,
+            "expirationYear": exp_year,
+            "securityCode": cvv,
+            "type": card_type,
+        }, amount, currency.name, bill_to)
+        if flog.isEnabledFor(logging.DEBUG):
+            flog.debug("payload_built", payload=mask_card_data(payload))
+        timer.lap("build")
+
+        # ================================
+        # 4) OBTENER CONFIGURACIÓN
+        # ================================
+        provider = self.get_provider(tx, card_info.brand, currency)
+        if not provider:
+            flog.warning("no_route", company_id=tx.company_id.id,
+                         currency=currency.name, brand=card_info.brand)
+            return {"success": False,
+                    "message": "Tipo de tarjeta no soportado para esta moneda."}
+        if routed is not None:
+            routed["provider_id"] = provider.id
+        client = provider._cybersource_get_client()
+        # Solo autorizar cuando la captura se hace desde el back-office
+        payload["processingInformation"]["capture"] = not provider.capture_manually
+        if tx.tokenize:
+            # Guardar la tarjeta en el vault de CyberSource (TMS)
+            payload["processingInformation"]["actionList"] = ["TOKEN_CREATE"]
+            customer_id = next((
+                row[4] for row in request.env['payment.token'].sudo()
+                ._cybersource_get_partner_tokens(tx.partner_id.id)
+                if row[1] == provider.id and row[4]), None)
+            if customer_id:
+                payload["paymentInformation"]["customer"] = {"id": customer_id}
+                payload["processingInformation"]["actionTokenTypes"] = [
+                    "paymentInstrument"]
             else:
-                return_dict = return_data if isinstance(return_data, dict) else {}
-
-            _logger.info(f"📥 [{flow_id}] Respuesta convertida:")
-            _logger.info(json.dumps(return_dict, indent=4))
-
-            cyb_status = (return_dict.get("status") or "").upper()
-            _logger.info(f"🔵 [{flow_id}] Estado interpretado: {cyb_status}")
-
-            # ================================
-            # 7) ÉXITO
-            # ================================
-            if status in (200, 201) and cyb_status in ("AUTHORIZED", "PENDING", "CAPTURED"):
-                _logger.info(f"🟢 [{flow_id}] PAGO APROBADO por CyberSource → {cyb_status}")
-
-                tx_vals = {
-                    "reference": reference,
-                    "simulated_state": "AUTHORIZED"
+                payload["processingInformation"]["actionTokenTypes"] = [
+                    "customer", "paymentInstrument"]
+        if flog.isEnabledFor(logging.DEBUG):
+            flog.debug(
+                "configuration",
+                merchant_id=client.config["merchantid"],
+                environment=client.config["run_environment"],
+                client_cache=client_cache.stats(),
+                connection_pools=pool_stats(),
+                gateway_guards=guard_stats(),
+            )
+        timer.lap("configure")
+
+        # ================================
+        # 5) ENVIAR A CYBERSOURCE (una sola vez por referencia)
+        # ================================
+        claims = request.env['cybersource.payment.claim'].sudo()
+        owned, result = claims._claim(reference, provider)
+        timer.lap("claim")
+        if not owned:
+            flog.info("duplicate_submission", reference=reference, replayed=bool(result))
+            if not result:
+                return {
+                    "success": False,
+                    "retry": True,
+                    "message": "Su pago ya se está procesando. Espere unos segundos.",
                 }
-                _logger.info(f"🔵 [{flow_id}] Notificando a Odoo (_handle_notification_data)")
-                request.env['payment.transaction'].sudo()._handle_notification_data("cybersource", tx_vals)
+            result = dict(result)
+            notification = result.pop("notification", None)
+            if notification and tx.state in ('draft', 'pending'):
+                # El resultado se guardó pero la petición que lo obtuvo no
+                # llegó a notificar la transacción (rollback o reintento)
+                flog.info("notification_replayed", reference=reference)
+                request.env['payment.transaction'].sudo()._handle_notification_data(
+                    "cybersource", notification)
+            return result
 
+        try:
+            outcome, value = self.send_payment(flog, provider, payload, reference)
+        except Exception as e:
+            # Rechazado antes del envío o por la pasarela: no hubo cargo y la
+            # referencia puede enviarse de nuevo
+            claims._release(reference)
+            if isinstance(e, (GatewayUnavailableError, PoolExhaustedError)):
+                flog.warning("gateway_unavailable", error=e)
                 return {
-                    "success": True,
-                    "status": cyb_status,
-                    "message": "Pago aprobado.",
-                    "data": return_dict
+                    "success": False,
+                    "retry": True,
+                    "message": "El servicio de pagos no está disponible en este momento. "
+                               "Intente de nuevo en unos minutos.",
                 }
-
-            # ================================
-            # 8) DECLINADO
-            # ================================
-            _logger.warning(f"🟡 [{flow_id}] Pago DECLINADO por CyberSource")
-
-            error_info = return_dict.get("error_information", {}) or {}
-            error_msg = error_info.get("message", "Declinado por CyberSource")
-            reason = error_info.get("reason", "UNKNOWN")
-
-            _logger.warning(f"🟡 [{flow_id}] Motivo → {reason}: {error_msg}")
-
-            tx_vals = {
-                "reference": reference,
-                "simulated_state": "DECLINED",
-                "message": error_msg,
-            }
-            _logger.info(f"🔵 [{flow_id}] Notificando DECLINE a Odoo (_handle_notification_data)")
-            request.env['payment.transaction'].sudo()._handle_notification_data("cybersource", tx_vals)
-
+            raise
+        timer.lap("gateway")
+
+        # ================================
+        # 6) REGISTRAR EL RESULTADO
+        # ================================
+        # Desde aquí el cargo pudo haberse hecho: la referencia queda tomada
+        # pase lo que pase localmente, con el resultado o como pendiente
+        tx_vals, result = None, PENDING_RESULT
+        try:
+            tx_vals = self.notification_from_outcome(flog, payload, reference, outcome, value)
+            result = self.payment_result(flog, tx_vals)
+        finally:
+            claims._complete(reference, dict(result, notification=tx_vals), provider,
+                             pending=bool(result.get("pending")))
+        timer.lap("parse")
+        request.env['payment.transaction'].sudo()._handle_notification_data(
+            "cybersource", tx_vals)
+        timer.lap("notify")
+        if provider.state == 'test':
+            # Tiempos por etapa para los benchmarks de carga
+            result = dict(result, timings=timer.as_dict())
+        return result
+
+    def transaction_result(self, tx):
+        """ Return the answer to a submission of a transaction already sent:
+        the stored result of its claim, or one built from its state """
+        result = request.env['cybersource.payment.claim'].sudo()._get_result(
+            tx.reference)
+        if result:
+            result = dict(result)
+            result.pop("notification", None)
+            return result
+        if tx.state == 'pending':
+            return PENDING_RESULT
+        if tx.state in ('authorized', 'done'):
             return {
-                "success": False,
-                "status": "DECLINED",
-                "reason": reason,
-                "message": error_msg,
+                "success": True,
+                "status": "AUTHORIZED",
+                "message": "Pago aprobado.",
+                "data": {"id": tx.cyber_payment_id, "status": "AUTHORIZED"},
             }
+        return {
+            "success": False,
+            "status": "DECLINED",
+            "reason": "UNKNOWN",
+            "message": tx.state_message or "El pago fue rechazado.",
+        }
 
+    def check_rate_limits(self, tx):
+        """ Consume the rate limit buckets of an attempt on the transaction
+        ``tx``, with the limits of its provider, and return the exhausted
+        ones. The buckets are keyed by the records of the transaction, never
+        by posted values, so that they cannot be multiplied at will """
+        provider_id = tx.provider_id.id
+        ip_limit, partner_limit, reference_limit = request.env[
+            'payment.provider'].sudo()._cybersource_get_rate_limits()[provider_id]
+        return request.env['cybersource.rate.limit'].sudo()._consume([
+            (f"{provider_id}:ip:{request.httprequest.remote_addr}", ip_limit),
+            (f"{provider_id}:partner:{tx.partner_id.id}", partner_limit),
+            (f"{provider_id}:reference:{tx.reference}", reference_limit),
+        ])
+
+    def flow_outcome(self, result):
+        """ Classify the result of a flow for the metrics """
+        if result.get("success"):
+            return "approved", None
+        if result.get("limited"):
+            return "limited", None
+        if result.get("retry"):
+            return "retry", None
+        if result.get("pending"):
+            return "pending", None
+        if result.get("status") == "DECLINED":
+            return "declined", result.get("reason")
+        return "rejected", None
+
+    def send_payment(self, flog, provider, payload, reference):
+        """ Send the payment to CyberSource and return its gateway outcome.
+
+        Only the errors proving the payment was not charged are raised; an
+        ambiguous failure is returned as ``UNKNOWN``.
+        """
+        try:
+            # Un fallo ambiguo (timeout, conexión perdida, 5xx) se resuelve
+            # consultando la pasarela antes de cualquier reenvío
+            return provider._cybersource_create_payment(reference, json.dumps(payload))
         except Exception as e:
-            _logger.exception(f"🔴 [{flow_id}] ERROR inesperado: {e}")
-            return {"success": False, "message": f"Error interno: {str(e)}"}
+            if not is_ambiguous(e):
+                raise
+            flog.warning("payment_ambiguous", reference=reference, error=e)
+            return UNKNOWN, None
+
+    def notification_from_outcome(self, flog, payload, reference, outcome, value):
+        """ Turn the gateway outcome into the notification data of the
+        transaction """
+        transactions = request.env['payment.transaction'].sudo()
+        if outcome == UNKNOWN:
+            # No se sabe si hubo cargo: no liberar la referencia ni reintentar
+            flog.warning("payment_unsettled", reference=reference)
+            return {"reference": reference, "simulated_state": "pending"}
+        if outcome == FOUND:
+            flog.info("payment_recovered", gateway_id=value.get("id"))
+            tx_vals = transactions._cybersource_notification_from_summary(reference, value)
+            tx_vals["gateway_status"] = "RECOVERED"
+        else:
+            # Solo los campos usados, sin modelos del SDK; el cuerpo completo
+            # únicamente con el log de depuración activo
+            __, status, response_body = value
+            response = parse_payment_response(
+                response_body, keep_body=flog.isEnabledFor(logging.DEBUG))
+            flog.info("gateway_response", http_status=status)
+            flog.debug("gateway_raw_response", body=response.get("body"))
+            tx_vals = transactions._cybersource_notification_from_response(
+                reference, status, response)
+            tx_vals["gateway_status"] = response["status"]
+        tx_vals["card_last4"] = payload["paymentInformation"]["card"]["number"][-4:]
+        return tx_vals
+
+    def payment_result(self, flog, tx_vals):
+        """ Return the answer to the browser for the notification data """
+        state = tx_vals["simulated_state"]
+        if state == "pending":
+            return PENDING_RESULT
+        gateway_id, cyb_status = tx_vals.get("payment_id"), tx_vals.get("gateway_status")
+
+        # ================================
+        # 7) ÉXITO
+        # ================================
+        if state == "AUTHORIZED":
+            flog.info("approved", status=cyb_status, gateway_id=gateway_id,
+                      tokenized=bool(tx_vals.get("payment_instrument_id")))
+            return {
+                "success": True,
+                "status": cyb_status,
+                "message": "Pago aprobado.",
+                "data": {"id": gateway_id, "status": cyb_status},
+            }
 
-        finally:
-            total = round(time.time() - start_time, 3)
-            _logger.info(f"🔚 [{flow_id}] FIN flujo simulate_payment (duración: {total}s)")
+        # ================================
+        # 8) DECLINADO
+        # ================================
+        flog.warning("declined", status=cyb_status, reason=tx_vals["reason"],
+                     message=tx_vals["message"])
+        return {
+            "success": False,
+            "status": "DECLINED",
+            "reason": tx_vals["reason"],
+            "message": tx_vals["message"],
+        }
 
+    @http.route('/payment/cybersource/webhook', type='http', auth='public',
+                methods=['POST'], csrf=False, save_session=False)
+    def cybersource_webhook(self):
+        """ Verify a CyberSource notification and queue it for the cron """
+        body = request.httprequest.get_data()
+        signature = request.httprequest.headers.get('v-c-signature')
+        key_id = parse_signature_header(signature).get('keyId')
+        provider = key_id and request.env['payment.provider'].sudo().search([
+            ('code', '=', 'cybersource'),
+            ('cyber_webhook_key_id', '=', key_id),
+        ], limit=1)
+        if not provider or not verify_signature(
+                signature, body, provider.cyber_webhook_secret):
+            _logger.warning("Rejected CyberSource webhook with an invalid signature")
+            return request.make_json_response({"error": "invalid signature"}, status=401)
+        try:
+            event = json.loads(body)
+            extract_event(event)
+        except ValueError:
+            return request.make_json_response({"error": "invalid payload"}, status=400)
+        request.env['cybersource.webhook.event'].sudo()._enqueue(event)
+        return request.make_json_response({"status": "queued"})
+
+    @http.route('/payment/cybersource/metrics', type='http', auth='none',
+                methods=['GET'], csrf=False, save_session=False)
+    def cybersource_metrics(self):
+        """ Expose the metrics of this worker in the Prometheus text format.
+
+        Restricted to local scrapers unless the ``cybersource.metrics_token``
+        system parameter is set, in which case it must be sent as a bearer
+        token. """
+        if not request.db:
+            return request.make_response("no database", status=404)
+        env = request.env(su=True)
+        token = env['ir.config_parameter'].get_param('cybersource.metrics_token')
+        authorization = request.httprequest.headers.get('Authorization') or ''
+        if token:
+            if not hmac.compare_digest(authorization, f"Bearer {token}"):
+                return request.make_response("forbidden", status=403)
+        elif request.httprequest.remote_addr not in ('127.0.0.1', '::1'):
+            return request.make_response("forbidden", status=403)
+
+        queue = env['cybersource.webhook.event']._get_queue_stats()
+        # Estado propio del proceso que atiende la petición, etiquetado por pid
+        gauges = stats_gauges(
+            'cybersource_client_cache', 'Gateway client cache',
+            {'all': client_cache.stats()}, 'cache')
+        gauges += stats_gauges(
+            'cybersource_bill_to_cache', 'Billing address cache',
+            {'all': bill_to_cache.stats()}, 'cache')
+        gauges += stats_gauges(
+            'cybersource_token_cache', 'Saved cards cache',
+            {'all': token_cache.stats()}, 'cache')
+        gauges += stats_gauges(
+            'cybersource_pool', 'Gateway connection pool',
+            {stats['pool']: stats for stats in pool_stats()}, 'pool')
+        gauges += stats_gauges(
+            'cybersource_guard', 'Gateway executor and circuit breaker',
+            guard_stats(), 'provider_id')
+        gauges.append((
+            'cybersource_guard_open', 'Circuit breaker not closed',
+            [({'provider_id': provider_id}, int(stats['state'] != 'closed'))
+             for provider_id, stats in guard_stats().items()]))
+        gauges += stats_gauges(
+            'cybersource_sdk', 'Gateway SDK of the worker',
+            {'all': sdk_stats()}, 'sdk')
+        queue_gauges = stats_gauges(
+            'cybersource_webhook_queue', 'Webhook event queue',
+            {'all': queue}, 'queue')
+        return request.make_response(registry.render(queue_gauges, gauges), headers=[
+            ('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+        ])
 
     # =========================================
     # UTILIDADES
     # =========================================
     def detect_card_type(self, number):
-        if number.startswith('4'):
-            return "001"
-        if number.startswith(('51', '52', '53', '54', '55')):
-            return "002"
-        if number.startswith(('34', '37')):
-            return "003"
-        return "000"
-
-    def get_configuration(self):
-        rec = request.env['payment.provider'].sudo().search([('code', '=', 'cybersource')], limit=1)
-        if not rec:
-            _logger.error("❌ No se encontró el proveedor 'cybersource'.")
-            raise ValidationError("No hay proveedor CyberSource configurado.")
-
-        _logger.info("🧩 Configuración del proveedor extraída correctamente.")
-
-        return {
-            "authentication_type": "http_signature",
-            "run_environment": "apitest.cybersource.com",
-            "merchantid": rec.cyber_merchant,
-            "merchant_keyid": rec.cyber_key,
-            "merchant_secretkey": rec.cyber_secret_key,
-            "timeout": 1000,
-        }
+        entry = get_bin_index().lookup(number)
+        return entry.card_type if entry else "000"
+
+    def get_provider(self, tx, brand=None, currency=None):
+        """ Route the payment of the transaction to a merchant """
+        provider = request.env['payment.provider'].sudo()._cybersource_route(
+            tx.company_id.id, (currency or tx.currency_id).id, brand,
+            preferred_id=tx.provider_id.id)
+        if provider and provider != tx.provider_id:
+            _logger.info("Payment %s routed from provider %s to %s",
+                         tx.reference, tx.provider_id.id, provider.id)
+            tx.provider_id = provider
+        return provider
@@ -20,5 +20,14 @@
 #
 ###############################################################################
 from . import account_payment_method
+from . import cybersource_payment_claim
+from . import cybersource_payment_stat
+from . import cybersource_payment_stat_hourly
+from . import cybersource_rate_limit
+from . import cybersource_reconciliation
+from . import cybersource_reconciliation_line
+from . import cybersource_webhook_event
 from . import payment_provider
+from . import payment_token
 from . import payment_transaction
+from . import res_partner
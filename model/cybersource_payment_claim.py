@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+import time
+
+from odoo import api, fields, models
+
+
+class CybersourcePaymentClaim(models.Model):
+    """ Claim on a transaction reference, shared by all the workers, making
+    sure a reference is sent to CyberSource only once at a time and
+    replaying its result to duplicate submissions """
+    _name = 'cybersource.payment.claim'
+    _description = 'CyberSource Payment Claim'
+
+    reference = fields.Char(string='Reference', required=True, readonly=True,
+                            help='Reference of the claimed transaction')
+    state = fields.Selection([('processing', 'Processing'),
+                              ('pending', 'Pending'), ('done', 'Done')],
+                             string='Status', required=True, readonly=True,
+                             help='Whether the payment is still being sent, '
+                                  'sent without a final answer yet or '
+                                  'settled')
+    result = fields.Json(string='Result', readonly=True,
+                         help='Response returned to the submission')
+    expires_at = fields.Datetime(string='Expires At', required=True,
+                                 readonly=True,
+                                 help='Moment after which a claim still '
+                                      'processing can be taken again, and a '
+                                      'settled one deleted')
+
+    _sql_constraints = [
+        ('reference_uniq', 'unique(reference)',
+         'A reference can only be claimed once.'),
+    ]
+
+    # Interval between two checks of a claim held by another worker
+    _POLL_INTERVAL = 0.25
+
+    @api.model
+    def _claim(self, reference, provider):
+        """ Claim ``reference`` for the current request.
+
+        Claims are committed in their own cursor so that they are visible to
+        the other workers at once. If another request holds the claim, wait
+        for its result until the provider deadline expires.
+
+        :return: ``(True, None)`` when the claim is ours, ``(False, result)``
+            otherwise, where ``result`` is None if the other request did not
+            finish in time
+        """
+        # A claim whose owner died is taken over once it is this old. A live
+        # owner may spend: the payment call, the recovery budget, a last
+        # lookup started before the budget ran out and a resubmission
+        deadline = provider.cyber_request_deadline
+        stale_after = (deadline * 3
+                       + max(provider.cyber_recovery_budget, 0) + 30)
+        wait_until = time.monotonic() + deadline
+        while True:
+            with self.env.registry.cursor() as cr:
+                cr.execute("""
+                    INSERT INTO cybersource_payment_claim
+                        (reference, state, expires_at, create_uid,
+                         create_date, write_uid, write_date)
+                    VALUES (%(reference)s, 'processing',
+                            (now() at time zone 'UTC')
+                                + %(stale)s * interval '1 second',
+                            %(uid)s, now() at time zone 'UTC',
+                            %(uid)s, now() at time zone 'UTC')
+                    ON CONFLICT (reference) DO UPDATE
+                       SET state = 'processing', result = NULL,
+                           expires_at = EXCLUDED.expires_at,
+                           write_date = EXCLUDED.write_date
+                     WHERE cybersource_payment_claim.expires_at
+                           < now() at time zone 'UTC'
+                       AND cybersource_payment_claim.state = 'processing'
+                 RETURNING id
+                """, {'reference': reference, 'stale': stale_after,
+                      'uid': self.env.uid})
+                if cr.fetchone():
+                    return True, None
+                cr.execute("""
+                    SELECT state, result FROM cybersource_payment_claim
+                     WHERE reference = %s
+                """, [reference])
+                row = cr.fetchone()
+            if row and row[0] in ('pending', 'done'):
+                return False, row[1]
+            if time.monotonic() >= wait_until:
+                return False, None
+            time.sleep(self._POLL_INTERVAL)
+
+    @api.model
+    def _complete(self, reference, result, provider, pending=False):
+        """ Store the result of a claimed reference and keep it for the
+        idempotency window of the provider. A ``pending`` result (the payment
+        may have been charged) is kept until the transaction settles. """
+        with self.env.registry.cursor() as cr:
+            cr.execute("""
+                UPDATE cybersource_payment_claim
+                   SET state = %s, result = %s::jsonb,
+                       expires_at = (now() at time zone 'UTC')
+                           + %s * interval '1 second',
+                       write_date = now() at time zone 'UTC'
+                 WHERE reference = %s
+            """, ['pending' if pending else 'done', json.dumps(result),
+                  provider.cyber_idempotency_window, reference])
+
+    @api.model
+    def _get_result(self, reference):
+        """ Return the stored result of a reference, or None """
+        self.env.cr.execute("""
+            SELECT result FROM cybersource_payment_claim
+             WHERE reference = %s AND state != 'processing'
+        """, [reference])
+        row = self.env.cr.fetchone()
+        return row and row[0]
+
+    @api.model
+    def _release(self, reference):
+        """ Give up the claim of a reference which was not settled so that it
+        can be submitted again """
+        with self.env.registry.cursor() as cr:
+            cr.execute("""
+                DELETE FROM cybersource_payment_claim
+                 WHERE reference = %s AND state = 'processing'
+            """, [reference])
+
+    @api.autovacuum
+    def _gc_expired_claims(self):
+        """ Delete the expired claims whose transaction is settled: the
+        result of a payment that may have been charged is kept until then """
+        self.env.cr.execute("""
+            DELETE FROM cybersource_payment_claim claim
+             WHERE claim.expires_at < now() at time zone 'UTC'
+               AND NOT EXISTS (
+                    SELECT 1 FROM payment_transaction tx
+                     WHERE tx.reference = claim.reference
+                       AND tx.state IN ('draft', 'pending'))
+        """)
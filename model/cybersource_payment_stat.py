@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import logging
+
+from odoo import api, fields, models
+
+from ..const import CARD_TYPES, FLOW_OUTCOMES
+
+_logger = logging.getLogger(__name__)
+
+
+class CybersourcePaymentStat(models.Model):
+    """ One row per checkout payment flow, rolled up every hour into
+    :class:`CybersourcePaymentStatHourly` for the dashboard """
+    _name = 'cybersource.payment.stat'
+    _description = 'CyberSource Payment Flow'
+    _order = 'id desc'
+    _log_access = False
+
+    flow_at = fields.Datetime(string='Date', required=True, readonly=True,
+                              index=True, help='End of the payment flow')
+    provider_id = fields.Many2one('payment.provider', string='Provider',
+                                  readonly=True, ondelete='set null',
+                                  help='Merchant the payment was routed to')
+    card_type = fields.Selection(CARD_TYPES, string='Card Type',
+                                 readonly=True,
+                                 help='Card type detected from the BIN')
+    outcome = fields.Selection(FLOW_OUTCOMES, string='Outcome',
+                               required=True, readonly=True,
+                               help='Result of the payment flow')
+    reason = fields.Char(string='Reason', readonly=True,
+                         help='CyberSource reason of a declined payment')
+    duration = fields.Float(string='Duration (ms)', readonly=True,
+                            help='Time spent in the whole flow')
+    gateway_duration = fields.Float(string='Gateway Time (ms)',
+                                    readonly=True,
+                                    help='Time spent waiting for CyberSource')
+
+    # Raw flows kept for drill-down once rolled up
+    _RETENTION_DAYS = 30
+
+    @api.model
+    def _record(self, provider_id, card_type, outcome, reason, duration,
+                gateway_duration):
+        """ Store the statistics of a payment flow.
+
+        The row is committed in its own cursor so that it survives a
+        rolled back request; failing to record never fails the payment.
+        """
+        try:
+            with self.env.registry.cursor() as cr:
+                cr.execute("""
+                    INSERT INTO cybersource_payment_stat
+                        (flow_at, provider_id, card_type, outcome, reason,
+                         duration, gateway_duration)
+                    VALUES (now() at time zone 'UTC', %s, %s, %s, %s, %s, %s)
+                """, [provider_id or None, card_type, outcome, reason,
+                      duration, gateway_duration])
+        except Exception:
+            _logger.exception("Could not record the CyberSource payment flow")
+
+    @api.autovacuum
+    def _gc_rolled_up_stats(self):
+        """ Delete the rolled up flows older than the retention period """
+        watermark = self.env['cybersource.payment.stat.hourly']._watermark()
+        self.env.cr.execute("""
+            DELETE FROM cybersource_payment_stat
+             WHERE id <= %s
+               AND flow_at < now() at time zone 'UTC' - %s * interval '1 day'
+        """, [watermark, self._RETENTION_DAYS])
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo import api, fields, models
+from odoo.tools import sql
+
+from ..const import CARD_TYPES, FLOW_OUTCOMES
+
+
+class CybersourcePaymentStatHourly(models.Model):
+    """ Hourly aggregate of the payment flows read by the dashboard, so that
+    it loads in the same time whatever the history kept """
+    _name = 'cybersource.payment.stat.hourly'
+    _description = 'CyberSource Hourly Payment Statistics'
+    _order = 'hour desc'
+    _log_access = False
+
+    hour = fields.Datetime(string='Hour', required=True, readonly=True,
+                           index=True, help='Start of the aggregated hour')
+    provider_id = fields.Many2one('payment.provider', string='Provider',
+                                  readonly=True, ondelete='cascade',
+                                  help='Merchant the payments were routed to')
+    card_type = fields.Selection(CARD_TYPES, string='Card Type',
+                                 readonly=True,
+                                 help='Card type detected from the BIN')
+    outcome = fields.Selection(FLOW_OUTCOMES, string='Outcome',
+                               required=True, readonly=True,
+                               help='Result of the payment flows')
+    reason = fields.Char(string='Reason', readonly=True,
+                         help='CyberSource reason of the declined payments')
+    flow_count = fields.Integer(string='Payments', readonly=True,
+                                help='Number of payment flows')
+    total_duration = fields.Float(string='Total Duration (ms)',
+                                  readonly=True,
+                                  help='Time spent in the payment flows')
+    max_duration = fields.Float(string='Max Duration (ms)', readonly=True,
+                                group_operator='max',
+                                help='Slowest payment flow of the hour')
+    gateway_duration = fields.Float(string='Gateway Time (ms)',
+                                    readonly=True,
+                                    help='Time spent waiting for CyberSource')
+    avg_duration = fields.Float(string='Average Duration (ms)',
+                                compute='_compute_avg_duration',
+                                help='Average time of a payment flow')
+    last_stat_id = fields.Integer(string='Last Flow', readonly=True,
+                                  index=True, group_operator='max',
+                                  help='Last raw flow rolled up into the row')
+
+    # Flows younger than this are left to the next run: their request may
+    # still be committing rows with lower ids
+    _ROLLUP_LAG = 60
+
+    def init(self):
+        """ Make every dimension part of the key, empty values included, for
+        the UPSERT of the rollup """
+        sql.create_unique_index(
+            self.env.cr, 'cybersource_payment_stat_hourly_key_uniq',
+            self._table, ['hour', 'COALESCE(provider_id, 0)',
+                          "COALESCE(card_type, '')", 'outcome',
+                          "COALESCE(reason, '')"])
+
+    @api.depends('flow_count', 'total_duration')
+    def _compute_avg_duration(self):
+        for row in self:
+            row.avg_duration = (row.total_duration / row.flow_count
+                                if row.flow_count else 0.0)
+
+    @api.model
+    def _watermark(self):
+        """ Return the id of the last raw flow already rolled up """
+        self.env.cr.execute("""
+            SELECT COALESCE(max(last_stat_id), 0)
+              FROM cybersource_payment_stat_hourly
+        """)
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _cron_rollup(self):
+        """ Add the raw flows recorded since the last run to their hour.
+
+        Only the flows past the watermark are read, so each run costs the
+        same whatever the history kept.
+        """
+        watermark = self._watermark()
+        self.env.cr.execute("""
+            SELECT max(id) FROM cybersource_payment_stat
+             WHERE id > %s
+               AND flow_at < now() at time zone 'UTC'
+                             - %s * interval '1 second'
+        """, [watermark, self._ROLLUP_LAG])
+        upper = self.env.cr.fetchone()[0]
+        if not upper:
+            return
+        self.env.cr.execute("""
+            INSERT INTO cybersource_payment_stat_hourly AS h
+                (hour, provider_id, card_type, outcome, reason, flow_count,
+                 total_duration, max_duration, gateway_duration,
+                 last_stat_id)
+            SELECT date_trunc('hour', flow_at), provider_id, card_type,
+                   outcome, reason, count(*), sum(duration), max(duration),
+                   sum(COALESCE(gateway_duration, 0)), max(id)
+              FROM cybersource_payment_stat
+             WHERE id > %s AND id <= %s
+             GROUP BY 1, 2, 3, 4, 5
+            ON CONFLICT (hour, COALESCE(provider_id, 0),
+                         COALESCE(card_type, ''), outcome,
+                         COALESCE(reason, ''))
+            DO UPDATE
+               SET flow_count = h.flow_count + EXCLUDED.flow_count,
+                   total_duration = h.total_duration
+                                    + EXCLUDED.total_duration,
+                   max_duration = GREATEST(h.max_duration,
+                                           EXCLUDED.max_duration),
+                   gateway_duration = h.gateway_duration
+                                      + EXCLUDED.gateway_duration,
+                   last_stat_id = GREATEST(h.last_stat_id,
+                                           EXCLUDED.last_stat_id)
+        """, [watermark, upper])
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from psycopg2.extras import execute_values
+
+from odoo import api, fields, models
+from odoo.tools import config
+
+# Advisory lock namespace of the checkout concurrency slots ('CYBS')
+CONCURRENCY_LOCK_KEY = 0x43594253
+
+
+class CybersourceRateLimit(models.Model):
+    """ Token buckets shared by all the workers, limiting the payment
+    attempts per client IP, partner and transaction reference """
+    _name = 'cybersource.rate.limit'
+    _description = 'CyberSource Rate Limit Bucket'
+    _log_access = False
+
+    key = fields.Char(string='Key', required=True, readonly=True,
+                      help='Provider and client the bucket limits')
+    tokens = fields.Float(string='Tokens', readonly=True,
+                          help='Payment attempts left in the bucket')
+    capacity = fields.Float(string='Capacity', readonly=True,
+                            help='Maximum number of tokens of the bucket')
+    rate = fields.Float(string='Refill Rate', readonly=True,
+                        help='Tokens added per second')
+    updated_at = fields.Datetime(string='Updated At', readonly=True,
+                                 help='Moment of the last attempt')
+
+    _sql_constraints = [
+        ('key_uniq', 'unique(key)', 'A bucket key must be unique.'),
+    ]
+
+    @api.model
+    def _consume(self, buckets):
+        """ Take one token from each bucket, refilling it first.
+
+        The buckets are updated with a single UPSERT committed in its own
+        cursor, so that the other workers see it at once and the request
+        transaction does not hold the rows.
+
+        :param buckets: ``(key, per_minute)`` of the buckets to consume;
+            buckets without limit are skipped
+        :return: the keys of the exhausted buckets
+        :rtype: list
+        """
+        rows = [(key, per_minute, per_minute / 60.0)
+                for key, per_minute in buckets if per_minute > 0]
+        if not rows:
+            return []
+        with self.env.registry.cursor() as cr:
+            # A refused attempt leaves the bucket at -1 instead of digging a
+            # deeper hole: clients get through again once it refills
+            result = execute_values(cr._obj, """
+                INSERT INTO cybersource_rate_limit AS b
+                    (key, capacity, rate, tokens, updated_at)
+                SELECT v.key, v.capacity, v.rate, v.capacity - 1,
+                       now() at time zone 'UTC'
+                  FROM (VALUES %s) AS v (key, capacity, rate)
+                ON CONFLICT (key) DO UPDATE
+                   SET capacity = EXCLUDED.capacity,
+                       rate = EXCLUDED.rate,
+                       tokens = GREATEST(-1, LEAST(EXCLUDED.capacity,
+                           b.tokens + EXTRACT(EPOCH FROM
+                               (now() at time zone 'UTC') - b.updated_at)
+                           * EXCLUDED.rate) - 1),
+                       updated_at = now() at time zone 'UTC'
+                RETURNING key, tokens
+            """, rows, template='(%s, %s::float, %s::float)', fetch=True)
+        return [key for key, tokens in result if tokens < 0]
+
+    @api.model
+    def _acquire_slot(self):
+        """ Take one of the ``cybersource_max_concurrent_payments`` checkout
+        slots of the server configuration for the current transaction.
+
+        Slots are transaction level advisory locks: they are released when
+        the request ends, whatever happens to the worker.
+
+        :return: whether a slot was free, always True without limit
+        """
+        slots = int(config.get('cybersource_max_concurrent_payments') or 0)
+        if slots <= 0:
+            return True
+        self.env.cr.execute("""
+            SELECT slot FROM generate_series(0, %s - 1) slot
+             WHERE pg_try_advisory_xact_lock(%s, slot)
+             LIMIT 1
+        """, [slots, CONCURRENCY_LOCK_KEY])
+        return bool(self.env.cr.fetchone())
+
+    @api.autovacuum
+    def _gc_idle_buckets(self):
+        """ Delete the buckets idle for an hour, full again anyway """
+        self.env.cr.execute("""
+            DELETE FROM cybersource_rate_limit
+             WHERE updated_at < now() at time zone 'UTC' - interval '1 hour'
+        """)
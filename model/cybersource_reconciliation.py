@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import io
+import logging
+import time
+from collections import Counter
+
+from psycopg2.extras import execute_values
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+from ..utils.report_parser import iter_chunks, iter_report_rows
+
+_logger = logging.getLogger(__name__)
+
+
+class CybersourceReconciliation(models.Model):
+    """ Import of a CyberSource Transaction Detail or Payment Batch Detail
+    report, matched against the payment transactions """
+    _name = 'cybersource.reconciliation'
+    _description = 'CyberSource Reconciliation'
+    _order = 'id desc'
+
+    # Number of report rows matched and written at once
+    _CHUNK_SIZE = 2000
+    # Reason codes of the accepted requests (success, partial approval)
+    _ACCEPTED_REASON_CODES = ('100', '110')
+
+    name = fields.Char(string='Name', required=True,
+                       help='Name of the reconciliation')
+    report_file = fields.Binary(string='Report', attachment=True,
+                                required=True,
+                                help='CSV or XML report exported from the '
+                                     'CyberSource Business Center')
+    report_filename = fields.Char(string='Report Name',
+                                  help='Name of the report file')
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')],
+                             string='Status', default='draft', readonly=True,
+                             help='Whether the report was imported')
+    line_ids = fields.One2many('cybersource.reconciliation.line',
+                               'reconciliation_id', string='Lines',
+                               readonly=True, help='Rows of the report')
+    row_count = fields.Integer(string='Rows', readonly=True,
+                               help='Number of rows of the report')
+    matched_count = fields.Integer(string='Matched', readonly=True,
+                                   help='Rows matching their transaction')
+    amount_mismatch_count = fields.Integer(
+        string='Amount Mismatches', readonly=True,
+        help='Rows whose amount differs from their transaction')
+    currency_mismatch_count = fields.Integer(
+        string='Currency Mismatches', readonly=True,
+        help='Rows whose currency differs from their transaction')
+    state_mismatch_count = fields.Integer(
+        string='State Mismatches', readonly=True,
+        help='Rows whose transaction is not in the expected state')
+    missing_count = fields.Integer(string='Missing', readonly=True,
+                                   help='Rows without transaction in Odoo')
+    duration = fields.Float(string='Import Duration', readonly=True,
+                            help='Seconds spent importing the report')
+
+    def action_import(self):
+        """ Stream the report row by row, match the rows against the
+        transactions one chunk at a time and write the lines with batched
+        inserts, so that memory use does not depend on the report size """
+        self.ensure_one()
+        started = time.monotonic()
+        self.env.cr.execute("""
+            DELETE FROM cybersource_reconciliation_line
+             WHERE reconciliation_id = %s
+        """, [self.id])
+        counts = Counter()
+        with self._open_report() as stream:
+            for chunk in iter_chunks(iter_report_rows(stream),
+                                     self._CHUNK_SIZE):
+                counts.update(self._import_chunk(chunk))
+                self.env.invalidate_all()
+        self.invalidate_recordset(['line_ids'])
+        self.write({
+            'state': 'done',
+            'row_count': sum(counts.values()),
+            'matched_count': counts['matched'],
+            'amount_mismatch_count': counts['amount_mismatch'],
+            'currency_mismatch_count': counts['currency_mismatch'],
+            'state_mismatch_count': counts['state_mismatch'],
+            'missing_count': counts['missing'],
+            'duration': time.monotonic() - started,
+        })
+        _logger.info("CyberSource reconciliation %s: %s rows in %.1fs (%s)",
+                     self.id, self.row_count, self.duration, dict(counts))
+
+    def _open_report(self):
+        """ Return a binary file object on the report, read from the
+        filestore when possible instead of loading it in memory """
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name), ('res_id', '=', self.id),
+            ('res_field', '=', 'report_file')], limit=1)
+        if not attachment:
+            raise UserError(_("Upload a report to import."))
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(attachment.raw)
+
+    def _match_transactions(self, references):
+        """ Return the ``(id, amount, state, currency)`` of the transactions
+        of the given merchant references, by reference. The references
+        matching no transaction are looked up by provider reference
+        (``cybersource-<reference>``) """
+        tx_model = self.env['payment.transaction'].sudo()
+        txs_by_reference = tx_model._get_txs_from_notification_batch(
+            'cybersource', references)
+        missing = {'cybersource-%s' % reference: reference
+                   for reference in set(references)
+                   if reference and reference not in txs_by_reference}
+        if missing:
+            for tx in tx_model.search([
+                ('provider_reference', 'in', list(missing)),
+                ('provider_id', 'in', self.env[
+                    'payment.provider']._cybersource_get_provider_ids()),
+            ]):
+                txs_by_reference[missing[tx.provider_reference]] = tx
+        return {reference: (tx.id, tx.amount, tx.state, tx.currency_id.name)
+                for reference, tx in txs_by_reference.items()}
+
+    def _import_chunk(self, rows):
+        """ Match a chunk of report rows and insert their lines """
+        transactions = self._match_transactions(
+            [row['reference'] for row in rows])
+        counts = Counter()
+        values = []
+        uid = self.env.uid
+        for row in rows:
+            tx_id, tx_amount, tx_state, tx_currency = transactions.get(
+                row['reference'], (None, None, None, None))
+            status, report_amount = self._compare_row(row, tx_amount,
+                                                      tx_state, tx_currency)
+            counts[status] += 1
+            values.append((
+                self.id, row['reference'], row.get('request_id'),
+                row.get('transaction_type'), report_amount,
+                row.get('currency'), tx_id, tx_amount, tx_state, status,
+                uid, uid,
+            ))
+        execute_values(self.env.cr._obj, """
+            INSERT INTO cybersource_reconciliation_line
+                (reconciliation_id, reference, request_id, transaction_type,
+                 report_amount, report_currency, transaction_id,
+                 transaction_amount, transaction_state, status,
+                 create_uid, write_uid, create_date, write_date)
+            VALUES %s
+        """, values, template="""
+            (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+             now() at time zone 'UTC', now() at time zone 'UTC')
+        """, page_size=len(values))
+        return counts
+
+    def _compare_row(self, row, tx_amount, tx_state, tx_currency):
+        """ Return the reconciliation status of a report row and its amount.
+        A declined row (reason code other than success or partial approval,
+        or RCode other than 1 in the XML reports) is expected on a cancelled
+        or failed transaction """
+        try:
+            report_amount = float(row.get('amount') or 0.0)
+        except ValueError:
+            report_amount = None
+        if tx_state is None:
+            return 'missing', report_amount
+        if report_amount is None or abs(
+                abs(report_amount) - abs(tx_amount)) >= 0.005:
+            return 'amount_mismatch', report_amount
+        report_currency = (row.get('currency') or '').upper()
+        if report_currency and report_currency != tx_currency:
+            return 'currency_mismatch', report_amount
+        transaction_type = (row.get('transaction_type') or '').lower()
+        if not self._is_row_accepted(row):
+            expected_states = ('cancel', 'error')
+        elif 'reversal' in transaction_type or 'void' in transaction_type:
+            expected_states = ('cancel',)
+        else:
+            expected_states = ('authorized', 'done')
+        if tx_state not in expected_states:
+            return 'state_mismatch', report_amount
+        return 'matched', report_amount
+
+    def _is_row_accepted(self, row):
+        """ Return whether the gateway accepted the request of a report row;
+        a row without outcome counts as accepted """
+        if row.get('reason_code'):
+            return row['reason_code'] in self._ACCEPTED_REASON_CODES
+        if row.get('rcode'):
+            return row['rcode'] == '1'
+        return True
+
+    def action_view_lines(self):
+        """ Open the lines of the reconciliation """
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("Reconciliation Lines"),
+            'res_model': 'cybersource.reconciliation.line',
+            'view_mode': 'tree',
+            'domain': [('reconciliation_id', '=', self.id)],
+            'context': {'search_default_filter_mismatch': 1},
+        }
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo import fields, models
+
+
+class CybersourceReconciliationLine(models.Model):
+    """ Row of a CyberSource report with the transaction it matches """
+    _name = 'cybersource.reconciliation.line'
+    _description = 'CyberSource Reconciliation Line'
+    _order = 'id'
+
+    reconciliation_id = fields.Many2one('cybersource.reconciliation',
+                                        string='Reconciliation',
+                                        required=True, ondelete='cascade',
+                                        index=True,
+                                        help='Reconciliation of the row')
+    reference = fields.Char(string='Reference', index=True,
+                            help='Merchant reference of the row')
+    request_id = fields.Char(string='Request ID',
+                             help='CyberSource request identifier')
+    transaction_type = fields.Char(string='Type',
+                                   help='CyberSource application of the row')
+    report_amount = fields.Float(string='Report Amount',
+                                 help='Amount of the row')
+    report_currency = fields.Char(string='Currency',
+                                  help='Currency of the row')
+    transaction_id = fields.Many2one('payment.transaction',
+                                     string='Transaction',
+                                     ondelete='set null',
+                                     help='Matching payment transaction')
+    transaction_amount = fields.Float(string='Transaction Amount',
+                                      help='Amount of the transaction')
+    transaction_state = fields.Char(string='Transaction Status',
+                                    help='Status of the transaction')
+    status = fields.Selection([('matched', 'Matched'),
+                               ('amount_mismatch', 'Amount Mismatch'),
+                               ('currency_mismatch', 'Currency Mismatch'),
+                               ('state_mismatch', 'State Mismatch'),
+                               ('missing', 'Missing')],
+                              string='Result', index=True,
+                              help='Outcome of the matching')
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import logging
+import threading
+import time
+
+from odoo import api, fields, models, _
+
+from ..const import WEBHOOK_EVENT_STATES
+from ..utils.webhook import extract_event
+
+_logger = logging.getLogger(__name__)
+
+
+class CybersourceWebhookEvent(models.Model):
+    """ Queue of the CyberSource webhook notifications, filled by the
+    webhook route and drained in batches by a cron """
+    _name = 'cybersource.webhook.event'
+    _description = 'CyberSource Webhook Event'
+    _order = 'id'
+
+    event_type = fields.Char(string='Event Type', readonly=True,
+                             help='CyberSource event type')
+    reference = fields.Char(string='Reference', readonly=True,
+                            help='Merchant reference of the transaction')
+    gateway_id = fields.Char(string='Gateway ID', readonly=True,
+                             help='CyberSource identifier of the resource')
+    payload = fields.Json(string='Payload', readonly=True,
+                          help='Notification as received')
+    state = fields.Selection([('pending', 'Pending'), ('done', 'Done'),
+                              ('ignored', 'Ignored'), ('error', 'Error')],
+                             string='Status', default='pending',
+                             required=True, readonly=True, index=True,
+                             help='Processing status of the event')
+    state_message = fields.Char(string='Message', readonly=True,
+                                help='Reason why the event was not applied')
+    processed_at = fields.Datetime(string='Processed At', readonly=True,
+                                   help='Moment the event was applied')
+    lag = fields.Float(string='Processing Lag', readonly=True,
+                       help='Seconds between the reception and the '
+                            'processing of the event')
+
+    @api.model
+    def _enqueue(self, event):
+        """ Store a verified notification for the next cron run """
+        event_type, reference, gateway_id = extract_event(event)
+        return self.create({
+            'event_type': event_type,
+            'reference': reference,
+            'gateway_id': gateway_id,
+            'payload': event,
+        })
+
+    @api.model
+    def _cron_process_events(self, batch_size=500, time_limit=240):
+        """ Drain the queue in batches until it is empty or the time limit
+        is reached, committing after each batch """
+        started = time.monotonic()
+        while time.monotonic() - started < time_limit:
+            events = self.search([('state', '=', 'pending')],
+                                 limit=batch_size)
+            if not events:
+                break
+            events._process_batch()
+            if not getattr(threading.current_thread(), 'testing', False):
+                self.env.cr.commit()
+
+    def _process_batch(self):
+        """ Apply the events of the recordset to their transactions.
+
+        The transactions of the whole batch are resolved with one query by
+        reference (and one by gateway id for the events without reference),
+        then each state change is applied to all the transactions concerned
+        at once.
+        """
+        tx_model = self.env['payment.transaction']
+        txs_by_reference = tx_model._get_txs_from_notification_batch(
+            'cybersource', self.mapped('reference'))
+        # Most gateway events only carry the id of the CyberSource payment,
+        # capture or refund
+        gateway_ids = [event.gateway_id for event in self
+                       if event.gateway_id
+                       and event.reference not in txs_by_reference]
+        txs_by_gateway_id = {}
+        if gateway_ids:
+            for tx in tx_model.search([
+                '|', ('cyber_payment_id', 'in', gateway_ids),
+                ('cyber_capture_id', 'in', gateway_ids),
+                ('provider_id', 'in', self.env[
+                    'payment.provider']._cybersource_get_provider_ids()),
+            ]):
+                txs_by_gateway_id[tx.cyber_payment_id] = tx
+                if tx.cyber_capture_id:
+                    txs_by_gateway_id[tx.cyber_capture_id] = tx
+
+        events_by_state = {}
+        done_events = ignored_events = self.browse()
+        for event in self:
+            target_state = WEBHOOK_EVENT_STATES.get(event.event_type)
+            if not target_state:
+                ignored_events |= event
+                continue
+            tx = (txs_by_reference.get(event.reference)
+                  or txs_by_gateway_id.get(event.gateway_id))
+            if not tx:
+                event.write({
+                    'state': 'error',
+                    'state_message': _("No transaction found"),
+                })
+                continue
+            if target_state == 'authorized' and not tx.capture_manually:
+                target_state = 'done'
+            events_by_state.setdefault(target_state, []).append((event, tx))
+
+        for target_state, pairs in events_by_state.items():
+            try:
+                with self.env.cr.savepoint():
+                    self._apply_state(tx_model.union(
+                        *(tx for __, tx in pairs)), target_state)
+            except Exception:
+                _logger.warning("CyberSource webhook batch failed for state "
+                                "%s, applying the events one by one",
+                                target_state, exc_info=True)
+            else:
+                done_events |= self.union(*(event for event, __ in pairs))
+                continue
+            # A single faulty transaction must not block the whole queue
+            for event, tx in pairs:
+                try:
+                    with self.env.cr.savepoint():
+                        self._apply_state(tx, target_state)
+                except Exception as error:
+                    event.write({'state': 'error',
+                                 'state_message': str(error)})
+                else:
+                    done_events |= event
+        if any(state == 'done' for state in events_by_state):
+            self.env['payment.transaction']._cybersource_trigger_post_process()
+
+        if done_events:
+            done_events.write({'state': 'done'})
+        if ignored_events:
+            ignored_events.write({'state': 'ignored'})
+        self.flush_recordset()
+        now = fields.Datetime.now()
+        self.env.cr.execute("""
+            UPDATE cybersource_webhook_event
+               SET processed_at = %s,
+                   lag = EXTRACT(EPOCH FROM %s - create_date)
+             WHERE id IN %s
+        """, [now, now, tuple(self.ids)])
+        self.invalidate_recordset(['processed_at', 'lag'])
+        _logger.info("Processed %s CyberSource webhook events: %s",
+                     len(self), self._get_queue_stats())
+
+    @api.model
+    def _apply_state(self, txs, target_state):
+        """ Move the transactions ``txs`` to the state of a webhook event """
+        message = _("CyberSource notification")
+        if target_state == 'done':
+            txs._set_done()
+        elif target_state == 'authorized':
+            txs._set_authorized()
+        elif target_state == 'pending':
+            txs._set_pending()
+        elif target_state == 'cancel':
+            txs._set_canceled(state_message=message)
+        else:
+            txs._set_error(message)
+
+    @api.model
+    def _get_queue_stats(self):
+        """ Return the queue length, the ingest rate of the last minute and
+        the processing lag of the last hour """
+        self.env.cr.execute("""
+            SELECT count(*) FILTER (WHERE state = 'pending'),
+                   count(*) FILTER (WHERE create_date
+                       > now() at time zone 'UTC' - interval '1 minute'),
+                   avg(lag) FILTER (WHERE processed_at
+                       > now() at time zone 'UTC' - interval '1 hour'),
+                   max(lag) FILTER (WHERE processed_at
+                       > now() at time zone 'UTC' - interval '1 hour')
+              FROM cybersource_webhook_event
+             WHERE state = 'pending'
+                OR create_date > now() at time zone 'UTC' - interval '1 hour'
+        """)
+        pending, last_minute, avg_lag, max_lag = self.env.cr.fetchone()
+        return {
+            'pending': pending,
+            'ingest_per_minute': last_minute,
+            'avg_lag': round(avg_lag or 0.0, 3),
+            'max_lag': round(max_lag or 0.0, 3),
+        }
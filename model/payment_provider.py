@@ -19,7 +19,32 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
-from odoo import fields, models
+import json
+import logging
+
+from odoo import api, fields, models, tools
+
+from ..utils.bin_index import get_bin_index
+from ..utils.client_cache import GatewayClient, client_cache
+from ..utils.connection_pool import GatewayPoolManager
+from ..utils.gateway_executor import get_guard
+from ..utils.recovery import RESUBMITTED, SENT, RecoveryEngine, is_ambiguous
+from ..utils.sdk import build_api
+
+_logger = logging.getLogger(__name__)
+
+# Fields of the providers the routing table and the rate limits are built
+# from
+ROUTING_FIELDS = frozenset(('code', 'state', 'company_id', 'sequence',
+                            'available_currency_ids', 'cyber_card_types',
+                            'cyber_fallback_provider_id',
+                            'cyber_rate_limit_ip', 'cyber_rate_limit_partner',
+                            'cyber_rate_limit_reference'))
+
+# Cached methods built from the cybersource providers
+CACHED_METHODS = ('_cybersource_get_provider_ids',
+                  '_cybersource_get_routing_table',
+                  '_cybersource_get_rate_limits')
 
 
 class PaymentProvider(models.Model):
@@ -35,3 +60,359 @@ class PaymentProvider(models.Model):
     cyber_secret_key = fields.Char(string='Secret Key',
                                    help='Cybersource secret key')
     cyber_key = fields.Char(string='Secret Key', help='Cyber key')
+    cyber_card_types = fields.Char(
+        string='Card Brands',
+        help='Comma separated card brands routed to this merchant (visa, '
+             'mastercard, amex, discover, diners, jcb, maestro, unionpay), '
+             'empty for every brand')
+    cyber_fallback_provider_id = fields.Many2one(
+        'payment.provider', string='Fallback Merchant',
+        domain="[('code', '=', 'cybersource'), ('id', '!=', id)]",
+        help='Merchant receiving the payments while the circuit breaker of '
+             'this one is open')
+    cyber_webhook_key_id = fields.Char(
+        string='Webhook Key ID',
+        help='Identifier of the key signing the CyberSource webhooks')
+    cyber_webhook_secret = fields.Char(
+        string='Webhook Secret', groups='base.group_system',
+        help='Base64 encoded key signing the CyberSource webhooks')
+    cyber_pool_maxsize = fields.Integer(
+        string='Gateway Connections', default=10,
+        help='Maximum number of persistent connections to the gateway kept '
+             'by each worker')
+    cyber_pool_idle_timeout = fields.Integer(
+        string='Connection Idle Timeout', default=60,
+        help='Seconds after which an idle gateway connection is closed')
+    cyber_executor_workers = fields.Integer(
+        string='Concurrent Gateway Calls', default=4,
+        help='Maximum number of gateway calls running at once in each worker')
+    cyber_request_deadline = fields.Float(
+        string='Gateway Deadline', default=15.0,
+        help='Seconds after which a gateway call is abandoned')
+    cyber_breaker_threshold = fields.Integer(
+        string='Breaker Threshold', default=5,
+        help='Consecutive timeouts or server errors opening the circuit '
+             'breaker')
+    cyber_breaker_reset_timeout = fields.Integer(
+        string='Breaker Cool Down', default=30,
+        help='Seconds during which payments fail fast once the circuit '
+             'breaker is open')
+    cyber_recovery_budget = fields.Float(
+        string='Recovery Budget', default=20.0,
+        help='Seconds spent searching the gateway for a payment whose '
+             'submission timed out before sending it again, 0 to disable')
+    cyber_idempotency_window = fields.Integer(
+        string='Idempotency Window', default=600,
+        help='Seconds during which the result of a payment is replayed to '
+             'duplicate submissions of the same reference')
+    cyber_batch_size = fields.Integer(
+        string='Batch Size', default=100,
+        help='Number of transactions captured or refunded per batch')
+    cyber_batch_workers = fields.Integer(
+        string='Batch Concurrency', default=4,
+        help='Number of concurrent gateway calls of a batch')
+    cyber_batch_rate_limit = fields.Float(
+        string='Batch Rate Limit', default=10.0,
+        help='Maximum number of gateway calls per second of a batch, 0 for '
+             'no limit')
+    cyber_rate_limit_ip = fields.Integer(
+        string='Attempts per IP', default=20,
+        help='Payment attempts allowed per minute from one IP address, 0 '
+             'for no limit')
+    cyber_rate_limit_partner = fields.Integer(
+        string='Attempts per Customer', default=10,
+        help='Payment attempts allowed per minute for one customer, 0 for '
+             'no limit')
+    cyber_rate_limit_reference = fields.Integer(
+        string='Attempts per Transaction', default=3,
+        help='Payment attempts allowed per minute on one transaction, 0 '
+             'for no limit')
+    cyber_endpoint = fields.Char(
+        string='Gateway Endpoint Override',
+        help='Base URL receiving the gateway calls instead of CyberSource, '
+             'e.g. the local stand-in server http://127.0.0.1:8099. Only '
+             'used in test mode')
+
+    def _compute_feature_support_fields(self):
+        """ Override of `payment` to enable the manual capture, the refunds
+        and the tokenization """
+        super()._compute_feature_support_fields()
+        self.filtered(lambda provider: provider.code == 'cybersource').update({
+            'support_manual_capture': 'full_only',
+            'support_refund': 'partial',
+            'support_tokenization': True,
+        })
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """ Forget the cached cybersource providers """
+        providers = super().create(vals_list)
+        if any(provider.code == 'cybersource' for provider in providers):
+            self._cybersource_clear_caches()
+        return providers
+
+    def write(self, vals):
+        """ Drop the cached routing and gateway clients of the updated
+        cybersource providers """
+        clear = not ROUTING_FIELDS.isdisjoint(vals) and (
+            vals.get('code') == 'cybersource'
+            or any(provider.code == 'cybersource' for provider in self))
+        res = super().write(vals)
+        if clear:
+            self._cybersource_clear_caches()
+        self._cybersource_invalidate_clients()
+        return res
+
+    def unlink(self):
+        """ Drop the cached routing and gateway clients of the deleted
+        cybersource providers """
+        if any(provider.code == 'cybersource' for provider in self):
+            self._cybersource_clear_caches()
+        self._cybersource_invalidate_clients()
+        return super().unlink()
+
+    @api.model
+    def _cybersource_clear_caches(self):
+        """ Drop the cached provider ids, routing table and rate limits of
+        this worker, leaving the rest of the registry cache, and signal the
+        other workers to drop their cache """
+        methods = {getattr(type(self), name).__cache__.method
+                   for name in CACHED_METHODS}
+        registry = self.env.registry
+        # Entries are keyed by (model name, method, arguments...), see
+        # odoo.tools.cache.log_ormcache_stats
+        cache = registry._Registry__caches['default']
+        for key in list(cache.d):
+            if key[0] == self._name and key[1] in methods:
+                cache.d.pop(key, None)
+        registry.cache_invalidated.add('default')
+
+    @api.model
+    @tools.ormcache()
+    def _cybersource_get_provider_ids(self):
+        """ Return the ids of the cybersource providers, cached until a
+        provider changes code """
+        return tuple(self.sudo().with_context(active_test=False).search(
+            [('code', '=', 'cybersource')]).ids)
+
+    def _register_hook(self):
+        """ Build the routing table when the registry loads """
+        super()._register_hook()
+        self._cybersource_get_routing_table()
+
+    @api.model
+    @tools.ormcache()
+    def _cybersource_get_routing_table(self):
+        """ Return the enabled cybersource providers able to process each
+        ``(company_id, currency_id, brand)``, ``None`` standing for any
+        currency or brand, cached until a provider changes.
+
+        :return: the provider ids by sequence, by key
+        :rtype: dict
+        """
+        table = {}
+        for provider in self.sudo().search([('code', '=', 'cybersource'),
+                                            ('state', '!=', 'disabled')]):
+            brands = provider._cybersource_get_card_brands() or [None]
+            for currency_id in provider.available_currency_ids.ids or [None]:
+                for brand in brands:
+                    table.setdefault(
+                        (provider.company_id.id, currency_id, brand), []
+                    ).append(provider.id)
+        return {key: tuple(ids) for key, ids in table.items()}
+
+    @api.model
+    @tools.ormcache()
+    def _cybersource_get_rate_limits(self):
+        """ Return the attempts allowed per minute per IP, partner and
+        reference of each cybersource provider, cached until a provider
+        changes """
+        return {
+            provider.id: (provider.cyber_rate_limit_ip,
+                          provider.cyber_rate_limit_partner,
+                          provider.cyber_rate_limit_reference)
+            for provider in self.sudo().with_context(active_test=False).search(
+                [('code', '=', 'cybersource')])
+        }
+
+    @api.model
+    def _cybersource_get_bin_ranges(self):
+        """ Return the BIN ranges of the server as JSON, for the payment
+        form to check the cards against the same table """
+        return json.dumps(get_bin_index().export_ranges())
+
+    def _cybersource_get_card_brands(self):
+        """ Return the card brands routed to the provider """
+        self.ensure_one()
+        return [brand.strip().lower()
+                for brand in (self.cyber_card_types or '').split(',')
+                if brand.strip()]
+
+    @api.model
+    def _cybersource_route(self, company_id, currency_id, brand,
+                           preferred_id=None):
+        """ Select the merchant processing a card payment.
+
+        The preferred provider (the one of the transaction) is kept when it
+        accepts the company, currency and brand, otherwise the first
+        matching provider is used. A provider whose circuit breaker is open
+        hands over to its fallback merchant, provided the fallback accepts
+        the company, currency and brand as well.
+
+        :return: the selected provider, empty if none accepts the payment
+        :rtype: recordset of `payment.provider`
+        """
+        table = self._cybersource_get_routing_table()
+        candidates = []
+        for key in ((company_id, currency_id, brand),
+                    (company_id, currency_id, None),
+                    (company_id, None, brand),
+                    (company_id, None, None)):
+            candidates.extend(table.get(key, ()))
+        if not candidates:
+            return self.browse()
+        provider = self.browse(preferred_id if preferred_id in candidates
+                               else candidates[0])
+        fallback = provider.cyber_fallback_provider_id
+        if (fallback.id in candidates
+                and provider._cybersource_get_guard().breaker.is_open()
+                and not fallback._cybersource_get_guard().breaker.is_open()):
+            return fallback
+        return provider
+
+    def _cybersource_invalidate_clients(self):
+        """ Invalidate the cached clients of the cybersource providers """
+        providers = self.filtered(lambda provider: provider.code == 'cybersource')
+        if providers:
+            client_cache.invalidate(providers.ids)
+
+    def _cybersource_get_client_config(self):
+        """ Return the merchant configuration used by the CyberSource SDK """
+        self.ensure_one()
+        return {
+            "authentication_type": "http_signature",
+            "run_environment": "apitest.cybersource.com",
+            "merchantid": self.cyber_merchant,
+            "merchant_keyid": self.cyber_key,
+            "merchant_secretkey": self.cyber_secret_key,
+            # Milliseconds; the transport is bounded by the deadline anyway
+            "timeout": int(self.cyber_request_deadline * 1000),
+        }
+
+    def _cybersource_get_client(self):
+        """ Return the cached gateway client of the provider, building it on
+        the first use in this worker """
+        self.ensure_one()
+        key = (self.id, self.cyber_merchant, self.cyber_key,
+               self.cyber_secret_key, self.cyber_pool_maxsize,
+               self.cyber_pool_idle_timeout, self.cyber_request_deadline,
+               self._cybersource_get_endpoint())
+        return client_cache.get(key, lambda: GatewayClient(
+            self._cybersource_get_client_config(), _build_cybersource_api,
+            options=self._cybersource_get_transport_options()))
+
+    def _cybersource_get_transport_options(self):
+        """ Return the settings of the shared gateway connection pool """
+        self.ensure_one()
+        return {
+            'maxsize': max(self.cyber_pool_maxsize, 1),
+            'idle_timeout': max(self.cyber_pool_idle_timeout, 1),
+            'timeout': self.cyber_request_deadline or None,
+            'endpoint': self._cybersource_get_endpoint(),
+        }
+
+    def _cybersource_get_endpoint(self):
+        """ Return the endpoint override of the provider, ignored unless the
+        provider is in test mode """
+        self.ensure_one()
+        return self.cyber_endpoint if self.state == 'test' else None
+
+    def _cybersource_create_payment(self, reference, request_body):
+        """ Send a payment request, settling an ambiguous failure (timeout,
+        lost connection, 5xx) by searching the gateway for the reference
+        instead of letting the customer pay again.
+
+        :param str reference: merchant reference of the payment
+        :param str request_body: the JSON payment request
+        :return: ``(SENT, (response, status, raw body))``, ``(FOUND,
+            summary)`` when the search found the payment or ``(UNKNOWN,
+            None)``
+        :raise GatewayUnavailableError: if the payment was refused before
+            being sent
+        """
+        self.ensure_one()
+        client = self._cybersource_get_client()
+        guard = self._cybersource_get_guard()
+
+        def submit():
+            # The SDK clients are per thread: resolve it on the executor
+            return guard.call(
+                lambda: client.api('PaymentsApi').create_payment(
+                    request_body, _preload_content=False),
+                self.cyber_request_deadline)
+
+        try:
+            return SENT, submit()
+        except Exception as error:
+            if not is_ambiguous(error) or self.cyber_recovery_budget <= 0:
+                raise
+            _logger.warning("CyberSource payment %s failed ambiguously (%s), "
+                            "searching the gateway", reference, error)
+        engine = RecoveryEngine(
+            lambda: self._cybersource_search_payment(reference), submit,
+            budget=self.cyber_recovery_budget, logger=_logger)
+        outcome, value = engine.recover()
+        _logger.info("CyberSource payment %s recovery: %s after %s lookups",
+                     reference, outcome, engine.lookups)
+        return (SENT if outcome == RESUBMITTED else outcome), value
+
+    def _cybersource_search_payment(self, reference):
+        """ Return the summary of the latest payment of the reference found
+        by the transaction search of the gateway, or None """
+        self.ensure_one()
+        client = self._cybersource_get_client()
+        body = json.dumps({
+            "save": False,
+            "name": "payment recovery",
+            "timezone": "UTC",
+            "query": "clientReferenceInformation.code:%s" % reference,
+            "sort": "submitTimeUtc:desc",
+            "offset": 0,
+            "limit": 1,
+        })
+        __, __, response_body = self._cybersource_get_guard().call(
+            lambda: client.api('SearchTransactionsApi').create_search(
+                body, _preload_content=False),
+            self.cyber_request_deadline)
+        summaries = (json.loads(response_body or '{}').get(
+            '_embedded') or {}).get('transactionSummaries') or []
+        return summaries[0] if summaries else None
+
+    def _cybersource_get_guard(self):
+        """ Return the executor and circuit breaker guarding the gateway
+        calls of the provider in this worker """
+        self.ensure_one()
+        return get_guard(self.id,
+                         max_workers=max(self.cyber_executor_workers, 1),
+                         threshold=max(self.cyber_breaker_threshold, 1),
+                         reset_timeout=self.cyber_breaker_reset_timeout)
+
+    def _cybersource_get_batch_guard(self):
+        """ Return the executor running the batch calls (captures, refunds)
+        of the provider in this worker. It lives as long as the worker, with
+        the SDK clients of its threads, and shares the circuit breaker of
+        the payment calls. """
+        self.ensure_one()
+        return get_guard(self.id,
+                         max_workers=max(self.cyber_batch_workers, 1),
+                         pool='batch',
+                         breaker=self._cybersource_get_guard().breaker)
+
+
+def _build_cybersource_api(api_name, config, options):
+    """ Instantiate the SDK API ``api_name``, loading the SDK on the first
+    call, and route its HTTP calls through the shared gateway connection
+    pool """
+    api = build_api(api_name, config)
+    api.api_client.rest_client.pool_manager = GatewayPoolManager(**options)
+    return api
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from functools import partial
+
+from odoo import api, fields, models
+
+from ..utils.payload import token_cache
+
+
+class PaymentToken(models.Model):
+    """ Inherits payment.token to keep the CyberSource customer token """
+    _inherit = 'payment.token'
+
+    # The saved cards are read by partner on every checkout
+    partner_id = fields.Many2one(index=True)
+    cyber_customer_id = fields.Char(string='CyberSource Customer ID',
+                                    readonly=True,
+                                    help='Identifier of the customer token '
+                                         'owning the payment instrument in '
+                                         'CyberSource')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """ Drop the cached tokens of the partners """
+        tokens = super().create(vals_list)
+        self._cybersource_invalidate_partner_tokens(
+            tokens.sudo().partner_id.ids)
+        return tokens
+
+    def write(self, vals):
+        """ Drop the cached tokens of the former and new partners """
+        partner_ids = self.sudo().partner_id.ids
+        res = super().write(vals)
+        self._cybersource_invalidate_partner_tokens(
+            partner_ids + self.sudo().partner_id.ids)
+        return res
+
+    def unlink(self):
+        """ Drop the cached tokens of the partners """
+        self._cybersource_invalidate_partner_tokens(self.sudo().partner_id.ids)
+        return super().unlink()
+
+    @api.model
+    def _cybersource_invalidate_partner_tokens(self, partner_ids):
+        """ Drop the cached tokens of the partners, now and again if the
+        transaction rolls back, so that a rolled back change is not kept """
+        invalidate = partial(token_cache.invalidate, self.env.cr.dbname,
+                             set(partner_ids))
+        invalidate()
+        self.env.cr.postrollback.add(invalidate)
+
+    @api.model
+    def _cybersource_get_partner_tokens(self, partner_id):
+        """ Return the active CyberSource tokens of the partner readable by
+        the current user as tuples ``(id, provider_id, payment_method_id,
+        payment_details, cyber_customer_id)``.
+
+        The tokens of the partner are cached per worker until one of them
+        changes; the record rules are applied to the cached tokens on every
+        call. """
+        key = (self.env.cr.dbname, partner_id)
+        rows = token_cache.get(key)
+        if rows is None:
+            rows = token_cache.set(key, tuple(
+                (token.id, token.provider_id.id, token.payment_method_id.id,
+                 token.payment_details, token.cyber_customer_id)
+                for token in self.sudo().search(
+                    [('partner_id', '=', partner_id)], order='id desc')))
+        provider_ids = set(
+            self.env['payment.provider']._cybersource_get_provider_ids())
+        rows = [row for row in rows if row[1] in provider_ids]
+        if not self.env.su:
+            self.check_access_rights('read')
+            readable = set(self.browse([row[0] for row in rows])
+                           ._filter_access_rules('read').ids)
+            rows = [row for row in rows if row[0] in readable]
+        return tuple(rows)
+
+    @api.model
+    def _get_available_tokens(self, providers_ids, partner_id,
+                              is_validation=False, **kwargs):
+        """ Read the saved CyberSource cards of the partner with one query """
+        cyber_ids = set(providers_ids) & set(
+            self.env['payment.provider']._cybersource_get_provider_ids())
+        if is_validation or not cyber_ids:
+            return super()._get_available_tokens(
+                providers_ids, partner_id, is_validation=is_validation,
+                **kwargs)
+        other_ids = [provider_id for provider_id in providers_ids
+                     if provider_id not in cyber_ids]
+        tokens = super()._get_available_tokens(
+            other_ids, partner_id, **kwargs) if other_ids else self.browse()
+        rows = [row for row in self._cybersource_get_partner_tokens(
+            partner_id) if row[1] in cyber_ids]
+        cyber_tokens = self.browse([row[0] for row in rows])
+        # Prime the record cache so the checkout form renders the saved cards
+        # without reading them back
+        for index, field_name in ((1, 'provider_id'),
+                                  (2, 'payment_method_id'),
+                                  (3, 'payment_details'),
+                                  (4, 'cyber_customer_id')):
+            self.env.cache.update(cyber_tokens, self._fields[field_name],
+                                  [row[index] for row in rows])
+        return tokens | cyber_tokens
@@ -19,8 +19,20 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 ###############################################################################
+import json
+import logging
+import threading
+
 from odoo import api, fields, models, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+
+from ..utils.batch import BatchReport, run_batch
+from ..utils.connection_pool import PoolExhaustedError
+from ..utils.gateway_executor import GatewayUnavailableError
+from ..utils.recovery import FOUND, UNKNOWN, is_ambiguous, summary_outcome
+from ..utils.response_parser import parse_payment_response
+
+_logger = logging.getLogger(__name__)
 
 
 class PaymentTransaction(models.Model):
@@ -30,6 +42,16 @@ class PaymentTransaction(models.Model):
     capture_manually = fields.Boolean(related='provider_id.capture_manually',
                                       string="Capture Manually",
                                       help='Enable manual capturing')
+    cyber_payment_id = fields.Char(string='CyberSource Payment ID',
+                                   readonly=True, copy=False,
+                                   index='btree_not_null',
+                                   help='Identifier of the payment in '
+                                        'CyberSource')
+    cyber_capture_id = fields.Char(string='CyberSource Capture ID',
+                                   readonly=True, copy=False,
+                                   index='btree_not_null',
+                                   help='Identifier of the capture in '
+                                        'CyberSource')
 
     def action_cybersource_set_done(self):
         """ Set the state of the demo transaction to 'done'."""
@@ -56,12 +78,14 @@ class PaymentTransaction(models.Model):
     def _get_tx_from_notification_data(self, provider_code, data):
         """ Find the transaction based on the notification data."""
         tx = super()._get_tx_from_notification_data(provider_code, data)
-        if provider_code != 'cybersource':
+        if provider_code != 'cybersource' or len(tx) == 1:
             return tx
         reference = data.get('reference')
         tx = self.search(
             [('reference', '=', reference),
-             ('provider_code', '=', 'cybersource')])
+             ('provider_id', 'in', self.env[
+                 'payment.provider']._cybersource_get_provider_ids())],
+            limit=1)
         if not tx:
             raise ValidationError(
                 "Cyber Source " + _(
@@ -69,6 +93,27 @@ class PaymentTransaction(models.Model):
             )
         return tx
 
+    @api.model
+    def _get_txs_from_notification_batch(self, provider_code, references):
+        """ Find the transactions of many references with a single query.
+
+        :param str provider_code: code of the provider of the transactions
+        :param references: merchant references of the transactions
+        :return: the transactions found, by reference
+        :rtype: dict
+        """
+        references = list({reference for reference in references
+                           if reference})
+        if not references:
+            return {}
+        if provider_code == 'cybersource':
+            provider_domain = [('provider_id', 'in', self.env[
+                'payment.provider']._cybersource_get_provider_ids())]
+        else:
+            provider_domain = [('provider_code', '=', provider_code)]
+        txs = self.search([('reference', 'in', references)] + provider_domain)
+        return {tx.reference: tx for tx in txs}
+
     def _process_notification_data(self, notification_data):
         """ Update the transaction state and the provider reference based on the
          notification data.
@@ -83,18 +128,22 @@ class PaymentTransaction(models.Model):
         if self.provider_code != 'cybersource':
             return
         self.provider_reference = f'cybersource-{self.reference}'
+        if notification_data.get('payment_id'):
+            self.cyber_payment_id = notification_data['payment_id']
         state = notification_data['simulated_state']
         if state == 'pending':
             self._set_pending()
         elif state == 'AUTHORIZED':
+            if self.tokenize and notification_data.get('payment_instrument_id'):
+                self._cybersource_tokenize_from_notification_data(
+                    notification_data)
             if self.capture_manually and not notification_data.get(
                     'manual_capture'):
                 self._set_authorized()
             else:
                 self._set_done()
                 if self.operation == 'refund':
-                    self.env.ref(
-                        'payment.cron_post_process_payment_tx')._trigger()
+                    self._cybersource_trigger_post_process()
         elif state == 'DECLINED':
             message = notification_data.get('message', 'No message provided')
             self._set_canceled(
@@ -102,3 +151,358 @@ class PaymentTransaction(models.Model):
         else:
             self._set_error(
                 _("You selected the following payment status: %s", state))
+
+    def _cybersource_tokenize_from_notification_data(self, notification_data):
+        """ Save the payment instrument created along the payment as a token
+        of the partner """
+        token = self.env['payment.token'].create({
+            'provider_id': self.provider_id.id,
+            'payment_method_id': self.payment_method_id.id,
+            'payment_details': notification_data.get('card_last4'),
+            'partner_id': self.partner_id.id,
+            'provider_ref': notification_data['payment_instrument_id'],
+            'cyber_customer_id': notification_data.get('customer_id'),
+        })
+        self.write({'token_id': token.id, 'tokenize': False})
+        _logger.info("Created CyberSource token %s for partner %s from "
+                     "transaction %s", token.id, self.partner_id.id,
+                     self.reference)
+
+    @api.model
+    def _cybersource_notification_from_response(self, reference, status,
+                                                response):
+        """ Turn a CyberSource payment response into notification data.
+
+        :param str reference: reference of the transaction
+        :param int status: HTTP status of the response
+        :param dict response: the response, as returned by
+            ``parse_payment_response``
+        :return: the notification data of the payment
+        :rtype: dict
+        """
+        if status in (200, 201) and response['status'] in (
+                'AUTHORIZED', 'PENDING', 'CAPTURED'):
+            return {
+                'reference': reference,
+                'simulated_state': 'AUTHORIZED',
+                'payment_id': response['id'],
+                'payment_instrument_id': response['payment_instrument_id'],
+                'customer_id': response['customer_id'],
+            }
+        return {
+            'reference': reference,
+            'simulated_state': 'DECLINED',
+            'message': response['message'] or 'Declinado por CyberSource',
+            'reason': response['reason'] or 'UNKNOWN',
+        }
+
+    @api.model
+    def _cybersource_notification_from_summary(self, reference, summary):
+        """ Turn the transaction summary found by a recovery search into
+        notification data """
+        approved, reason_code = summary_outcome(summary)
+        if approved:
+            return {
+                'reference': reference,
+                'simulated_state': 'AUTHORIZED',
+                'payment_id': summary.get('id'),
+            }
+        return {
+            'reference': reference,
+            'simulated_state': 'DECLINED',
+            'message': _("Declined by CyberSource (reason code %s)",
+                         reason_code),
+            'reason': reason_code or 'UNKNOWN',
+        }
+
+    def _send_payment_request(self):
+        """ Charge the saved card of the transaction; the request only
+        carries the payment instrument token """
+        super()._send_payment_request()
+        if self.provider_code != 'cybersource':
+            return
+        if self.state != 'draft':
+            # Never charge a reference twice
+            _logger.warning("CyberSource token payment %s not sent: the "
+                            "transaction is %s", self.reference, self.state)
+            return
+        if not self.token_id:
+            raise UserError("Cyber Source: " + _(
+                "The transaction is not linked to a token."))
+        provider = self.provider_id
+        request_body = json.dumps({
+            "clientReferenceInformation": {"code": self.reference},
+            "processingInformation": {
+                "capture": not provider.capture_manually,
+                "commerceIndicator": "internet",
+            },
+            "paymentInformation": {
+                "paymentInstrument": {"id": self.token_id.provider_ref},
+            },
+            "orderInformation": {"amountDetails": {
+                "totalAmount": str(self.amount),
+                "currency": self.currency_id.name,
+            }},
+        })
+        try:
+            outcome, value = provider._cybersource_create_payment(
+                self.reference, request_body)
+        except (GatewayUnavailableError, PoolExhaustedError) as e:
+            _logger.warning("CyberSource token payment %s not sent: %s",
+                            self.reference, e)
+            self._set_error(_("The payment service is unavailable, please "
+                              "try again later."))
+            return
+        if outcome == UNKNOWN:
+            notification_data = {'reference': self.reference,
+                                 'simulated_state': 'pending'}
+        elif outcome == FOUND:
+            notification_data = self._cybersource_notification_from_summary(
+                self.reference, value)
+        else:
+            __, status, body = value
+            notification_data = self._cybersource_notification_from_response(
+                self.reference, status, parse_payment_response(body))
+        self._handle_notification_data('cybersource', notification_data)
+
+    def _send_capture_request(self, amount_to_capture=None):
+        """ Capture the authorized amount on CyberSource """
+        child_capture_tx = super()._send_capture_request(
+            amount_to_capture=amount_to_capture)
+        if self.provider_code != 'cybersource':
+            return child_capture_tx
+        report = self._cybersource_capture_batch()
+        if report.failures:
+            raise ValidationError("Cyber Source " + _(
+                "The capture of %s failed: %s", *report.failures[0]))
+        return child_capture_tx
+
+    def _cybersource_capture_batch(self):
+        """ Capture the authorized CyberSource transactions of the recordset
+        concurrently, then set the captured ones done at once.
+
+        The gateway calls run on the batch executor of each provider, behind
+        its circuit breaker and honoring its batch rate limit; the ORM is
+        only used from the current thread, before and after the calls.
+
+        :return: the report of the batch
+        :rtype: BatchReport
+        """
+        report = BatchReport('capture')
+        txs = self.filtered(lambda tx: tx.provider_code == 'cybersource'
+                            and tx.state == 'authorized')
+        for provider in txs.provider_id:
+            jobs = []
+            for tx in txs.filtered(lambda t: t.provider_id == provider):
+                if not tx.cyber_payment_id:
+                    report.add_failure(tx.reference,
+                                       _("Missing CyberSource payment id"))
+                    continue
+                jobs.append((tx.id, tx.reference, tx.cyber_payment_id,
+                             json.dumps({
+                                 "clientReferenceInformation": {
+                                     "code": tx.reference},
+                                 "orderInformation": {"amountDetails": {
+                                     "totalAmount": str(tx.amount),
+                                     "currency": tx.currency_id.name,
+                                 }},
+                             })))
+            client = provider._cybersource_get_client()
+
+            def capture(job):
+                return client.api('CaptureApi').capture_payment(
+                    job[3], job[2], _preload_content=False)
+
+            captured_ids = []
+            for job, response, error, elapsed in run_batch(
+                    jobs, capture, provider._cybersource_get_batch_guard(),
+                    provider.cyber_request_deadline,
+                    provider.cyber_batch_rate_limit):
+                report.add_latency(elapsed)
+                if error is None and response[1] in (200, 201):
+                    captured_ids.append(job[0])
+                    self.browse(job[0]).cyber_capture_id = (
+                        _response_id(response[2]))
+                    report.add_success()
+                else:
+                    report.add_failure(job[1], error or "HTTP %s" % response[1])
+            self.browse(captured_ids)._set_done()
+        if report.succeeded:
+            self._cybersource_trigger_post_process()
+        return report.stop()
+
+    @api.model
+    def _cybersource_trigger_post_process(self):
+        """ Trigger the post-processing cron once per database transaction,
+        however many transactions were settled in it """
+        data = self.env.cr.postcommit.data
+        if not data.get('cybersource_post_process_triggered'):
+            data['cybersource_post_process_triggered'] = True
+            self.env.ref('payment.cron_post_process_payment_tx')._trigger()
+
+    def action_refund(self, amount_to_refund=None):
+        """ Send the CyberSource refunds of the transactions as one batch """
+        children = self.child_transaction_ids
+        super(PaymentTransaction, self.with_context(
+            cybersource_batch_refund=True)).action_refund(
+            amount_to_refund=amount_to_refund)
+        self.invalidate_recordset(['child_transaction_ids'])
+        (self.child_transaction_ids - children)._cybersource_refund_batch()
+
+    def _send_refund_request(self, amount_to_refund=None):
+        """ Refund the transaction on CyberSource, unless the refund is part
+        of a batch sent by :meth:`action_refund` """
+        refund_tx = super()._send_refund_request(
+            amount_to_refund=amount_to_refund)
+        if (self.provider_code != 'cybersource'
+                or self.env.context.get('cybersource_batch_refund')):
+            return refund_tx
+        refund_tx._cybersource_refund_batch()
+        return refund_tx
+
+    def _cybersource_refund_batch(self):
+        """ Send the CyberSource refund transactions of the recordset
+        concurrently, then settle them at once.
+
+        The post-processing cron is triggered once for the whole batch
+        rather than once per refund; :meth:`action_refund` sends the refunds
+        of many transactions as a single batch. A refund failing ambiguously (timeout,
+        lost connection, 5xx) may have been executed: it is left pending,
+        and never sent again, until its outcome is checked on CyberSource.
+
+        :return: the report of the batch
+        :rtype: BatchReport
+        """
+        report = BatchReport('refund')
+        txs = self.filtered(lambda tx: tx.provider_code == 'cybersource'
+                            and tx.operation == 'refund'
+                            and tx.state == 'draft')
+        for provider in txs.provider_id:
+            jobs = []
+            for tx in txs.filtered(lambda t: t.provider_id == provider):
+                source_tx = tx.source_transaction_id
+                if source_tx.cyber_capture_id:
+                    method, target = 'refund_capture', source_tx.cyber_capture_id
+                elif source_tx.cyber_payment_id:
+                    method, target = 'refund_payment', source_tx.cyber_payment_id
+                else:
+                    report.add_failure(tx.reference,
+                                       _("Missing CyberSource payment id"))
+                    tx._set_error(_("Missing CyberSource payment id"))
+                    continue
+                jobs.append((tx.id, tx.reference, method, target, json.dumps({
+                    "clientReferenceInformation": {"code": tx.reference},
+                    "orderInformation": {"amountDetails": {
+                        "totalAmount": str(abs(tx.amount)),
+                        "currency": tx.currency_id.name,
+                    }},
+                })))
+            client = provider._cybersource_get_client()
+
+            def refund(job):
+                api = client.api('RefundApi')
+                return getattr(api, job[2])(job[4], job[3],
+                                            _preload_content=False)
+
+            refunded_ids = []
+            for job, response, error, elapsed in run_batch(
+                    jobs, refund, provider._cybersource_get_batch_guard(),
+                    provider.cyber_request_deadline,
+                    provider.cyber_batch_rate_limit):
+                report.add_latency(elapsed)
+                if error is None and response[1] in (200, 201):
+                    refunded_ids.append(job[0])
+                    # The refund events of the webhook carry this id
+                    self.browse(job[0]).cyber_payment_id = (
+                        _response_id(response[2]))
+                    report.add_success()
+                elif is_ambiguous(error) or (error is None
+                                             and response[1] >= 500):
+                    error = error or "HTTP %s" % response[1]
+                    report.add_pending(job[1], error)
+                    self.browse(job[0])._set_pending(state_message=_(
+                        "The outcome of the refund is unknown (%s): check it "
+                        "on CyberSource.", error))
+                elif isinstance(error, GatewayUnavailableError):
+                    # Refused before being sent: it stays draft to be sent
+                    # again
+                    report.add_failure(job[1], error)
+                else:
+                    error = error or "HTTP %s" % response[1]
+                    report.add_failure(job[1], error)
+                    self.browse(job[0])._set_error(
+                        _("The refund failed: %s", error))
+            self.browse(refunded_ids)._set_done()
+        if report.succeeded:
+            self._cybersource_trigger_post_process()
+        report.stop()
+        _logger.info("CyberSource %s: %s", report, report.as_dict())
+        return report
+
+    def _cybersource_action_refund(self):
+        """ Send the selected refund transactions and report the outcome """
+        report = BatchReport('refund')
+        batch_size = max(self.provider_id[:1].cyber_batch_size, 1)
+        for index in range(0, len(self), batch_size):
+            report.merge(self[index:index + batch_size]
+                         ._cybersource_refund_batch())
+        report.stop()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("CyberSource Refund"),
+                'message': str(report),
+                'type': ('warning' if report.failures or report.pending
+                         else 'success'),
+                'sticky': bool(report.failures or report.pending),
+            },
+        }
+
+    def _cybersource_capture_in_batches(self, commit=False):
+        """ Capture the recordset in batches of the provider batch size,
+        committing after each batch if ``commit`` is set """
+        report = BatchReport('capture')
+        batch_size = max(self.provider_id[:1].cyber_batch_size, 1)
+        for index in range(0, len(self), batch_size):
+            report.merge(self[index:index + batch_size]
+                         ._cybersource_capture_batch())
+            if commit and not getattr(threading.current_thread(),
+                                      'testing', False):
+                self.env.cr.commit()
+        return report.stop()
+
+    def _cybersource_action_capture(self):
+        """ Capture the selected transactions and report the outcome """
+        report = self._cybersource_capture_in_batches()
+        _logger.info("CyberSource %s", report)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("CyberSource Capture"),
+                'message': str(report),
+                'type': 'warning' if report.failures else 'success',
+                'sticky': bool(report.failures),
+            },
+        }
+
+    @api.model
+    def _cron_cybersource_capture_authorized(self):
+        """ Capture every authorized CyberSource transaction """
+        providers = self.env['payment.provider'].search(
+            [('code', '=', 'cybersource'), ('capture_manually', '=', True)])
+        for provider in providers:
+            txs = self.search([('provider_id', '=', provider.id),
+                               ('state', '=', 'authorized')], order='id')
+            report = txs._cybersource_capture_in_batches(commit=True)
+            _logger.info("CyberSource %s for provider %s: %s", report,
+                         provider.id, report.as_dict())
+
+
+def _response_id(body):
+    """ Return the ``id`` of a raw CyberSource response body """
+    try:
+        return json.loads(body or '{}').get('id')
+    except (TypeError, ValueError):
+        return None
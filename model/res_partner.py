@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo import api, models
+
+from ..utils.payload import (BILL_TO_FIELDS, BILL_TO_QUERY, bill_to_cache,
+                             build_bill_to)
+
+
+class ResPartner(models.Model):
+    """ Inherits res.partner to cache the CyberSource billing address """
+    _inherit = 'res.partner'
+
+    def write(self, vals):
+        """ Drop the cached billTo blocks of the updated partners """
+        res = super().write(vals)
+        if not vals.keys().isdisjoint(BILL_TO_FIELDS):
+            bill_to_cache.invalidate(self.env.cr.dbname, self.ids)
+        return res
+
+    def unlink(self):
+        """ Drop the cached billTo blocks of the deleted partners """
+        bill_to_cache.invalidate(self.env.cr.dbname, self.ids)
+        return super().unlink()
+
+    @api.model
+    def _cybersource_get_bill_to(self, partner_id):
+        """ Return the CyberSource billTo block of the partner, read with a
+        single query and cached per worker, or None if it does not exist """
+        key = (self.env.cr.dbname, partner_id)
+        bill_to = bill_to_cache.get(key)
+        if bill_to is None:
+            self.flush_model(BILL_TO_FIELDS)
+            self.env.cr.execute(BILL_TO_QUERY, [partner_id])
+            row = self.env.cr.fetchone()
+            if not row:
+                return None
+            bill_to = bill_to_cache.set(key, build_bill_to(*row))
+        return bill_to
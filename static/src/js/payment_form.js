@@ -1,68 +1,186 @@
 /** @odoo-module */
 import { _t } from "@web/core/l10n/translation";
 import paymentForm from '@payment/js/payment_form';
-import { Dialog } from "@web/core/dialog/dialog";
 import { jsonrpc } from "@web/core/network/rpc_service";
 
+/**
+ * Return the BIN ranges of the server (data/cybersource_bin_ranges.csv),
+ * rendered in the inline form by the provider: [prefix from, prefix to,
+ * brand, PAN lengths, CVV length, Luhn check digit]. The server stays
+ * authoritative.
+ */
+function getBinRanges() {
+    return $('#card_details').data('bin-ranges') || [];
+}
+
+/**
+ * Return whether the digits of `number` pass the Luhn check.
+ */
+function luhnValid(number) {
+    let sum = 0;
+    let double = false;
+    for (let i = number.length - 1; i >= 0; i--) {
+        let digit = number.charCodeAt(i) - 48;
+        if (double) {
+            digit *= 2;
+            if (digit > 9) {
+                digit -= 9;
+            }
+        }
+        sum += digit;
+        double = !double;
+    }
+    return sum % 10 === 0;
+}
+
+/**
+ * Return the BIN range of the longest prefix of `number`, if any.
+ */
+function lookupBin(binRanges, number) {
+    let match = null;
+    for (const range of binRanges) {
+        const prefix = number.slice(0, range[0].length);
+        if (prefix.length === range[0].length && prefix >= range[0] && prefix <= range[1]
+                && (!match || range[0].length > match[0].length)) {
+            match = range;
+        }
+    }
+    return match;
+}
+
+/**
+ * Check the card before any request; return the error message, if any.
+ */
+function validateCard(card) {
+    if (!/^\d{12,19}$/.test(card.number)) {
+        return _t("The card number is not valid.");
+    }
+    // Without the table of the server, the brand is only checked there
+    const binRanges = getBinRanges();
+    const range = lookupBin(binRanges, card.number);
+    if (binRanges.length && !range) {
+        return _t("This card brand is not supported.");
+    }
+    if (range && (!range[3].includes(card.number.length) || (range[5] && !luhnValid(card.number)))) {
+        return _t("The card number is not valid.");
+    }
+    const month = parseInt(card.month, 10);
+    if (!/^\d{1,2}$/.test(card.month) || month < 1 || month > 12) {
+        return _t("The expiry month is not valid.");
+    }
+    if (!/^\d{4}$/.test(card.year)) {
+        return _t("The expiry year is not valid.");
+    }
+    // Cards expire at the end of their expiry month
+    const now = new Date();
+    const year = parseInt(card.year, 10);
+    if (year < now.getFullYear() || (year === now.getFullYear() && month < now.getMonth() + 1)) {
+        return _t("The card is expired.");
+    }
+    const cvvPattern = range ? `^\\d{${range[4]}}$` : '^\\d{3,4}$';
+    if (!new RegExp(cvvPattern).test(card.cvv)) {
+        return _t("The security code is not valid.");
+    }
+    return null;
+}
+
 // Payment process with cybersource
 paymentForm.include({
-    _processRedirectFlow(providerCode, paymentOptionId, paymentMethodCode, processingValues) {
+    /**
+     * Validate the card locally and block double submits before creating the
+     * transaction.
+     *
+     * @override
+     */
+    async _initiatePaymentFlow(providerCode, paymentOptionId, paymentMethodCode, flow) {
+        if (providerCode !== 'cybersource' || flow === 'token') {
+            return this._super(...arguments);
+        }
+        if (this.cybersourcePending) {
+            return;
+        }
+        const error = validateCard(this._cybersourceGetCard());
+        if (error) {
+            this._displayErrorDialog(_t("Payment processing failed"), error);
+            this._enableButton();
+            return;
+        }
+        this.cybersourcePending = true;
+        return this._super(...arguments);
+    },
+
+    /**
+     * Release the double submit lock whenever the form becomes usable again.
+     *
+     * @override
+     */
+    _enableButton() {
+        this.cybersourcePending = false;
+        return this._super(...arguments);
+    },
+
+    /**
+     * Send the card payment and show a decline inline; only an accepted (or
+     * still pending) payment leaves the page.
+     *
+     * @override
+     */
+    async _processRedirectFlow(providerCode, paymentOptionId, paymentMethodCode, processingValues) {
         if (providerCode !== 'cybersource') {
             return this._super(...arguments);
         }
-        var customerInputNumber = $('#customer_input_number').val();
-        const customerInputName = $('#customer_input_name').val();
-        const expMonth = $('#customer_input_month').val();
-        const expYear = $('#customer_input_year').val();
-        const cvv = $('#customer_input_cvv').val();
-        var self = this;
-        let currentDate = new Date();
-        let previousMonth = new Date();
-        previousMonth.setMonth(currentDate.getMonth() - 1);
-        // Display error if card number is null
-        if(customerInputNumber == "") {
+        const card = this._cybersourceGetCard();
+        let result;
+        try {
+            result = await jsonrpc('/payment/cybersource/simulate_payment', {
+                'reference': processingValues.reference,
+                'provider_id': processingValues.provider_id,
+                'customer_input': {
+                    'exp_year': card.year,
+                    'exp_month': card.month,
+                    'name': card.name,
+                    'card_num': card.number,
+                    'cvv': card.cvv,
+                },
+                'values': {
+                    'amount': processingValues.amount,
+                    'currency': processingValues.currency_id,
+                    'partner': processingValues.partner_id,
+                    'order': processingValues.reference,
+                },
+            });
+        } catch (error) {
             this._displayErrorDialog(
-                _t("Server Error"),
-                _t("We are not able to process your payment Card Number not entered")
+                _t("Payment processing failed"),
+                error.data ? error.data.message : error.message,
             );
+            this._enableButton();
+            return;
         }
-        // Display error if card is expired
-        else if (expYear <= previousMonth.getFullYear() && currentDate.getMonth() <= previousMonth.getMonth()) {
-            var self = this;
-            self._displayErrorDialog(
-                _t("Server Error"),
-                _t("We are not able to process your payment. Expiry year is not valid")
-            );
+        if (result.success || result.pending) {
+            window.location = '/payment/status';
+            return;
         }
-        // Display error if card expiry month is not a valid one
-        else if(expMonth == 0) {
-            var self = this;
-            self._displayErrorDialog(
-                _t("Server Error"),
-                _t("We are not able to process your payment. Expiry month not valid.")
-            );
-        }
-        // If details are correct process the payment
-        else {
-            return jsonrpc(
-                '/payment/cybersource/simulate_payment',
-                {
-                    'reference': processingValues.reference,
-                    'customer_input': {
-                        'exp_year': expYear,
-                        'exp_month': expMonth,
-                        'name':customerInputName,
-                        'card_num':customerInputNumber,
-                        'cvv':cvv,
-                    },
-                    'values':{
-                        'amount': processingValues.amount,
-                        'currency': processingValues.currency_id,
-                        'partner': processingValues.partner_id,
-                        'order': processingValues.reference
-                    },
-                },
-           ).then(() => window.location = '/payment/status');
+        if (result.retry) {
+            // Busy or not sent: nothing was charged, the customer can retry
+            this._displayErrorDialog(_t("Please try again"), result.message);
+        } else {
+            this._displayErrorDialog(_t("Payment declined"), result.message);
         }
+        this._enableButton();
+    },
+
+    /**
+     * Return the normalized card input of the inline form.
+     */
+    _cybersourceGetCard() {
+        const year = ($('#customer_input_year').val() || '').trim();
+        return {
+            number: ($('#customer_input_number').val() || '').replace(/[\s-]/g, ''),
+            name: ($('#customer_input_name').val() || '').trim(),
+            month: ($('#customer_input_month').val() || '').trim(),
+            year: year.length === 2 ? `20${year}` : year,
+            cvv: ($('#customer_input_cvv').val() || '').trim(),
+        };
     },
-})
\ No newline at end of file
+});
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from . import test_batch
+from . import test_batch_operations
+from . import test_bill_to
+from . import test_bin_index
+from . import test_circuit_breaker
+from . import test_connection_pool
+from . import test_metrics
+from . import test_payload
+from . import test_payment_claim
+from . import test_payment_stat
+from . import test_payment_token
+from . import test_rate_limit
+from . import test_reconciliation
+from . import test_recovery
+from . import test_report_parser
+from . import test_response_parser
+from . import test_routing
+from . import test_token_payment
+from . import test_webhook
+from . import test_webhook_event
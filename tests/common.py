@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo.addons.payment.tests.common import PaymentCommon
+
+
+class CybersourceCommon(PaymentCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.cybersource = cls._prepare_provider('cybersource', update_values={
+            'cyber_merchant': 'merchant',
+            'cyber_key': 'key',
+            'cyber_secret_key': 'c2VjcmV0',
+        })
+        cls.provider = cls.cybersource
+        cls.payment_method = cls.env.ref(
+            'advanced_payment_cybersource.payment_method_cybersource')
+        cls.payment_method_id = cls.payment_method.id
+        cls.currency = cls.currency_usd
+
+    def _enter_registry_test_mode(self):
+        """ Run the code opening its own cursors (claims, rate limits) in the
+        test transaction """
+        self.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.registry.leave_test_mode)
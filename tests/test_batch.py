@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import threading
+import time
+
+from odoo.tests.common import BaseCase
+
+from ..utils.batch import RateLimiter, run_batch
+from ..utils.gateway_executor import CircuitOpenError, GatewayGuard
+
+
+class TestRunBatch(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.guard = GatewayGuard(max_workers=2, threshold=1,
+                                  reset_timeout=3600)
+        self.addCleanup(self.guard.shutdown)
+
+    def test_results_in_order(self):
+        results = run_batch(range(5), lambda item: item * 2, self.guard, 5)
+        self.assertEqual([(item, result, error)
+                          for item, result, error, __ in results],
+                         [(item, item * 2, None) for item in range(5)])
+
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def call(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        run_batch(range(8), call, self.guard, 5)
+        self.assertEqual(running[1], 2)
+
+    def test_threads_reused(self):
+        threads = set()
+
+        def call(item):
+            threads.add(threading.get_ident())
+
+        run_batch(range(4), call, self.guard, 5)
+        run_batch(range(4), call, self.guard, 5)
+        self.assertLessEqual(len(threads), 2)
+
+    def test_open_breaker_stops_batch(self):
+        def call(item):
+            if item == 0:
+                raise ConnectionResetError()
+            return item
+
+        results = run_batch(range(4), call, self.guard, 5)
+        self.assertIsInstance(results[0][2], ConnectionResetError)
+        # The breaker opened on the first failure: the calls submitted after
+        # it are refused without reaching the gateway
+        self.assertIsInstance(results[-1][2], CircuitOpenError)
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(100, burst=1)
+        started = time.monotonic()
+        for __ in range(5):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.035)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from ..utils.gateway_executor import GatewayTimeoutError
+from .common import CybersourceCommon
+
+
+class FakeApi:
+    """ SDK API answering every call with the status of its target id """
+
+    def __init__(self, calls, statuses):
+        self.calls = calls
+        self.statuses = statuses
+
+    def _answer(self, method, body, target):
+        self.calls.append((method, target, json.loads(body)))
+        status = self.statuses.get(target, 201)
+        if isinstance(status, Exception):
+            raise status
+        return None, status, json.dumps({'id': method + '-' + target})
+
+    def capture_payment(self, body, target, _preload_content=True):
+        return self._answer('capture', body, target)
+
+    def refund_payment(self, body, target, _preload_content=True):
+        return self._answer('refund_payment', body, target)
+
+    def refund_capture(self, body, target, _preload_content=True):
+        return self._answer('refund_capture', body, target)
+
+
+class FakeClient:
+
+    def __init__(self, statuses=None):
+        self.calls = []
+        self.statuses = statuses or {}
+
+    def api(self, name):
+        return FakeApi(self.calls, self.statuses)
+
+
+@tagged('post_install', '-at_install')
+class TestBatchOperations(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.provider.write({'capture_manually': True,
+                             'cyber_batch_rate_limit': 0})
+        # The breaker is shared by the worker: start every test closed
+        self.provider._cybersource_get_guard().breaker.record_success()
+
+    def _authorized(self, count):
+        return self.env['payment.transaction'].union(*(
+            self._create_transaction('redirect', reference='CAP%s' % index,
+                                     state='authorized',
+                                     cyber_payment_id='pay%s' % index)
+            for index in range(count)))
+
+    def _patch_client(self, client):
+        return patch.object(type(self.provider), '_cybersource_get_client',
+                            return_value=client)
+
+    def test_capture_batch(self):
+        txs = self._authorized(3)
+        client = FakeClient({'pay1': 400})
+        with self._patch_client(client):
+            report = txs._cybersource_capture_batch()
+        self.assertEqual((report.succeeded, len(report.failures)), (2, 1))
+        self.assertEqual(txs.mapped('state'), ['done', 'authorized', 'done'])
+        self.assertEqual(txs[0].cyber_capture_id, 'capture-pay0')
+        self.assertEqual(
+            sorted(target for __, target, __ in client.calls),
+            ['pay0', 'pay1', 'pay2'])
+
+    def test_capture_batch_open_breaker(self):
+        txs = self._authorized(2)
+        for __ in range(self.provider.cyber_breaker_threshold):
+            self.provider._cybersource_get_guard().breaker.record_failure()
+        client = FakeClient()
+        with self._patch_client(client):
+            report = txs._cybersource_capture_batch()
+        self.assertFalse(client.calls)
+        self.assertEqual(len(report.failures), 2)
+        self.assertEqual(txs.mapped('state'), ['authorized', 'authorized'])
+        self.provider._cybersource_get_guard().breaker.record_success()
+
+    def test_batch_guard_shares_breaker(self):
+        self.assertIs(self.provider._cybersource_get_batch_guard().breaker,
+                      self.provider._cybersource_get_guard().breaker)
+        self.assertIsNot(self.provider._cybersource_get_batch_guard(),
+                         self.provider._cybersource_get_guard())
+
+    def _done(self, count, **values):
+        return self.env['payment.transaction'].union(*(
+            self._create_transaction('redirect', reference='REF%s' % index,
+                                     state='done',
+                                     cyber_payment_id='pay%s' % index,
+                                     **values)
+            for index in range(count)))
+
+    def _post_process_triggers(self):
+        return self.env['ir.cron.trigger'].search_count([
+            ('cron_id', '=',
+             self.env.ref('payment.cron_post_process_payment_tx').id)])
+
+    def test_action_refund_single_batch(self):
+        txs = self._done(3)
+        txs[0].cyber_capture_id = 'cap0'
+        triggers = self._post_process_triggers()
+        client = FakeClient()
+        with self._patch_client(client), patch.object(
+                type(txs), '_cybersource_refund_batch', autospec=True,
+                side_effect=type(txs)._cybersource_refund_batch) as batch:
+            txs.action_refund(amount_to_refund=10)
+        batch.assert_called_once()
+        refunds = txs.child_transaction_ids
+        self.assertEqual(len(refunds), 3)
+        self.assertEqual(set(refunds.mapped('state')), {'done'})
+        self.assertEqual(
+            sorted((method, target) for method, target, __ in client.calls),
+            [('refund_capture', 'cap0'), ('refund_payment', 'pay1'),
+             ('refund_payment', 'pay2')])
+        self.assertEqual(self._post_process_triggers(), triggers + 1)
+
+    def test_refund_ambiguous_failure_pending(self):
+        txs = self._done(3)
+        client = FakeClient({'pay1': GatewayTimeoutError('timeout'),
+                             'pay2': 502})
+        with self._patch_client(client):
+            txs.action_refund(amount_to_refund=10)
+        refunds = {refund.source_transaction_id: refund
+                   for refund in txs.child_transaction_ids}
+        self.assertEqual(refunds[txs[0]].state, 'done')
+        self.assertEqual(refunds[txs[1]].state, 'pending')
+        self.assertEqual(refunds[txs[2]].state, 'pending')
+        # A pending refund may have been executed: it is never sent again
+        client.calls.clear()
+        with self._patch_client(client):
+            txs.child_transaction_ids._cybersource_refund_batch()
+        self.assertFalse(client.calls)
+
+    def test_refund_declined(self):
+        txs = self._done(1)
+        with self._patch_client(FakeClient({'pay0': 400})):
+            txs.action_refund(amount_to_refund=10)
+        self.assertEqual(txs.child_transaction_ids.state, 'error')
+
+    def test_notifications_trigger_post_process_once(self):
+        self.provider.capture_manually = False
+        txs = self._done(2)
+        refunds = self.env['payment.transaction'].union(*(
+            tx._create_child_transaction(10, is_refund=True) for tx in txs))
+        triggers = self._post_process_triggers()
+        for refund in refunds:
+            refund._handle_notification_data('cybersource', {
+                'reference': refund.reference,
+                'simulated_state': 'AUTHORIZED',
+            })
+        self.assertEqual(set(refunds.mapped('state')), {'done'})
+        self.assertEqual(self._post_process_triggers(), triggers + 1)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo.tests import tagged
+
+from ..utils.payload import bill_to_cache
+from .common import CybersourceCommon
+
+
+@tagged('post_install', '-at_install')
+class TestBillTo(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.partners = self.env['res.partner']
+        self.customer = self.partners.create({
+            'name': 'Ana Pérez',
+            'street': '5a Avenida 10-20',
+            'city': 'Guatemala',
+            'zip': '01010',
+            'country_id': self.env.ref('base.gt').id,
+            'email': 'ana@example.com',
+        })
+
+    def test_bill_to(self):
+        bill_to = self.partners._cybersource_get_bill_to(self.customer.id)
+        self.assertEqual(bill_to['firstName'], 'Ana Pérez')
+        self.assertEqual(bill_to['address1'], '5a Avenida 10-20')
+        self.assertEqual(bill_to['country'], 'GT')
+        self.assertEqual(bill_to['email'], 'ana@example.com')
+        # Missing values are filled in
+        self.assertEqual(bill_to['phoneNumber'], '00000000')
+        self.assertEqual(bill_to['administrativeArea'], 'N/A')
+        self.assertIsNone(self.partners._cybersource_get_bill_to(0))
+
+    def test_cached_until_changed(self):
+        bill_to = self.partners._cybersource_get_bill_to(self.customer.id)
+        with self.assertQueryCount(0):
+            self.assertIs(
+                self.partners._cybersource_get_bill_to(self.customer.id),
+                bill_to)
+        # Fields outside the billTo block keep the cached block
+        self.customer.comment = 'VIP'
+        self.assertIs(
+            self.partners._cybersource_get_bill_to(self.customer.id), bill_to)
+        self.customer.city = 'Antigua'
+        self.assertEqual(self.partners._cybersource_get_bill_to(
+            self.customer.id)['locality'], 'Antigua')
+
+    def test_unlink(self):
+        self.partners._cybersource_get_bill_to(self.customer.id)
+        key = (self.env.cr.dbname, self.customer.id)
+        self.assertIsNotNone(bill_to_cache.get(key))
+        self.customer.unlink()
+        self.assertIsNone(bill_to_cache.get(key))
+        self.assertIsNone(
+            self.partners._cybersource_get_bill_to(self.customer.id))
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo.tests.common import BaseCase
+
+from ..utils import bin_index
+from ..utils.bin_index import BinIndex, luhn_valid, validate_card
+
+
+class TestBinIndex(BaseCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = BinIndex.load()
+
+    def test_load_version(self):
+        self.assertTrue(self.index.version)
+        self.assertEqual(self.index.depth, 4)
+
+    def test_lookup_brand(self):
+        self.assertEqual(self.index.lookup('4111111111111111').brand, 'visa')
+        self.assertEqual(self.index.lookup('5555555555554444').card_type,
+                         '002')
+        self.assertEqual(self.index.lookup('2223003122003222').brand,
+                         'mastercard')
+        self.assertEqual(self.index.lookup('378282246310005').brand, 'amex')
+        self.assertIsNone(self.index.lookup('9999999999999999'))
+        self.assertIsNone(self.index.lookup(''))
+
+    def test_longest_prefix_wins(self):
+        index = BinIndex([
+            {'prefix_from': '5', 'prefix_to': '5', 'card_type': '002',
+             'brand': 'mastercard', 'pan_lengths': '16', 'cvv_length': '3'},
+            {'prefix_from': '5018', 'prefix_to': '5018', 'card_type': '042',
+             'brand': 'maestro', 'pan_lengths': '12-19',
+             'cvv_length': '3'},
+        ])
+        self.assertEqual(index.lookup('5018000000000009').brand, 'maestro')
+        self.assertEqual(index.lookup('5019000000000000').brand,
+                         'mastercard')
+        self.assertEqual(index.lookup('5018')[2],
+                         frozenset(range(12, 20)))
+
+    def test_range_mixing_lengths(self):
+        with self.assertRaises(ValueError):
+            BinIndex([{'prefix_from': '4', 'prefix_to': '49',
+                       'card_type': '001', 'brand': 'visa',
+                       'pan_lengths': '16', 'cvv_length': '3'}])
+
+    def test_export_ranges(self):
+        ranges = self.index.export_ranges()
+        self.assertIn(['34', '34', 'amex', [15], 4, True], ranges)
+        self.assertIn(['62', '62', 'unionpay', [16, 17, 18, 19], 3, False],
+                      ranges)
+        self.assertEqual(
+            ranges[0], ['4', '4', 'visa', [13, 16, 19], 3, True])
+
+    def test_luhn(self):
+        self.assertTrue(luhn_valid('4111111111111111'))
+        self.assertTrue(luhn_valid('79927398713'))
+        self.assertFalse(luhn_valid('4111111111111112'))
+
+    def test_validate_card(self):
+        entry, error = validate_card(self.index, '4111111111111111', '123')
+        self.assertEqual((entry.card_type, error), ('001', None))
+        self.assertEqual(validate_card(self.index, '4111 1111')[1],
+                         bin_index.INVALID_NUMBER)
+        self.assertEqual(validate_card(self.index, '9111111111111111')[1],
+                         bin_index.UNKNOWN_BRAND)
+        self.assertEqual(validate_card(self.index, '41111111111111')[1],
+                         bin_index.INVALID_LENGTH)
+        self.assertEqual(validate_card(self.index, '4111111111111112')[1],
+                         bin_index.INVALID_CHECKSUM)
+        self.assertEqual(
+            validate_card(self.index, '378282246310005', '123')[1],
+            bin_index.INVALID_CVV)
+        self.assertIsNone(
+            validate_card(self.index, '378282246310005', '1234')[1])
+
+    def test_validate_card_non_ascii_digits(self):
+        # Arabic-Indic digits pass str.isdigit() but are not card numbers
+        self.assertEqual(
+            validate_card(self.index, '4111\u0661111111111111')[1],
+            bin_index.INVALID_NUMBER)
+        self.assertEqual(
+            validate_card(self.index, '4111111111111111', '12\u0663')[1],
+            bin_index.INVALID_CVV)
+
+    def test_validate_card_without_luhn(self):
+        # China UnionPay issues cards without check digit
+        entry, error = validate_card(self.index, '6200000000000001', '123')
+        self.assertEqual((entry.brand, error), ('unionpay', None))
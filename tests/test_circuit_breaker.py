@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import threading
+from unittest.mock import patch
+
+from odoo.tests.common import BaseCase
+
+from ..utils.gateway_executor import (CircuitBreaker, CircuitOpenError,
+                                      ExecutorSaturatedError, GatewayGuard,
+                                      GatewayTimeoutError)
+
+
+class TestCircuitBreaker(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        patcher = patch('time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _open(self, breaker):
+        for __ in range(breaker.threshold):
+            breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(threshold=3, reset_timeout=30)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertTrue(breaker.is_open())
+        self.assertEqual(breaker.trips, 1)
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_single_probe(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+        self._open(breaker)
+        self.now += 30
+        self.assertFalse(breaker.is_open())
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertTrue(breaker.is_open())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(threshold=5, reset_timeout=30)
+        self._open(breaker)
+        self.now += 30
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.trips, 2)
+
+    def test_release_probe(self):
+        breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+        self._open(breaker)
+        self.now += 30
+        self.assertTrue(breaker.allow())
+        breaker.release_probe()
+        self.assertFalse(breaker.is_open())
+        self.assertTrue(breaker.allow())
+
+
+class TestGatewayGuard(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.guard = GatewayGuard(max_workers=1, threshold=1,
+                                  reset_timeout=0.0)
+        self.addCleanup(self.guard.shutdown)
+
+    def test_call(self):
+        self.assertEqual(self.guard.call(lambda: 42, 5), 42)
+
+    def test_timeout_opens_breaker(self):
+        event = threading.Event()
+        self.addCleanup(event.set)
+        with self.assertRaises(GatewayTimeoutError):
+            self.guard.call(event.wait, 0.01)
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.OPEN)
+
+    def test_saturated_probe_is_not_leaked(self):
+        self.guard.breaker.reset_timeout = 3600
+        self.guard.breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            self.guard.call(lambda: 42, 5)
+        # Half-open while every slot is taken: the refused call must not
+        # keep the probe
+        self.guard.breaker.reset_timeout = 0.0
+        self.guard._slots.acquire()
+        self.guard._slots.acquire()
+        try:
+            with self.assertRaises(ExecutorSaturatedError):
+                self.guard.call(lambda: 42, 5)
+        finally:
+            self.guard._slots.release()
+            self.guard._slots.release()
+        self.assertFalse(self.guard.breaker.is_open())
+        self.assertEqual(self.guard.call(lambda: 42, 5), 42)
+        self.assertEqual(self.guard.breaker.state, CircuitBreaker.CLOSED)
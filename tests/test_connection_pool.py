@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from unittest.mock import patch
+
+from odoo.tests.common import BaseCase
+
+from ..utils import connection_pool
+from ..utils.connection_pool import GatewayPoolManager
+
+
+class TestGatewayPoolManager(BaseCase):
+
+    def _request(self, manager, *args, **kwargs):
+        with patch.object(connection_pool, 'get_pool') as get_pool:
+            manager.request(*args, **kwargs)
+        (scheme, host, port), _kwargs = get_pool.call_args
+        method, path = get_pool.return_value.request.call_args[0]
+        return scheme, host, port, method, path
+
+    def test_sdk_url(self):
+        self.assertEqual(
+            self._request(GatewayPoolManager(), 'get',
+                          'https://apitest.cybersource.com/tss/v2/searches'
+                          '?limit=5', fields={'offset': 10}),
+            ('https', 'apitest.cybersource.com', 443, 'GET',
+             '/tss/v2/searches?limit=5&offset=10'))
+
+    def test_endpoint_keeps_query(self):
+        manager = GatewayPoolManager(
+            endpoint='http://127.0.0.1:8099/stand-in?tenant=a')
+        self.assertEqual(
+            self._request(manager, 'GET',
+                          'https://apitest.cybersource.com/pts/v2/payments'
+                          '/123?fields=status'),
+            ('http', '127.0.0.1', 8099, 'GET',
+             '/stand-in/pts/v2/payments/123?tenant=a&fields=status'))
+        self.assertEqual(
+            self._request(GatewayPoolManager(
+                endpoint='http://127.0.0.1:8099'), 'POST',
+                'https://apitest.cybersource.com/pts/v2/payments?x=1',
+                body='{}'),
+            ('http', '127.0.0.1', 8099, 'POST', '/pts/v2/payments?x=1'))
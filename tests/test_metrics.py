@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from odoo.tests.common import BaseCase
+
+from ..utils import metrics
+from ..utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.registry = MetricsRegistry(flush_interval=60.0)
+        self.registry.set_directory(directory.name)
+        self.counter = self.registry.counter('flows_total', 'Flows',
+                                             ('outcome',))
+        self.addCleanup(self.registry.flush_pending)
+
+    def _snapshot(self):
+        filenames = [name for name in os.listdir(self.registry.directory)
+                     if name.endswith('.json')]
+        self.assertEqual(len(filenames), 1)
+        with open(os.path.join(self.registry.directory, filenames[0])) as f:
+            return json.load(f)
+
+    def test_flush_throttled(self):
+        with patch.object(metrics, '_write_json',
+                          wraps=metrics._write_json) as write:
+            for __ in range(100):
+                self.counter.inc(1, 'approved')
+                self.registry.request_flush()
+            self.assertEqual(write.call_count, 0)
+            self.registry.flush_pending()
+            self.assertEqual(write.call_count, 1)
+            # Nothing left to write
+            self.registry.flush_pending()
+            self.assertEqual(write.call_count, 1)
+        self.assertEqual(self._snapshot(),
+                         {'flows_total': [[['approved'], 100]]})
+
+    def test_timed_flush(self):
+        self.registry.flush_interval = 0.01
+        self.counter.inc(1, 'declined')
+        self.registry.request_flush()
+        timer = self.registry._timer
+        timer.join(5)
+        self.assertIsNone(self.registry._timer)
+        self.assertEqual(self._snapshot(),
+                         {'flows_total': [[['declined'], 1]]})
+
+    def test_render_sums_processes(self):
+        self.counter.inc(2, 'approved')
+        with open(os.path.join(self.registry.directory,
+                               '%d-other.json' % os.getppid()), 'w') as f:
+            json.dump({'flows_total': [[['approved'], 3]]}, f)
+        self.assertIn('flows_total{outcome="approved"} 5',
+                      self.registry.render())
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from unittest.mock import patch
+
+from odoo.tests.common import BaseCase
+
+from ..utils import payload
+from ..utils.payload import PartnerCache
+
+
+class TestPartnerCache(BaseCase):
+
+    def test_lru(self):
+        cache = PartnerCache(maxsize=2)
+        cache.set(('db', 1), 'a')
+        cache.set(('db', 2), 'b')
+        self.assertEqual(cache.get(('db', 1)), 'a')
+        cache.set(('db', 3), 'c')
+        # The least recently read entry is dropped
+        self.assertIsNone(cache.get(('db', 2)))
+        self.assertEqual(cache.get(('db', 1)), 'a')
+        self.assertEqual(cache.stats(), {'size': 2, 'hits': 2, 'misses': 1})
+
+    def test_ttl(self):
+        cache = PartnerCache(ttl=10.0)
+        with patch.object(payload.time, 'monotonic', return_value=100.0):
+            cache.set(('db', 1), 'a')
+        with patch.object(payload.time, 'monotonic', return_value=109.0):
+            self.assertEqual(cache.get(('db', 1)), 'a')
+        with patch.object(payload.time, 'monotonic', return_value=111.0):
+            self.assertIsNone(cache.get(('db', 1)))
+
+    def test_invalidate(self):
+        cache = PartnerCache()
+        cache.set(('db', 1), 'a')
+        cache.set(('other', 1), 'b')
+        cache.invalidate('db', [1, 2])
+        self.assertIsNone(cache.get(('db', 1)))
+        self.assertEqual(cache.get(('other', 1)), 'b')
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from .common import CybersourceCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPaymentClaim(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self._enter_registry_test_mode()
+        # Never wait for a claim held by another request
+        self.provider.cyber_request_deadline = 0
+        self.claims = self.env['cybersource.payment.claim']
+
+    def _expire(self, reference):
+        self.env.cr.execute("""
+            UPDATE cybersource_payment_claim
+               SET expires_at = now() at time zone 'UTC' - interval '1 hour'
+             WHERE reference = %s
+        """, [reference])
+
+    def _claim_exists(self, reference):
+        return bool(self.claims.search_count([('reference', '=', reference)]))
+
+    def test_claim_once(self):
+        self.assertEqual(self.claims._claim('S001', self.provider),
+                         (True, None))
+        self.assertEqual(self.claims._claim('S001', self.provider),
+                         (False, None))
+        self.claims._complete('S001', {'success': True}, self.provider)
+        self.assertEqual(self.claims._claim('S001', self.provider),
+                         (False, {'success': True}))
+        self.assertEqual(self.claims._get_result('S001'), {'success': True})
+
+    def test_release(self):
+        self.claims._claim('S002', self.provider)
+        self.assertIsNone(self.claims._get_result('S002'))
+        self.claims._release('S002')
+        self.assertEqual(self.claims._claim('S002', self.provider),
+                         (True, None))
+
+    def test_stale_claim_taken_over(self):
+        self.claims._claim('S003', self.provider)
+        self._expire('S003')
+        self.assertEqual(self.claims._claim('S003', self.provider),
+                         (True, None))
+
+    def test_expired_result_not_taken_over(self):
+        self.claims._claim('S004', self.provider)
+        self.claims._complete('S004', {'pending': True}, self.provider,
+                              pending=True)
+        self._expire('S004')
+        self.assertEqual(self.claims._claim('S004', self.provider),
+                         (False, {'pending': True}))
+
+    def test_gc_keeps_unsettled_claims(self):
+        tx = self._create_transaction('direct', reference='S005',
+                                      state='pending')
+        self.claims._claim('S005', self.provider)
+        self.claims._complete('S005', {'pending': True}, self.provider,
+                              pending=True)
+        self._expire('S005')
+        self.claims._gc_expired_claims()
+        self.assertTrue(self._claim_exists('S005'))
+        tx._set_done()
+        self.claims._gc_expired_claims()
+        self.assertFalse(self._claim_exists('S005'))
+
+    def test_gc_settled_claims(self):
+        self._create_transaction('direct', reference='S006', state='done')
+        self.claims._claim('S006', self.provider)
+        self.claims._complete('S006', {'success': True}, self.provider)
+        self.claims._gc_expired_claims()
+        self.assertTrue(self._claim_exists('S006'))
+        self._expire('S006')
+        self.claims._gc_expired_claims()
+        self.assertFalse(self._claim_exists('S006'))
+
+    def test_token_payment_only_sent_once(self):
+        token = self._create_token(provider_ref='instrument')
+        tx = self._create_transaction('token', reference='S007',
+                                      token_id=token.id, state='done')
+        with patch.object(type(self.provider),
+                          '_cybersource_create_payment') as create_payment:
+            tx._send_payment_request()
+        create_payment.assert_not_called()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from datetime import datetime
+
+from odoo.tests import tagged
+
+from .common import CybersourceCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPaymentStat(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self._enter_registry_test_mode()
+        self.stats = self.env['cybersource.payment.stat']
+        self.hourly = self.env['cybersource.payment.stat.hourly']
+
+    def _record(self, flow_at, outcome='approved', reason=None, duration=100.0,
+                gateway_duration=80.0, card_type='001', provider=True):
+        self.stats._record(self.provider.id if provider else None, card_type,
+                           outcome, reason, duration, gateway_duration)
+        self.env.cr.execute("""
+            UPDATE cybersource_payment_stat SET flow_at = %s
+             WHERE id = (SELECT max(id) FROM cybersource_payment_stat)
+        """, [flow_at])
+
+    def _rows(self):
+        self.env.invalidate_all()
+        return {(row.hour, row.outcome, row.reason): row
+                for row in self.hourly.search([])}
+
+    def test_rollup(self):
+        hour = datetime(2026, 3, 1, 10)
+        self._record(datetime(2026, 3, 1, 10, 5), duration=100.0)
+        self._record(datetime(2026, 3, 1, 10, 55), duration=300.0,
+                     gateway_duration=None)
+        self._record(datetime(2026, 3, 1, 10, 30), outcome='declined',
+                     reason='EXPIRED_CARD')
+        self._record(datetime(2026, 3, 1, 11, 1))
+        self.hourly._cron_rollup()
+
+        rows = self._rows()
+        self.assertEqual(len(rows), 3)
+        approved = rows[hour, 'approved', False]
+        self.assertEqual(approved.flow_count, 2)
+        self.assertEqual(approved.total_duration, 400.0)
+        self.assertEqual(approved.max_duration, 300.0)
+        self.assertEqual(approved.avg_duration, 200.0)
+        self.assertEqual(approved.gateway_duration, 80.0)
+        self.assertEqual(rows[hour, 'declined', 'EXPIRED_CARD'].flow_count,
+                         1)
+        self.assertEqual(
+            rows[datetime(2026, 3, 1, 11), 'approved', False].flow_count, 1)
+
+    def test_incremental_rollup(self):
+        hour = datetime(2026, 3, 1, 10)
+        self._record(datetime(2026, 3, 1, 10, 5))
+        self.hourly._cron_rollup()
+        watermark = self.hourly._watermark()
+        # Nothing new: the rows are left as they are
+        self.hourly._cron_rollup()
+        self.assertEqual(self._rows()[hour, 'approved', False].flow_count, 1)
+
+        self._record(datetime(2026, 3, 1, 10, 40), duration=500.0)
+        self.hourly._cron_rollup()
+        row = self._rows()[hour, 'approved', False]
+        self.assertEqual(row.flow_count, 2)
+        self.assertEqual(row.max_duration, 500.0)
+        self.assertGreater(self.hourly._watermark(), watermark)
+
+    def test_empty_dimensions(self):
+        # Flows without provider or card type share one row per hour
+        for __ in range(2):
+            self._record(datetime(2026, 3, 1, 10, 5), outcome='error',
+                         card_type=None, provider=False)
+            self.hourly._cron_rollup()
+        row = self._rows()[datetime(2026, 3, 1, 10), 'error', False]
+        self.assertEqual(row.flow_count, 2)
+        self.assertFalse(row.provider_id)
+
+    def test_recent_flows_wait(self):
+        self.stats._record(self.provider.id, '001', 'approved', None, 100.0,
+                           80.0)
+        self.hourly._cron_rollup()
+        self.assertFalse(self._rows())
+
+    def test_gc_rolled_up_stats(self):
+        self._record(datetime(2020, 1, 1, 10))
+        self.hourly._cron_rollup()
+        self._record(datetime(2020, 1, 1, 11))
+        self._record(datetime.now())
+        self.stats._gc_rolled_up_stats()
+        # Only the old flow already rolled up is deleted
+        self.assertEqual(
+            sorted(self.stats.search([]).mapped('flow_at'))[0],
+            datetime(2020, 1, 1, 11))
+        self.assertEqual(self.stats.search_count([]), 2)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo.tests import tagged
+
+from .common import CybersourceCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPaymentToken(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.tokens = self.env['payment.token']
+
+    def _token_ids(self, partner, env=None):
+        tokens = (env or self.env)['payment.token']
+        return [row[0] for row in tokens._cybersource_get_partner_tokens(
+            partner.id)]
+
+    def test_cached_until_changed(self):
+        first = self._create_token(partner_id=self.partner.id)
+        second = self._create_token(partner_id=self.partner.id,
+                                    cyber_customer_id='CUSTOMER')
+        self.assertEqual(self._token_ids(self.partner),
+                         [second.id, first.id])
+        with self.assertQueryCount(0):
+            rows = self.tokens._cybersource_get_partner_tokens(
+                self.partner.id)
+        self.assertEqual(rows[0][4], 'CUSTOMER')
+
+        second.active = False
+        self.assertEqual(self._token_ids(self.partner), [first.id])
+        third = self._create_token(partner_id=self.partner.id)
+        self.assertEqual(self._token_ids(self.partner),
+                         [third.id, first.id])
+        third.unlink()
+        self.assertEqual(self._token_ids(self.partner), [first.id])
+
+    def test_partner_change(self):
+        token = self._create_token(partner_id=self.partner.id)
+        self.assertEqual(self._token_ids(self.partner), [token.id])
+        self.assertEqual(self._token_ids(self.portal_partner), [])
+        token.partner_id = self.portal_partner
+        self.assertEqual(self._token_ids(self.partner), [])
+        self.assertEqual(self._token_ids(self.portal_partner), [token.id])
+
+    def test_record_rules(self):
+        token = self._create_token(partner_id=self.partner.id)
+        own_token = self._create_token(partner_id=self.portal_partner.id)
+        portal_env = self.env(user=self.portal_user)
+        self.assertEqual(self._token_ids(self.partner, portal_env), [])
+        self.assertEqual(self._token_ids(self.portal_partner, portal_env),
+                         [own_token.id])
+        self.assertEqual(self._token_ids(self.partner), [token.id])
+
+    def test_available_tokens(self):
+        token = self._create_token(partner_id=self.partner.id)
+        self.assertEqual(self.tokens._get_available_tokens(
+            self.provider.ids, self.partner.id), token)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+
+from odoo.tests import HttpCase, tagged
+
+from .common import CybersourceCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRateLimit(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self._enter_registry_test_mode()
+        self.buckets = self.env['cybersource.rate.limit']
+
+    def test_consume(self):
+        self.assertEqual(self.buckets._consume([('a', 2), ('b', 0)]), [])
+        self.assertEqual(self.buckets._consume([('a', 2)]), [])
+        self.assertEqual(self.buckets._consume([('a', 2), ('c', 5)]), ['a'])
+        # Buckets without limit are never stored
+        self.assertEqual(sorted(self.buckets.search([]).mapped('key')),
+                         ['a', 'c'])
+
+    def test_gc_idle_buckets(self):
+        self.buckets._consume([('idle', 5), ('busy', 5)])
+        self.env.cr.execute("""
+            UPDATE cybersource_rate_limit
+               SET updated_at = now() at time zone 'UTC' - interval '2 hours'
+             WHERE key = 'idle'
+        """)
+        self.buckets._gc_idle_buckets()
+        self.assertEqual(self.buckets.search([]).mapped('key'), ['busy'])
+
+    def test_limits_of_endpoint_providers(self):
+        self.provider.write({'cyber_endpoint': 'http://127.0.0.1:8099',
+                             'cyber_rate_limit_reference': 2})
+        self.assertEqual(
+            self.env['payment.provider']._cybersource_get_rate_limits()[
+                self.provider.id][2], 2)
+
+
+@tagged('post_install', '-at_install')
+class TestRateLimitRoute(CybersourceCommon, HttpCase):
+
+    def setUp(self):
+        super().setUp()
+        self.provider.write({'cyber_rate_limit_ip': 0,
+                             'cyber_rate_limit_partner': 0,
+                             'cyber_rate_limit_reference': 2})
+        self.tx = self._create_transaction('direct', reference='RL-1')
+
+    def _pay(self, reference, provider_id):
+        response = self.url_open(
+            '/payment/cybersource/simulate_payment',
+            data=json.dumps({'jsonrpc': '2.0', 'method': 'call', 'params': {
+                'reference': reference,
+                'provider_id': provider_id,
+                # Refused by the checksum, before any gateway call
+                'customer_input': {'card_num': '4111111111111112',
+                                   'exp_month': '12', 'exp_year': '2030',
+                                   'cvv': '123', 'name': 'Test'},
+                'values': {'amount': self.amount,
+                           'currency': self.currency.id,
+                           'partner': self.partner.id},
+            }}),
+            headers={'Content-Type': 'application/json'})
+        return response.json()['result']
+
+    def _bucket_keys(self):
+        return self.env['cybersource.rate.limit'].search([]).mapped('key')
+
+    def test_limited_by_transaction_provider(self):
+        # The posted provider id is ignored: the limits are those of the
+        # provider of the transaction
+        for __ in range(2):
+            self.assertFalse(self._pay('RL-1', 0).get('limited'))
+        result = self._pay('RL-1', 999999)
+        self.assertTrue(result['limited'])
+        self.assertTrue(result['retry'])
+        self.assertEqual(self._bucket_keys(),
+                         ['%s:reference:RL-1' % self.provider.id])
+
+    def test_unknown_reference_creates_no_bucket(self):
+        self.provider.cyber_rate_limit_ip = 5
+        for index in range(3):
+            self.assertFalse(self._pay('UNKNOWN-%s' % index,
+                                       self.provider.id)['success'])
+        self.assertEqual(self._bucket_keys(), [])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import base64
+import io
+
+from odoo.tests import tagged
+
+from ..utils.report_parser import iter_report_rows
+from .common import CybersourceCommon
+from .test_report_parser import CSV_REPORT, XML_REPORT
+
+
+@tagged('post_install', '-at_install')
+class TestReconciliation(CybersourceCommon):
+
+    def _compare(self, report, tx_amount, tx_state, tx_currency='USD'):
+        reconciliation = self.env['cybersource.reconciliation']
+        return [reconciliation._compare_row(row, tx_amount, tx_state,
+                                            tx_currency)[0]
+                for row in iter_report_rows(io.BytesIO(report))]
+
+    def test_compare_csv(self):
+        # Reason code 100 is approved, 481 declined
+        self.assertEqual(self._compare(CSV_REPORT, 10.0, 'done')[0],
+                         'matched')
+        self.assertEqual(self._compare(CSV_REPORT, 5.5, 'done')[1],
+                         'state_mismatch')
+        self.assertEqual(self._compare(CSV_REPORT, 5.5, 'cancel')[1],
+                         'matched')
+        self.assertEqual(self._compare(CSV_REPORT, 12.0, 'done')[0],
+                         'amount_mismatch')
+        self.assertEqual(self._compare(CSV_REPORT, 10.0, 'done', 'EUR')[0],
+                         'currency_mismatch')
+        self.assertEqual(self._compare(CSV_REPORT, None, None)[0], 'missing')
+
+    def test_compare_xml(self):
+        # RCode 1 is approved, -1 failed
+        self.assertEqual(self._compare(XML_REPORT, 10.0, 'done')[0],
+                         'matched')
+        self.assertEqual(self._compare(XML_REPORT, 10.0, 'cancel')[0],
+                         'state_mismatch')
+        self.assertEqual(self._compare(XML_REPORT, 5.5, 'error')[1],
+                         'matched')
+        self.assertEqual(self._compare(XML_REPORT, 5.5, 'done')[1],
+                         'state_mismatch')
+
+    def test_compare_reversal(self):
+        reconciliation = self.env['cybersource.reconciliation']
+        row = {'reference': 'S001', 'amount': '10.00', 'currency': 'USD',
+               'transaction_type': 'ics_auth_reversal', 'rcode': '1'}
+        self.assertEqual(
+            reconciliation._compare_row(row, 10.0, 'cancel', 'USD')[0],
+            'matched')
+        self.assertEqual(
+            reconciliation._compare_row(row, 10.0, 'done', 'USD')[0],
+            'state_mismatch')
+
+    def test_import(self):
+        self._create_transaction('direct', reference='S001', state='done',
+                                 amount=10.0)
+        self._create_transaction(
+            'direct', reference='S-OTHER', state='error', amount=5.5,
+            provider_reference='cybersource-S002')
+        reconciliation = self.env['cybersource.reconciliation'].create({
+            'name': 'Report',
+            'report_file': base64.b64encode(XML_REPORT),
+            'report_filename': 'report.xml',
+        })
+        reconciliation.action_import()
+        self.assertEqual(reconciliation.state, 'done')
+        self.assertEqual(reconciliation.row_count, 2)
+        self.assertEqual(reconciliation.matched_count, 2)
+        self.assertEqual(
+            reconciliation.line_ids.sorted('reference').mapped(
+                'transaction_id.reference'), ['S001', 'S-OTHER'])
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo.tests.common import BaseCase
+
+from ..utils.connection_pool import PoolExhaustedError
+from ..utils.gateway_executor import (CircuitOpenError,
+                                      ExecutorSaturatedError,
+                                      GatewayTimeoutError)
+from ..utils.recovery import (FOUND, RESUBMITTED, UNKNOWN, RecoveryEngine,
+                              is_ambiguous, summary_outcome)
+
+
+class GatewayError(Exception):
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class TestRecoveryEngine(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 0.0
+        self.submitted = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.now += delay
+
+    def submit(self):
+        self.submitted.append(self.now)
+        return 'response'
+
+    def _engine(self, answers, **kwargs):
+        answers = iter(answers)
+
+        def lookup():
+            answer = next(answers, None)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+        kwargs.setdefault('budget', 20.0)
+        return RecoveryEngine(lookup, self.submit, sleep=self.sleep,
+                              clock=self.clock, **kwargs)
+
+    def test_found(self):
+        engine = self._engine([None, {'id': '1'}])
+        self.assertEqual(engine.recover(), (FOUND, {'id': '1'}))
+        self.assertEqual(engine.lookups, 2)
+        self.assertFalse(self.submitted)
+
+    def test_resubmit_after_settle_and_confirmations(self):
+        engine = self._engine([], settle=4.0, confirmations=2)
+        self.assertEqual(engine.recover(), (RESUBMITTED, 'response'))
+        self.assertEqual(len(self.submitted), 1)
+        self.assertGreaterEqual(self.submitted[0], 4.0)
+        self.assertGreaterEqual(engine.lookups, 2)
+
+    def test_failed_lookups_never_resubmit(self):
+        engine = self._engine([GatewayTimeoutError('timeout')] * 1000)
+        self.assertEqual(engine.recover(), (UNKNOWN, None))
+        self.assertFalse(self.submitted)
+        self.assertLessEqual(self.now, 20.0)
+
+    def test_failed_lookup_resets_confirmations(self):
+        # An error between two empty answers restarts the count
+        engine = self._engine([None, TimeoutError(), None, {'id': '1'}],
+                              settle=0.0, confirmations=2)
+        self.assertEqual(engine.recover(), (FOUND, {'id': '1'}))
+        self.assertFalse(self.submitted)
+
+    def test_budget_spent(self):
+        engine = self._engine([], budget=1.0, settle=4.0)
+        self.assertEqual(engine.recover(), (UNKNOWN, None))
+        self.assertFalse(self.submitted)
+
+    def test_resubmit_refused(self):
+        def submit():
+            raise GatewayError(400)
+
+        engine = RecoveryEngine(lambda: None, submit, settle=0.0,
+                                sleep=self.sleep, clock=self.clock)
+        with self.assertRaises(GatewayError):
+            engine.recover()
+
+    def test_resubmit_ambiguous_keeps_searching(self):
+        def submit():
+            self.submitted.append(self.now)
+            raise GatewayTimeoutError('timeout')
+
+        engine = RecoveryEngine(lambda: None, submit, settle=0.0,
+                                max_submits=1, sleep=self.sleep,
+                                clock=self.clock)
+        self.assertEqual(engine.recover(), (UNKNOWN, None))
+        self.assertEqual(len(self.submitted), 1)
+
+    def test_is_ambiguous(self):
+        self.assertTrue(is_ambiguous(GatewayTimeoutError('timeout')))
+        self.assertTrue(is_ambiguous(TimeoutError()))
+        self.assertTrue(is_ambiguous(ConnectionResetError()))
+        self.assertTrue(is_ambiguous(GatewayError(502)))
+        self.assertFalse(is_ambiguous(GatewayError(400)))
+        self.assertFalse(is_ambiguous(CircuitOpenError('open')))
+        self.assertFalse(is_ambiguous(ExecutorSaturatedError('full')))
+        self.assertFalse(is_ambiguous(PoolExhaustedError('full')))
+        self.assertFalse(is_ambiguous(ConnectionRefusedError()))
+
+    def test_summary_outcome(self):
+        self.assertEqual(summary_outcome(
+            {'applicationInformation': {'reasonCode': 100}}), (True, '100'))
+        self.assertEqual(summary_outcome(
+            {'applicationInformation': {'reasonCode': '481'}}),
+            (False, '481'))
+        self.assertEqual(summary_outcome({}), (False, ''))
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import io
+
+from odoo.tests.common import BaseCase
+
+from ..utils.report_parser import iter_chunks, iter_report_rows
+
+CSV_REPORT = b"""Transaction Detail Report,1.0
+request_id,merchant_ref_number,transaction_type,currency,amount,reason_code
+7001,S001,ics_bill,USD,10.00,100
+7002,S002,ics_auth,usd,5.50,481
+,,,,,
+"""
+
+XML_REPORT = b"""<?xml version="1.0" encoding="utf-8"?>
+<Report xmlns="https://ebctest.cybersource.com/ebctest/reports/dtd/tdr_1_2.dtd">
+  <Requests>
+    <Request RequestID="7001" MerchantReferenceNumber="S001">
+      <PaymentData><Amount>10.00</Amount><CurrencyCode>USD</CurrencyCode>
+      </PaymentData>
+      <ApplicationReplies>
+        <ApplicationReply Name="ics_auth"><RCode>1</RCode></ApplicationReply>
+        <ApplicationReply Name="ics_bill"><RCode>1</RCode></ApplicationReply>
+      </ApplicationReplies>
+    </Request>
+    <Request RequestID="7002" MerchantReferenceNumber="S002">
+      <PaymentData><Amount>5.50</Amount><CurrencyCode>USD</CurrencyCode>
+      </PaymentData>
+      <ApplicationReplies>
+        <ApplicationReply Name="ics_auth"><RCode>1</RCode></ApplicationReply>
+        <ApplicationReply Name="ics_bill"><RCode>-1</RCode></ApplicationReply>
+      </ApplicationReplies>
+    </Request>
+  </Requests>
+</Report>
+"""
+
+
+class TestReportParser(BaseCase):
+
+    def test_csv(self):
+        rows = list(iter_report_rows(io.BytesIO(CSV_REPORT)))
+        self.assertEqual(rows, [{
+            'request_id': '7001', 'reference': 'S001',
+            'transaction_type': 'ics_bill', 'currency': 'USD',
+            'amount': '10.00', 'reason_code': '100',
+        }, {
+            'request_id': '7002', 'reference': 'S002',
+            'transaction_type': 'ics_auth', 'currency': 'usd',
+            'amount': '5.50', 'reason_code': '481',
+        }])
+
+    def test_xml(self):
+        rows = list(iter_report_rows(io.BytesIO(XML_REPORT)))
+        self.assertEqual(rows, [{
+            'request_id': '7001', 'reference': 'S001', 'amount': '10.00',
+            'currency': 'USD', 'transaction_type': 'ics_auth,ics_bill',
+            'rcode': '1',
+        }, {
+            'request_id': '7002', 'reference': 'S002', 'amount': '5.50',
+            'currency': 'USD', 'transaction_type': 'ics_auth,ics_bill',
+            'rcode': '-1',
+        }])
+
+    def test_chunks(self):
+        self.assertEqual(list(iter_chunks(range(5), 2)),
+                         [[0, 1], [2, 3], [4]])
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+
+from odoo.tests.common import BaseCase
+
+from ..utils.response_parser import parse_payment_response
+
+AUTHORIZED = json.dumps({
+    'id': '7000000000000000000001',
+    'status': 'AUTHORIZED',
+    'tokenInformation': {
+        'paymentInstrument': {'id': 'PI-1'},
+        'customer': {'id': 'CUS-1'},
+    },
+}).encode()
+
+DECLINED = json.dumps({
+    'id': '7000000000000000000002',
+    'status': 'DECLINED',
+    'errorInformation': {'reason': 'EXPIRED_CARD',
+                         'message': 'Decline - Expired card'},
+}).encode()
+
+
+class TestResponseParser(BaseCase):
+
+    def test_authorized(self):
+        self.assertEqual(parse_payment_response(AUTHORIZED), {
+            'id': '7000000000000000000001',
+            'status': 'AUTHORIZED',
+            'reason': None,
+            'message': None,
+            'payment_instrument_id': 'PI-1',
+            'customer_id': 'CUS-1',
+        })
+
+    def test_declined(self):
+        response = parse_payment_response(DECLINED.decode())
+        self.assertEqual(response['status'], 'DECLINED')
+        self.assertEqual(response['reason'], 'EXPIRED_CARD')
+        self.assertEqual(response['message'], 'Decline - Expired card')
+        self.assertIsNone(response['payment_instrument_id'])
+
+    def test_top_level_error(self):
+        # Validation errors (HTTP 400) carry the reason at the top level
+        response = parse_payment_response(
+            b'{"status": "invalid_request", "reason": "MISSING_FIELD", '
+            b'"message": "Declined - The request is missing a field"}')
+        self.assertEqual(response['status'], 'INVALID_REQUEST')
+        self.assertEqual(response['reason'], 'MISSING_FIELD')
+
+    def test_unreadable_body(self):
+        for body in (b'', None, b'<html>Bad gateway</html>', b'[1, 2]',
+                     b'"text"'):
+            response = parse_payment_response(body)
+            self.assertIsNone(response['id'])
+            self.assertEqual(response['status'], '')
+
+    def test_keep_body(self):
+        self.assertNotIn('body', parse_payment_response(AUTHORIZED))
+        self.assertEqual(
+            parse_payment_response(AUTHORIZED, keep_body=True)['body'],
+            AUTHORIZED.decode())
+        self.assertEqual(
+            parse_payment_response('{"id": "1"}', keep_body=True)['body'],
+            '{"id": "1"}')
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from odoo.tests import tagged
+
+from .common import CybersourceCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRouting(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.providers = self.env['payment.provider']
+        self.provider.write({
+            'sequence': 1,
+            'cyber_card_types': 'visa',
+            'available_currency_ids': [(6, 0, self.currency_usd.ids)],
+        })
+        self.other_merchant = self.providers.create({
+            'name': 'Second Merchant',
+            'code': 'cybersource',
+            'state': 'test',
+            'sequence': 2,
+            'available_currency_ids': [(6, 0, self.currency_usd.ids)],
+        })
+
+    def _route(self, brand, currency=None, preferred=None):
+        return self.providers._cybersource_route(
+            self.env.company.id, (currency or self.currency_usd).id, brand,
+            preferred_id=preferred and preferred.id)
+
+    def _is_cached(self, model, method_name):
+        method = getattr(type(model), method_name).__cache__.method
+        cache = self.registry._Registry__caches['default']
+        return any(key[:2] == (model._name, method) for key in cache.d)
+
+    def test_route(self):
+        self.assertEqual(self._route('visa'), self.provider)
+        self.assertEqual(self._route('amex'), self.other_merchant)
+        self.assertEqual(self._route('visa', preferred=self.other_merchant),
+                         self.other_merchant)
+        self.assertEqual(self._route('amex', preferred=self.provider),
+                         self.other_merchant)
+        self.assertFalse(self._route('visa', currency=self.currency_euro))
+
+    def test_route_follows_changes(self):
+        self.assertEqual(self._route('visa'), self.provider)
+        self.provider.cyber_card_types = 'mastercard'
+        self.assertEqual(self._route('visa'), self.other_merchant)
+        self.other_merchant.state = 'disabled'
+        self.assertFalse(self._route('visa'))
+
+    def test_fallback(self):
+        self.provider.cyber_fallback_provider_id = self.other_merchant
+        breaker = self.provider._cybersource_get_guard().breaker
+        self.addCleanup(breaker.record_success)
+        for __ in range(breaker.threshold):
+            breaker.record_failure()
+        self.assertEqual(self._route('visa'), self.other_merchant)
+        # The fallback must accept the payment too
+        self.other_merchant.available_currency_ids = self.currency_euro
+        self.assertEqual(self._route('visa'), self.provider)
+
+    def test_clear_only_cybersource_caches(self):
+        xmlids = self.env['ir.model.data']
+        xmlids._xmlid_lookup('base.main_company')
+        self.providers._cybersource_get_routing_table()
+        self.assertTrue(self._is_cached(self.providers,
+                                        '_cybersource_get_routing_table'))
+
+        self.providers.create({'name': 'Other', 'code': 'none'}).sequence = 5
+        self.assertTrue(self._is_cached(self.providers,
+                                        '_cybersource_get_routing_table'))
+
+        self.other_merchant.sequence = 5
+        for method_name in ('_cybersource_get_provider_ids',
+                            '_cybersource_get_routing_table',
+                            '_cybersource_get_rate_limits'):
+            self.assertFalse(self._is_cached(self.providers, method_name))
+        self.assertTrue(self._is_cached(xmlids, '_xmlid_lookup'))
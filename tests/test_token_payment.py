@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from ..utils.recovery import SENT, UNKNOWN
+from .common import CybersourceCommon
+from .test_response_parser import AUTHORIZED, DECLINED
+
+
+@tagged('post_install', '-at_install')
+class TestTokenPayment(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.token = self._create_token(provider_ref='PI-SAVED')
+        self.tx = self._create_transaction('token', token_id=self.token.id)
+
+    def _send(self, outcome, value):
+        with patch.object(type(self.provider), '_cybersource_create_payment',
+                          return_value=(outcome, value)) as create_payment:
+            self.tx._send_payment_request()
+        return create_payment
+
+    def test_authorized(self):
+        create_payment = self._send(SENT, (None, 201, AUTHORIZED))
+        self.assertIn('"id": "PI-SAVED"', create_payment.call_args[0][1])
+        self.assertEqual(self.tx.state, 'done')
+        self.assertEqual(self.tx.cyber_payment_id, '7000000000000000000001')
+
+    def test_declined(self):
+        self._send(SENT, (None, 201, DECLINED))
+        self.assertEqual(self.tx.state, 'cancel')
+        self.assertIn('Decline - Expired card', self.tx.state_message)
+
+    def test_error_status(self):
+        # An authorized body with an error status is still a decline
+        self._send(SENT, (None, 502, AUTHORIZED))
+        self.assertEqual(self.tx.state, 'cancel')
+
+    def test_unknown(self):
+        self._send(UNKNOWN, None)
+        self.assertEqual(self.tx.state, 'pending')
+
+    def test_notification_from_response(self):
+        transactions = self.env['payment.transaction']
+        self.assertEqual(
+            transactions._cybersource_notification_from_response(
+                'S1', 201, {'status': 'AUTHORIZED', 'id': 'P1',
+                            'payment_instrument_id': 'PI',
+                            'customer_id': 'C', 'reason': None,
+                            'message': None}),
+            {'reference': 'S1', 'simulated_state': 'AUTHORIZED',
+             'payment_id': 'P1', 'payment_instrument_id': 'PI',
+             'customer_id': 'C'})
+        self.assertEqual(
+            transactions._cybersource_notification_from_response(
+                'S1', 400, {'status': '', 'id': None, 'reason': None,
+                            'message': None, 'payment_instrument_id': None,
+                            'customer_id': None}),
+            {'reference': 'S1', 'simulated_state': 'DECLINED',
+             'message': 'Declinado por CyberSource', 'reason': 'UNKNOWN'})
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import base64
+import hashlib
+import hmac
+import time
+
+from odoo.tests.common import BaseCase
+
+from ..utils.webhook import (extract_event, parse_signature_header,
+                             verify_signature)
+
+SECRET = base64.b64encode(b'webhook-secret').decode()
+BODY = b'{"eventType": "payments.payments.accept"}'
+
+
+def sign(body, timestamp, secret=SECRET):
+    signature = base64.b64encode(hmac.new(
+        base64.b64decode(secret), str(timestamp).encode() + b'.' + body,
+        hashlib.sha256).digest()).decode()
+    return 't=%s,keyId=key,sig=%s' % (timestamp, signature)
+
+
+class TestWebhookSignature(BaseCase):
+
+    def test_parse_header(self):
+        self.assertEqual(parse_signature_header('t=1; keyId=k, sig=a=='),
+                         {'t': '1', 'keyId': 'k', 'sig': 'a=='})
+        self.assertEqual(parse_signature_header(None), {})
+
+    def test_valid(self):
+        now = int(time.time())
+        self.assertTrue(verify_signature(sign(BODY, now), BODY, SECRET))
+        # Timestamps in milliseconds are accepted as well
+        self.assertTrue(verify_signature(sign(BODY, now * 1000), BODY,
+                                         SECRET))
+
+    def test_tampered(self):
+        header = sign(BODY, int(time.time()))
+        self.assertFalse(verify_signature(header, BODY + b' ', SECRET))
+        other = base64.b64encode(b'other-secret').decode()
+        self.assertFalse(verify_signature(header, BODY, other))
+
+    def test_replay(self):
+        sent_at = int(time.time()) - 600
+        self.assertFalse(verify_signature(sign(BODY, sent_at), BODY, SECRET))
+        self.assertTrue(verify_signature(sign(BODY, sent_at), BODY, SECRET,
+                                         tolerance=900))
+
+    def test_malformed(self):
+        now = int(time.time())
+        self.assertFalse(verify_signature('', BODY, SECRET))
+        self.assertFalse(verify_signature('t=abc,sig=xyz', BODY, SECRET))
+        self.assertFalse(verify_signature(sign(BODY, now), BODY, None))
+        self.assertFalse(verify_signature(sign(BODY, now), BODY, 'not base64!'))
+
+    def test_extract_event(self):
+        self.assertEqual(extract_event({
+            'eventType': 'payments.capture.accept',
+            'payload': [{'data': {
+                'id': '123',
+                'clientReferenceInformation': {'code': 'S0001'},
+            }}],
+        }), ('payments.capture.accept', 'S0001', '123'))
+        self.assertEqual(extract_event({'eventType': 'x'}), ('x', None, None))
+        self.assertEqual(extract_event({'eventType': 'x', 'payload': ['y']}),
+                         ('x', None, None))
+        self.assertEqual(extract_event({
+            'eventType': 'x',
+            'payload': {'data': {'clientReferenceInformation': 'S0001'}},
+        }), ('x', None, None))
+
+    def test_extract_event_not_object(self):
+        for event in ([], ['payments.payments.accept'], 'event', 42, None):
+            with self.assertRaises(ValueError):
+                extract_event(event)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+import time
+
+from odoo.tests import HttpCase, tagged
+
+from .common import CybersourceCommon
+from .test_webhook import SECRET, sign
+
+
+def notification(event_type, reference=None, gateway_id=None):
+    data = {'id': gateway_id}
+    if reference:
+        data['clientReferenceInformation'] = {'code': reference}
+    return {'eventType': event_type, 'payload': [{'data': data}]}
+
+
+@tagged('post_install', '-at_install')
+class TestWebhookEvent(CybersourceCommon):
+
+    def setUp(self):
+        super().setUp()
+        self.events = self.env['cybersource.webhook.event']
+        self.provider.capture_manually = False
+
+    def test_process_by_reference(self):
+        tx = self._create_transaction('redirect', reference='W001')
+        event = self.events._enqueue(
+            notification('payments.payments.accept', 'W001', 'pay1'))
+        event._process_batch()
+        self.assertEqual((event.state, tx.state), ('done', 'done'))
+        self.assertTrue(event.processed_at)
+
+    def test_process_by_gateway_id(self):
+        paid = self._create_transaction('redirect', reference='W002',
+                                        cyber_payment_id='pay2')
+        captured = self._create_transaction('redirect', reference='W003',
+                                            state='authorized',
+                                            cyber_payment_id='pay3',
+                                            cyber_capture_id='cap3')
+        events = self.events._enqueue(
+            notification('payments.payments.reject', gateway_id='pay2'))
+        events |= self.events._enqueue(
+            notification('payments.capture.accept', gateway_id='cap3'))
+        events._process_batch()
+        self.assertEqual(events.mapped('state'), ['done', 'done'])
+        self.assertEqual((paid.state, captured.state), ('cancel', 'done'))
+
+    def test_manual_capture_stays_authorized(self):
+        self.provider.capture_manually = True
+        tx = self._create_transaction('redirect', reference='W004')
+        event = self.events._enqueue(
+            notification('payments.payments.accept', 'W004'))
+        event._process_batch()
+        self.assertEqual(tx.state, 'authorized')
+
+    def test_unknown_and_ignored_events(self):
+        events = self.events._enqueue(
+            notification('payments.payments.accept', 'W-missing'))
+        events |= self.events._enqueue(
+            notification('payments.unknown', 'W-missing'))
+        events._process_batch()
+        self.assertEqual(events.mapped('state'), ['error', 'ignored'])
+
+    def test_cron_drains_queue(self):
+        txs = self.env['payment.transaction'].union(*(
+            self._create_transaction('redirect', reference='W1%s' % index)
+            for index in range(5)))
+        for tx in txs:
+            self.events._enqueue(
+                notification('payments.payments.accept', tx.reference))
+        self.events._cron_process_events(batch_size=2)
+        self.assertEqual(set(txs.mapped('state')), {'done'})
+        self.assertEqual(self.events._get_queue_stats()['pending'], 0)
+
+
+@tagged('post_install', '-at_install')
+class TestWebhookRoute(CybersourceCommon, HttpCase):
+
+    def setUp(self):
+        super().setUp()
+        self.provider.write({'cyber_webhook_key_id': 'key',
+                             'cyber_webhook_secret': SECRET})
+
+    def _post(self, body, header=None):
+        return self.url_open('/payment/cybersource/webhook', data=body,
+                             headers={'v-c-signature': header or sign(
+                                 body, int(time.time()))})
+
+    def test_queued(self):
+        body = json.dumps(notification('payments.payments.accept',
+                                       'W-route')).encode()
+        self.assertEqual(self._post(body).status_code, 200)
+        self.assertTrue(self.env['cybersource.webhook.event'].search(
+            [('reference', '=', 'W-route')]))
+
+    def test_invalid_signature(self):
+        body = b'{"eventType": "payments.payments.accept"}'
+        self.assertEqual(self._post(body, 't=1,keyId=key,sig=x').status_code,
+                         401)
+
+    def test_not_an_object(self):
+        for body in (b'["payments.payments.accept"]', b'"event"', b'{'):
+            self.assertEqual(self._post(body).status_code, 400)
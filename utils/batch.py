@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import functools
+import threading
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """ Blocking token bucket allowing ``rate`` calls per second with bursts
+    of up to ``burst`` calls. A falsy rate disables the limit. """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(rate or 1, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class BatchReport:
+    """ Outcome of a batch of gateway operations. """
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.succeeded = 0
+        self.failures = []
+        self.pending = []
+        self.latencies = []
+        self.started = time.monotonic()
+        self.duration = 0.0
+
+    @property
+    def total(self):
+        return self.succeeded + len(self.failures) + len(self.pending)
+
+    def add_success(self):
+        self.succeeded += 1
+
+    def add_failure(self, reference, error):
+        self.failures.append((reference, str(error)))
+
+    def add_pending(self, reference, error):
+        """ Record an operation whose outcome is unknown, e.g. a timeout """
+        self.pending.append((reference, str(error)))
+
+    def add_latency(self, seconds):
+        self.latencies.append(seconds)
+
+    def merge(self, other):
+        self.succeeded += other.succeeded
+        self.failures.extend(other.failures)
+        self.pending.extend(other.pending)
+        self.latencies.extend(other.latencies)
+
+    def stop(self):
+        self.duration = time.monotonic() - self.started
+        return self
+
+    @property
+    def throughput(self):
+        return self.total / self.duration if self.duration else 0.0
+
+    def _latency_percentile(self, percent):
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1,
+                             int(len(latencies) * percent / 100))]
+
+    def as_dict(self):
+        return {
+            'operation': self.operation,
+            'total': self.total,
+            'succeeded': self.succeeded,
+            'failed': len(self.failures),
+            'failures': self.failures,
+            'unknown': len(self.pending),
+            'pending': self.pending,
+            'duration': round(self.duration, 3),
+            'throughput': round(self.throughput, 2),
+            'latency_p50': round(self._latency_percentile(50), 3),
+            'latency_p95': round(self._latency_percentile(95), 3),
+        }
+
+    def __str__(self):
+        return ("%(operation)s: %(succeeded)s/%(total)s succeeded, "
+                "%(failed)s failed, %(unknown)s unknown in %(duration)ss "
+                "(%(throughput)s/s)"
+                % self.as_dict())
+
+
+def run_batch(items, func, guard, deadline, rate=None):
+    """ Call ``func(item)`` for every item through ``guard``, keeping at
+    most ``guard.max_workers`` calls in flight and starting at most
+    ``rate`` calls per second.
+
+    The guard is long-lived, so its threads keep their SDK clients from one
+    batch to the next, and its circuit breaker stops the batch when the
+    gateway fails. ``func`` must not touch the ORM: it runs outside of the
+    request thread.
+
+    :return: list of ``(item, result, error, elapsed)`` in the order of
+        ``items``, ``elapsed`` being the duration of the call in seconds
+    """
+    limiter = RateLimiter(rate)
+    items = list(items)
+    results = [None] * len(items)
+    in_flight = deque()
+
+    def timed(item):
+        started = time.monotonic()
+        return func(item), time.monotonic() - started
+
+    def collect():
+        index, started, future = in_flight.popleft()
+        try:
+            (result, elapsed), error = guard.result(future, deadline), None
+        except Exception as exc:
+            result, error = None, exc
+            elapsed = time.monotonic() - started
+        results[index] = (items[index], result, error, elapsed)
+
+    for index, item in enumerate(items):
+        while len(in_flight) >= guard.max_workers:
+            collect()
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            future = guard.submit(functools.partial(timed, item))
+        except Exception as exc:
+            results[index] = (item, None, exc, 0.0)
+            continue
+        in_flight.append((index, started, future))
+    while in_flight:
+        collect()
+    return results
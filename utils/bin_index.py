@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import csv
+import os
+from collections import namedtuple
+
+BIN_RANGES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                               'data', 'cybersource_bin_ranges.csv')
+
+BinEntry = namedtuple('BinEntry', [
+    'card_type', 'brand', 'pan_lengths', 'cvv_length', 'luhn'])
+
+# Sum contributed by a digit once doubled by the Luhn algorithm
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def luhn_valid(number):
+    """ Return whether the digit string ``number`` passes the Luhn check. """
+    total = 0
+    double = False
+    for char in reversed(number):
+        digit = ord(char) - 48
+        total += _LUHN_DOUBLED[digit] if double else digit
+        double = not double
+    return total % 10 == 0
+
+
+def _parse_lengths(value):
+    lengths = set()
+    for part in value.split('|'):
+        low, __, high = part.partition('-')
+        lengths.update(range(int(low), int(high or low) + 1))
+    return frozenset(lengths)
+
+
+class BinIndex:
+    """ Digit trie of BIN prefixes returning the longest matching entry.
+
+    Ranges are expanded to every prefix they cover when the table is
+    loaded, so a lookup walks at most ``depth`` nodes whatever the number
+    of ranges.
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.depth = 0
+        self.size = 0
+        self._root = {}
+        self._ranges = []
+        for row in rows:
+            self._add_range(row)
+
+    def _add_range(self, row):
+        prefix_from, prefix_to = row['prefix_from'], row['prefix_to']
+        if len(prefix_from) != len(prefix_to):
+            raise ValueError("BIN range %s-%s mixes prefix lengths"
+                             % (prefix_from, prefix_to))
+        entry = BinEntry(
+            card_type=row['card_type'],
+            brand=row['brand'],
+            pan_lengths=_parse_lengths(row['pan_lengths']),
+            cvv_length=int(row['cvv_length']),
+            luhn=row.get('luhn', '1') != '0',
+        )
+        self._ranges.append((prefix_from, prefix_to, entry))
+        width = len(prefix_from)
+        for value in range(int(prefix_from), int(prefix_to) + 1):
+            node = self._root
+            for digit in str(value).zfill(width):
+                node = node.setdefault(digit, {})
+            node[None] = entry
+            self.size += 1
+        self.depth = max(self.depth, width)
+
+    @classmethod
+    def load(cls, path=BIN_RANGES_PATH):
+        """ Build the index from a BIN range CSV file, whose leading
+        ``# version:`` comment names the table version. """
+        version = None
+        with open(path, newline='', encoding='utf-8') as file:
+            lines = []
+            for line in file:
+                if line.startswith('#'):
+                    key, __, value = line[1:].partition(':')
+                    if key.strip() == 'version':
+                        version = value.strip()
+                elif line.strip():
+                    lines.append(line)
+        return cls(csv.DictReader(lines), version=version)
+
+    def export_ranges(self):
+        """ Return the ranges as JSON serializable ``[prefix from, prefix
+        to, brand, PAN lengths, CVV length, Luhn check]`` lists, checked by
+        the payment form before submitting a card. """
+        return [[prefix_from, prefix_to, entry.brand,
+                 sorted(entry.pan_lengths), entry.cvv_length, entry.luhn]
+                for prefix_from, prefix_to, entry in self._ranges]
+
+    def lookup(self, number):
+        """ Return the :class:`BinEntry` of the longest prefix of
+        ``number``, or None. """
+        node = self._root
+        found = None
+        for digit in number[:self.depth]:
+            node = node.get(digit)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+
+# Reasons for which :func:`validate_card` rejects a card
+INVALID_NUMBER = 'invalid_number'
+UNKNOWN_BRAND = 'unknown_brand'
+INVALID_LENGTH = 'invalid_length'
+INVALID_CHECKSUM = 'invalid_checksum'
+INVALID_CVV = 'invalid_cvv'
+
+
+def _is_digits(value):
+    """ Return whether ``value`` is made of ASCII digits only: isdigit()
+    alone accepts other scripts (e.g. Arabic-Indic digits). """
+    return value.isascii() and value.isdigit()
+
+
+def validate_card(index, number, cvv=None):
+    """ Check ``number`` (and ``cvv`` if given) against the BIN table.
+
+    :return: ``(entry, None)`` for an acceptable card, ``(entry, reason)``
+        otherwise, where ``entry`` may be None.
+    """
+    if not _is_digits(number):
+        return None, INVALID_NUMBER
+    entry = index.lookup(number)
+    if entry is None:
+        return None, UNKNOWN_BRAND
+    if len(number) not in entry.pan_lengths:
+        return entry, INVALID_LENGTH
+    if entry.luhn and not luhn_valid(number):
+        return entry, INVALID_CHECKSUM
+    if cvv is not None and (not _is_digits(cvv)
+                            or len(cvv) != entry.cvv_length):
+        return entry, INVALID_CVV
+    return entry, None
+
+
+_index = None
+
+
+def get_bin_index():
+    """ Return the BIN index of the module, loaded on first use. """
+    global _index
+    if _index is None:
+        _index = BinIndex.load()
+    return _index
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import threading
+
+
+class GatewayClient:
+    """ Ready-to-use CyberSource client for one provider configuration.
+
+    The SDK keeps per-call signing state on its ``ApiClient``, so the API
+    instances are built lazily and kept per thread instead of being shared.
+    """
+
+    def __init__(self, config, api_factory, options=None):
+        self.config = config
+        self.options = options or {}
+        self._api_factory = api_factory
+        self._local = threading.local()
+
+    def api(self, api_name):
+        """ Return the SDK API instance ``api_name`` (e.g. ``PaymentsApi``)
+        bound to this configuration for the current thread. """
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get(api_name)
+        if api is None:
+            api = apis[api_name] = self._api_factory(api_name, self.config,
+                                                     self.options)
+        return api
+
+
+class GatewayClientCache:
+    """ Process-local cache of :class:`GatewayClient` keyed by provider id
+    and credentials. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, factory):
+        """ Return the client cached under ``key``, building it with
+        ``factory()`` on a miss. The first element of ``key`` must be the
+        provider id so that :meth:`invalidate` can find it. """
+        client = self._clients.get(key)
+        if client is not None:
+            self.hits += 1
+            return client
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                self.misses += 1
+                client = self._clients[key] = factory()
+            else:
+                self.hits += 1
+        return client
+
+    def invalidate(self, provider_ids=None):
+        """ Drop the clients of the given providers, or all of them. """
+        with self._lock:
+            if provider_ids is None:
+                self._clients.clear()
+                return
+            provider_ids = set(provider_ids)
+            for key in [k for k in self._clients if k[0] in provider_ids]:
+                del self._clients[key]
+
+    def stats(self):
+        """ Return the cache counters. """
+        return {
+            'size': len(self._clients),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+client_cache = GatewayClientCache()
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import collections
+import http.client
+import os
+import select
+import ssl
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+
+# Methods safe to send twice when a connection breaks under the request
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+
+class PoolExhaustedError(Exception):
+    """ Raised when no gateway connection frees up in time. """
+
+
+class GatewayResponse:
+    """ Fully read gateway response, exposing the subset of the urllib3
+    response interface used by the CyberSource SDK. """
+
+    def __init__(self, status, reason, headers, data):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+
+    def getheaders(self):
+        return self.headers
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name, default)
+
+
+class _PooledHTTPSConnection(http.client.HTTPSConnection):
+    """ HTTPS connection resuming the last TLS session of its pool. """
+
+    def __init__(self, pool, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = pool
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=self.host,
+            session=self._pool.tls_session)
+        if self.sock.session_reused:
+            self._pool.tls_resumed += 1
+
+
+class GatewayConnectionPool:
+    """ Bounded pool of keep-alive connections to one gateway origin.
+
+    Idle connections are reused most-recently-used first and closed once
+    they have been idle for ``idle_timeout`` seconds, which must stay below
+    the gateway keep-alive timeout.
+    """
+
+    def __init__(self, scheme, host, port, maxsize=10, idle_timeout=60.0):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.tls_session = None
+        self.closed = False
+        self._context = (ssl.create_default_context()
+                         if scheme == 'https' else None)
+        self._slots = threading.BoundedSemaphore(maxsize)
+        self._lock = threading.Lock()
+        self._idle = collections.deque()
+        self.in_use = 0
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.tls_resumed = 0
+
+    def _new_connection(self, timeout):
+        if self.scheme == 'https':
+            return _PooledHTTPSConnection(
+                self, self.host, self.port, timeout=timeout,
+                context=self._context)
+        return http.client.HTTPConnection(self.host, self.port,
+                                          timeout=timeout)
+
+    def _evict_idle(self, now):
+        """ Close the connections idle for too long (lock must be held). """
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, __ = self._idle.popleft()
+            conn.close()
+            self.evicted += 1
+
+    @staticmethod
+    def _is_dropped(conn):
+        """ Return whether the gateway closed the idle connection: its
+        socket is readable (EOF) although no request is pending. """
+        sock = conn.sock
+        if sock is None:
+            return True
+        try:
+            return bool(select.select([sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def _acquire(self, timeout):
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolExhaustedError(
+                "No connection to %s available after %ss" % (self.host,
+                                                             timeout))
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            conn = None
+            while self._idle:
+                conn = self._idle.pop()[0]
+                if not self._is_dropped(conn):
+                    break
+                conn.close()
+                self.evicted += 1
+                conn = None
+            if conn is not None:
+                self.reused += 1
+                reused = True
+            else:
+                conn = self._new_connection(timeout)
+                self.created += 1
+                reused = False
+            self.in_use += 1
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, reused
+
+    def _release(self, conn, reusable):
+        sock = conn.sock
+        if reusable and isinstance(sock, ssl.SSLSocket) and sock.session:
+            # TLS 1.3 tickets only arrive after the first response
+            self.tls_session = sock.session
+        with self._lock:
+            self.in_use -= 1
+            if reusable and not self.closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                conn.close()
+        self._slots.release()
+
+    def request(self, method, path, body=None, headers=None, timeout=None):
+        """ Send a request over a pooled connection and return the fully
+        read :class:`GatewayResponse`. """
+        conn, reused = self._acquire(timeout)
+        try:
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError,
+                    ConnectionResetError):
+                # The request may have reached the gateway: a payment or a
+                # refund is never sent again here, the caller settles it
+                if not reused or method.upper() not in IDEMPOTENT_METHODS:
+                    raise
+                conn.close()
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+            data = response.read()
+        except BaseException:
+            self._release(conn, False)
+            raise
+        self._release(conn, not response.will_close)
+        return GatewayResponse(response.status, response.reason,
+                               response.msg, data)
+
+    def close(self):
+        """ Close the idle connections and stop pooling new ones. """
+        with self._lock:
+            self.closed = True
+            while self._idle:
+                self._idle.pop()[0].close()
+
+    def stats(self):
+        """ Return the pool usage counters. """
+        return {
+            'origin': '%s://%s:%s' % (self.scheme, self.host, self.port),
+            'pool': '%s://%s:%s/%s/%ss' % (self.scheme, self.host, self.port,
+                                           self.maxsize, self.idle_timeout),
+            'maxsize': self.maxsize,
+            'in_use': self.in_use,
+            'idle': len(self._idle),
+            'created': self.created,
+            'reused': self.reused,
+            'evicted': self.evicted,
+            'tls_resumed': self.tls_resumed,
+        }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+def get_pool(scheme, host, port, maxsize=10, idle_timeout=60.0):
+    """ Return the worker-wide pool of the given origin and settings.
+
+    Merchants sharing an origin with different settings get a pool each,
+    instead of closing the other's connections (and calls in flight) on
+    every switch. Pools are never inherited across a fork.
+    """
+    global _pools_pid
+    key = (scheme, host, port, maxsize, idle_timeout)
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = GatewayConnectionPool(
+                scheme, host, port, maxsize=maxsize,
+                idle_timeout=idle_timeout)
+        return pool
+
+
+def pool_stats():
+    """ Return the usage counters of every pool of this worker. """
+    return [pool.stats() for pool in list(_pools.values())]
+
+
+def _timeout_seconds(timeout):
+    """ Normalize the urllib3 style timeouts passed by the SDK. """
+    if timeout is None or isinstance(timeout, (int, float)):
+        return timeout
+    if isinstance(timeout, tuple):
+        return max(timeout)
+    for attr in ('total', 'read_timeout', 'connect_timeout'):
+        value = getattr(timeout, attr, None)
+        if isinstance(value, (int, float)):
+            return value
+    return None
+
+
+class GatewayPoolManager:
+    """ Drop-in replacement for the urllib3 ``PoolManager`` of the SDK REST
+    client routing every call through the shared gateway pools.
+
+    When ``endpoint`` is set (e.g. ``http://127.0.0.1:8099``), every call is
+    sent to it instead of the host chosen by the SDK, keeping the path and
+    the query of the call after those of the endpoint. """
+
+    def __init__(self, maxsize=10, idle_timeout=60.0, timeout=None,
+                 endpoint=None):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.endpoint = urlsplit(endpoint) if endpoint else None
+
+    def request(self, method, url, fields=None, headers=None, body=None,
+                preload_content=True, timeout=None, **kwargs):
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        query = parts.query
+        if self.endpoint:
+            path = self.endpoint.path.rstrip('/') + path
+            query = '&'.join(filter(None, [self.endpoint.query, query]))
+            parts = self.endpoint
+        scheme = parts.scheme or 'https'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        if fields and method.upper() in ('GET', 'HEAD', 'DELETE'):
+            query = '&'.join(filter(None, [query, urlencode(fields)]))
+        elif fields and body is None:
+            body = urlencode(fields)
+        if query:
+            path = '%s?%s' % (path, query)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        pool = get_pool(scheme, parts.hostname, port, maxsize=self.maxsize,
+                        idle_timeout=self.idle_timeout)
+        timeout = min(filter(None, (_timeout_seconds(timeout), self.timeout)),
+                      default=None)
+        return pool.request(method.upper(), path, body=body, headers=headers,
+                            timeout=timeout)
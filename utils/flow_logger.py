@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# Keys holding card data in the frontend input and the gateway payload
+PAN_KEYS = frozenset(('card_num', 'number'))
+SECRET_KEYS = frozenset(('cvv', 'securityCode'))
+
+
+def mask_pan(number):
+    """ Keep the BIN and the last four digits of a card number. """
+    number = str(number or '').replace(' ', '')
+    if len(number) <= 10:
+        return '*' * len(number)
+    return number[:6] + '*' * (len(number) - 10) + number[-4:]
+
+
+def mask_card_data(data):
+    """ Return a copy of ``data`` with every card number and security code
+    masked, at any depth. """
+    if isinstance(data, dict):
+        return {
+            key: (mask_pan(value) if key in PAN_KEYS
+                  else '***' if key in SECRET_KEYS
+                  else mask_card_data(value))
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [mask_card_data(value) for value in data]
+    return data
+
+
+class _JsonEvent:
+    """ Log message serialized to compact JSON only when formatted. """
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        return json.dumps(self.fields, separators=(',', ':'), default=str,
+                          ensure_ascii=False)
+
+
+class FlowLogger:
+    """ Structured logger of one payment flow.
+
+    Every event is a single-line JSON object carrying the ``flow_id``; the
+    fields are only serialized when the level is enabled, so callers pass
+    the objects themselves rather than pre-formatted strings.
+    """
+
+    def __init__(self, logger, flow_id, **context):
+        self._logger = logger
+        self.flow_id = flow_id
+        self._context = context
+
+    def isEnabledFor(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def log(self, level, event, exc_info=False, **fields):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, '%s', _JsonEvent(dict(
+                self._context, flow_id=self.flow_id, event=event, **fields)),
+                exc_info=exc_info)
+
+    def debug(self, event, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+    def exception(self, event, **fields):
+        self.log(logging.ERROR, event, exc_info=True, **fields)
+
+
+class StageTimer:
+    """ Milliseconds spent in each consecutive stage of a flow. """
+
+    def __init__(self):
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """ Close ``stage`` at the current time and start the next one. """
+        now = time.perf_counter()
+        self.timings[stage] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+    def as_dict(self):
+        return dict(self.timings)
+
+
+_listener_lock = threading.Lock()
+_listener_pid = None
+
+
+def _install_queue_handler(logger):
+    """ Hand the records of ``logger`` to a background thread writing them
+    to the root handlers, so the request thread never waits on I/O.
+
+    The listener thread is started once per process, after the fork.
+    """
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        handlers = logging.getLogger().handlers
+        if not handlers:
+            return
+        for handler in list(logger.handlers):
+            if isinstance(handler, QueueHandler):
+                logger.removeHandler(handler)
+        records = queue.SimpleQueue()
+        listener = QueueListener(records, *handlers,
+                                 respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(QueueHandler(records))
+        logger.propagate = False
+        _listener_pid = os.getpid()
+
+
+def get_flow_logger(name, flow_id, **context):
+    """ Return a :class:`FlowLogger` writing through the queue handler of
+    the ``name`` logger. """
+    logger = logging.getLogger(name)
+    _install_queue_handler(logger)
+    return FlowLogger(logger, flow_id, **context)
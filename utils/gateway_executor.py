@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class GatewayUnavailableError(Exception):
+    """ Raised when a gateway call is refused or abandoned; the customer
+    should simply try again later. """
+
+
+class CircuitOpenError(GatewayUnavailableError):
+    """ Raised while the circuit breaker of the gateway is open. """
+
+
+class ExecutorSaturatedError(GatewayUnavailableError):
+    """ Raised when every gateway slot of the worker is taken. """
+
+
+class GatewayTimeoutError(GatewayUnavailableError):
+    """ Raised when the gateway did not answer before the deadline. """
+
+
+def is_gateway_failure(error):
+    """ Return whether ``error`` reflects an unhealthy gateway: a timeout,
+    a broken connection or a 5xx answer. """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, 'status', None)
+    return isinstance(status, int) and status >= 500
+
+
+class CircuitBreaker:
+    """ Consecutive-failure circuit breaker.
+
+    The breaker opens after ``threshold`` consecutive failures, refuses
+    calls for ``reset_timeout`` seconds, then lets a single probe through
+    (half-open) whose outcome closes or re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """ Return whether a call may be attempted now. """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if (self.state == self.OPEN
+                    and time.monotonic() - self.opened_at
+                    >= self.reset_timeout):
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def is_open(self):
+        """ Return whether calls are currently refused, without claiming the
+        half-open probe. """
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at < self.reset_timeout
+        return self.state == self.HALF_OPEN and self._probing
+
+    def release_probe(self):
+        """ Give back the half-open probe claimed by :meth:`allow` when
+        the call was not attempted after all. """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if (self.state == self.HALF_OPEN
+                    or self.failures >= self.threshold):
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'trips': self.trips,
+        }
+
+
+class GatewayGuard:
+    """ Bounded thread pool running the gateway calls of one provider with
+    a per-call deadline, behind a :class:`CircuitBreaker`.
+
+    At most ``max_workers`` calls run and as many wait in the queue; any
+    call beyond that fails fast instead of piling up HTTP workers. Guards
+    calling the same gateway may share their ``breaker``.
+    """
+
+    def __init__(self, max_workers=4, threshold=5, reset_timeout=30.0,
+                 breaker=None):
+        self.max_workers = max_workers
+        self.breaker = breaker or CircuitBreaker(threshold, reset_timeout)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='cybersource-gateway')
+        self._slots = threading.BoundedSemaphore(max_workers * 2)
+        self.timeouts = 0
+        self.rejected = 0
+
+    def call(self, func, deadline):
+        """ Run ``func()`` on the pool and return its result, waiting at
+        most ``deadline`` seconds.
+
+        :raise GatewayUnavailableError: if the breaker is open, the pool is
+            saturated or the deadline expired.
+        """
+        return self.result(self.submit(func), deadline)
+
+    def submit(self, func):
+        """ Schedule ``func()`` on the pool and return its future, to be
+        passed to :meth:`result`.
+
+        :raise GatewayUnavailableError: if the breaker is open or the pool
+            is saturated.
+        """
+        # The slot is taken first: a half-open probe must not be claimed by
+        # a call which is refused afterwards, or the breaker never closes
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise ExecutorSaturatedError("CyberSource executor is saturated")
+        if not self.breaker.allow():
+            self._slots.release()
+            self.rejected += 1
+            raise CircuitOpenError("CyberSource circuit breaker is open")
+        try:
+            future = self._executor.submit(func)
+        except BaseException:
+            self._slots.release()
+            self.breaker.release_probe()
+            raise
+        future.add_done_callback(lambda __: self._slots.release())
+        return future
+
+    def result(self, future, deadline):
+        """ Return the result of a call scheduled by :meth:`submit`, waiting
+        at most ``deadline`` seconds, and record its outcome on the breaker.
+
+        :raise GatewayTimeoutError: if the deadline expired.
+        """
+        try:
+            result = future.result(timeout=deadline)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            self.breaker.record_failure()
+            raise GatewayTimeoutError(
+                "CyberSource did not answer within %ss" % deadline)
+        except Exception as error:
+            if is_gateway_failure(error):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        return dict(self.breaker.stats(), max_workers=self.max_workers,
+                    timeouts=self.timeouts, rejected=self.rejected)
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+_guards_pid = os.getpid()
+
+
+def get_guard(provider_id, max_workers=4, threshold=5, reset_timeout=30.0,
+              pool='payment', breaker=None):
+    """ Return the worker-wide guard of the provider for the calls of
+    ``pool``, rebuilding it when its settings changed. Threads never survive
+    a fork, so neither do guards. """
+    global _guards_pid
+    settings = (max_workers, threshold, reset_timeout)
+    with _guards_lock:
+        if _guards_pid != os.getpid():
+            _guards.clear()
+            _guards_pid = os.getpid()
+        guard, guard_settings = _guards.get((pool, provider_id),
+                                            (None, None))
+        if (guard is None or guard_settings != settings
+                or breaker is not None and guard.breaker is not breaker):
+            if guard is not None:
+                guard.shutdown()
+            guard = GatewayGuard(*settings, breaker=breaker)
+            _guards[(pool, provider_id)] = (guard, settings)
+        return guard
+
+
+def guard_stats(pool='payment'):
+    """ Return the counters of the guards of ``pool`` of this worker by
+    provider id. """
+    return {provider_id: guard.stats()
+            for (guard_pool, provider_id), (guard, __)
+            in list(_guards.items()) if guard_pool == pool}
@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import atexit
+import bisect
+import fcntl
+import json
+import os
+import threading
+import uuid
+
+# Seconds; covers the local stages (sub-millisecond) up to gateway timeouts
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace(
+        '"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, _escape(value))
+                             for name, value in pairs)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """ Monotonic counter, one value per label set. """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) \
+                + amount
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def dump(self):
+        """ Return the values as JSON serializable ``[labels, value]``. """
+        with self._lock:
+            return self.export(self._values)
+
+    @staticmethod
+    def export(values):
+        return [[list(labelvalues), value]
+                for labelvalues, value in values.items()]
+
+    @staticmethod
+    def combine(values, dump):
+        """ Add the dumped values of another process to ``values``. """
+        for labelvalues, value in dump:
+            labelvalues = tuple(labelvalues)
+            values[labelvalues] = values.get(labelvalues, 0) + value
+
+    def samples(self, dumps=()):
+        values = {}
+        self.combine(values, self.dump())
+        for dump in dumps:
+            self.combine(values, dump)
+        for labelvalues, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    """ Cumulative histogram with fixed buckets, one per label set.
+
+    Observations only bump one bucket under a lock; the cumulative counts
+    are computed when rendering. """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [
+                    [0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def dump(self):
+        """ Return the series as JSON serializable ``[labels, bucket
+        counts, sum]``. """
+        with self._lock:
+            return self.export(self._series)
+
+    @staticmethod
+    def export(series):
+        return [[list(labelvalues), list(counts), total]
+                for labelvalues, (counts, total) in series.items()]
+
+    def combine(self, series, dump):
+        """ Add the dumped series of another process to ``series``; series
+        of other buckets (an older version) are skipped. """
+        for labelvalues, counts, total in dump:
+            if len(counts) != len(self.buckets) + 1:
+                continue
+            current = series.setdefault(
+                tuple(labelvalues), [[0] * len(counts), 0.0])
+            current[0] = [a + b for a, b in zip(current[0], counts)]
+            current[1] += total
+
+    def samples(self, dumps=()):
+        series = {}
+        self.combine(series, self.dump())
+        for dump in dumps:
+            self.combine(series, dump)
+        for labelvalues, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield self.name + '_bucket', _format_labels(
+                    self.labelnames, labelvalues,
+                    [('le', _format_value(float(bound)))]), cumulative
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, cumulative
+
+
+def _read_json(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    """ Replace ``path`` atomically, readers never see a partial file """
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsRegistry:
+    """ Set of metrics rendered in the Prometheus text format.
+
+    Each process keeps its own values. Once :meth:`set_directory` was
+    called, every process also writes them to its own snapshot file there
+    (see :meth:`flush`), and :meth:`render` sums the snapshots of all the
+    processes of the server. The snapshots of dead processes are folded
+    into an archive, so that counters never go back when a worker is
+    recycled.
+
+    The recorded values are written at most once every ``flush_interval``
+    seconds (see :meth:`request_flush`), so the other processes see them
+    with that delay. """
+
+    ARCHIVE = 'archive.json'
+
+    def __init__(self, flush_interval=5.0):
+        self._metrics = []
+        self.directory = None
+        self.flush_interval = flush_interval
+        self._filename = None
+        self._timer = None
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # A forked worker counts from zero under its own snapshot file; the
+        # timer thread of the parent does not exist in the child
+        self._filename = None
+        self._timer = None
+        self._lock = threading.Lock()
+        for metric in self._metrics:
+            metric.reset()
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(),
+                  buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames,
+                                       buckets))
+
+    def set_directory(self, directory):
+        """ Share the values between the processes of the server through
+        snapshot files written in ``directory``. """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def flush(self):
+        """ Write the values of this process to its snapshot file. """
+        if not self.directory:
+            return
+        with self._lock:
+            if self._filename is None:
+                # The token tells apart the processes reusing a pid
+                self._filename = '%d-%s.json' % (os.getpid(),
+                                                 uuid.uuid4().hex[:8])
+            _write_json(os.path.join(self.directory, self._filename),
+                        {metric.name: metric.dump()
+                         for metric in self._metrics})
+
+    def request_flush(self):
+        """ Flush the values within ``flush_interval`` seconds, writing the
+        values recorded in the meantime at once. """
+        if not self.directory:
+            return
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.flush_interval,
+                                          self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush_pending(self):
+        """ Write the values waiting for a timed flush right away, when the
+        process exits. """
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+            self.flush()
+
+    def _collect(self):
+        """ Return the dumps of the other processes by metric name, folding
+        the snapshots of the dead ones into the archive. """
+        dumps = {}
+        if not self.directory:
+            return dumps
+        metrics = {metric.name: metric for metric in self._metrics}
+
+        def add(snapshot):
+            for name, dump in snapshot.items():
+                if name in metrics:
+                    dumps.setdefault(name, []).append(dump)
+
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive_path = os.path.join(self.directory, self.ARCHIVE)
+            archive = _read_json(archive_path) or {}
+            dead = []
+            for filename in os.listdir(self.directory):
+                pid, sep, __ = filename.partition('-')
+                if (not sep or not pid.isdigit()
+                        or not filename.endswith('.json')
+                        or filename == self._filename):
+                    continue
+                path = os.path.join(self.directory, filename)
+                snapshot = _read_json(path)
+                if snapshot is None:
+                    continue
+                if _is_alive(int(pid)):
+                    add(snapshot)
+                    continue
+                for name, dump in snapshot.items():
+                    metric = metrics.get(name)
+                    if metric is None:
+                        continue
+                    values = {}
+                    metric.combine(values, archive.get(name, []))
+                    metric.combine(values, dump)
+                    archive[name] = metric.export(values)
+                dead.append(path)
+            if dead:
+                _write_json(archive_path, archive)
+                for path in dead:
+                    os.unlink(path)
+        add(archive)
+        return dumps
+
+    def render(self, gauges=(), worker_gauges=()):
+        """ Return the exposition text of the metrics followed by
+        ``gauges``, an iterable of ``(name, documentation, samples)`` where
+        samples are ``(labels dict, value)`` pairs sampled at scrape time.
+
+        ``worker_gauges`` describe the process serving the scrape only and
+        are labelled with its ``pid``. """
+        dumps = self._collect()
+        lines = []
+        for metric in self._metrics:
+            lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+            lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+            for name, labels, value in metric.samples(
+                    dumps.get(metric.name, ())):
+                lines.append('%s%s %s' % (name, labels, _format_value(value)))
+        pid = str(os.getpid())
+        all_gauges = [(gauge, ()) for gauge in gauges] + [
+            (gauge, (('pid', pid),)) for gauge in worker_gauges]
+        for (name, documentation, samples), extra in all_gauges:
+            lines.append('# HELP %s %s' % (name, documentation))
+            lines.append('# TYPE %s gauge' % name)
+            for labels, value in samples:
+                lines.append('%s%s %s' % (
+                    name, _format_labels(labels.keys(), labels.values(),
+                                         extra),
+                    _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush_pending)
+
+stage_seconds = registry.histogram(
+    'cybersource_checkout_stage_seconds',
+    'Time spent in each stage of the checkout flow', ('stage',))
+flow_seconds = registry.histogram(
+    'cybersource_checkout_duration_seconds',
+    'Duration of the checkout flow by outcome', ('outcome',))
+flow_total = registry.counter(
+    'cybersource_checkout_total', 'Checkout flows by outcome', ('outcome',))
+limited_total = registry.counter(
+    'cybersource_checkout_limited_total',
+    'Payment attempts refused by a rate limit bucket', ('bucket',))
+shed_total = registry.counter(
+    'cybersource_checkout_shed_total',
+    'Payment attempts shed because every checkout slot was taken')
+decline_total = registry.counter(
+    'cybersource_checkout_declines_total',
+    'Payments declined by the gateway by reason', ('reason',))
+
+
+def record_flow(timings, outcome, duration, reason=None):
+    """ Record one checkout flow.
+
+    :param dict timings: milliseconds spent in each stage
+    :param str outcome: approved, declined, pending, rejected, retry,
+        limited, shed or error
+    :param float duration: seconds spent in the whole flow
+    :param str reason: decline reason of the gateway
+    """
+    for stage, milliseconds in timings.items():
+        stage_seconds.observe(milliseconds / 1000.0, stage)
+    flow_seconds.observe(duration, outcome)
+    flow_total.inc(1, outcome)
+    if outcome == 'declined':
+        decline_total.inc(1, reason or 'UNKNOWN')
+    registry.request_flush()
+
+
+def stats_gauges(prefix, documentation, rows, label):
+    """ Turn ``{label value: {counter: value}}`` stats into gauges named
+    ``<prefix>_<counter>``, skipping the non numeric counters. """
+    series = {}
+    for key, stats in rows.items():
+        for counter, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            series.setdefault(counter, []).append(({label: key}, value))
+    return [('%s_%s' % (prefix, counter), '%s: %s' % (documentation, counter),
+             samples) for counter, samples in sorted(series.items())]
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import threading
+import time
+from collections import OrderedDict
+
+# Partner fields read by the billTo block; a write on any of them drops
+# the cached block of the partner
+BILL_TO_FIELDS = ('name', 'street', 'city', 'state_id', 'zip', 'country_id',
+                  'email', 'phone')
+
+BILL_TO_QUERY = """
+    SELECT p.name, p.street, p.city, s.code, p.zip, c.code, p.email,
+           p.phone
+      FROM res_partner p
+ LEFT JOIN res_country_state s ON s.id = p.state_id
+ LEFT JOIN res_country c ON c.id = p.country_id
+     WHERE p.id = %s
+"""
+
+
+def build_bill_to(name, street, city, state_code, zip_code, country_code,
+                  email, phone):
+    """ Return the ``orderInformation.billTo`` block of a partner """
+    return {
+        "firstName": name or "Customer",
+        "lastName": name or "Customer",
+        "address1": street or "N/A",
+        "locality": city or "N/A",
+        "administrativeArea": state_code or "N/A",
+        "postalCode": zip_code or "00000",
+        "country": country_code or "GT",
+        "email": email or "customer@example.com",
+        "phoneNumber": phone or "00000000",
+    }
+
+
+class PartnerCache:
+    """ Worker-local LRU cache of partner data (billTo blocks, saved cards)
+    keyed by ``(dbname, partner_id)``.
+
+    Writes in this worker invalidate the entry right away; the time to live
+    bounds how long another worker may keep serving outdated data. The
+    cached values are shared by the callers and must not be mutated.
+    """
+
+    def __init__(self, ttl=300.0, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, dbname, partner_ids):
+        with self._lock:
+            for partner_id in partner_ids:
+                self._entries.pop((dbname, partner_id), None)
+
+    def stats(self):
+        return {'size': len(self._entries), 'hits': self.hits,
+                'misses': self.misses}
+
+
+bill_to_cache = PartnerCache()
+token_cache = PartnerCache()
+
+
+def build_payment_payload(reference, card, amount, currency, bill_to,
+                          capture=True):
+    """ Return the payment request of a card payment.
+
+    Only the card and the amount are built per call; the billTo block is
+    shared with the cache.
+
+    :param str reference: reference of the transaction
+    :param dict card: the ``paymentInformation.card`` block
+    :param amount: amount to pay
+    :param str currency: ISO code of the currency
+    :param dict bill_to: the billTo block from :func:`build_bill_to`
+    :param bool capture: whether to capture along the authorization
+    """
+    return {
+        "clientReferenceInformation": {"code": reference},
+        "processingInformation": {"capture": capture,
+                                  "commerceIndicator": "internet"},
+        "paymentInformation": {"card": card},
+        "orderInformation": {
+            "amountDetails": {
+                "totalAmount": str(amount),
+                "currency": currency,
+            },
+            "billTo": bill_to,
+        },
+    }
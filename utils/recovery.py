@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import random
+import time
+
+from .connection_pool import PoolExhaustedError
+from .gateway_executor import (GatewayTimeoutError, GatewayUnavailableError,
+                               is_gateway_failure)
+
+# Outcomes of a payment submission: answered, possibly after a recovery
+SENT = 'sent'
+FOUND = 'found'
+RESUBMITTED = 'resubmitted'
+UNKNOWN = 'unknown'
+
+# Reason codes of the transaction search meaning the payment was approved
+APPROVED_REASON_CODES = frozenset(('100', '110'))
+
+
+def is_ambiguous(error):
+    """ Return whether the payment may have reached the gateway despite
+    ``error``: a timeout, a connection lost after sending or a 5xx answer.
+    Refusals before sending (breaker, saturation, exhausted pool, refused
+    connection) are not ambiguous. """
+    if isinstance(error, GatewayTimeoutError):
+        return True
+    if isinstance(error, (GatewayUnavailableError, PoolExhaustedError,
+                          ConnectionRefusedError)):
+        return False
+    return is_gateway_failure(error)
+
+
+def backoff_delays(base=0.5, cap=8.0, rng=random.random):
+    """ Yield endless "full jitter" exponential backoff delays: a random
+    value between 0 and ``min(cap, base * 2 ** attempt)``. """
+    attempt = 0
+    while True:
+        yield rng() * min(cap, base * 2 ** attempt)
+        attempt += 1
+
+
+def summary_outcome(summary):
+    """ Return whether the transaction summary found by the search was
+    approved, and its decline reason code otherwise.
+
+    :rtype: tuple(bool, str)
+    """
+    info = summary.get('applicationInformation') or {}
+    reason_code = str(info.get('reasonCode') or '')
+    return reason_code in APPROVED_REASON_CODES, reason_code
+
+
+class RecoveryEngine:
+    """ Settle a payment whose submission failed ambiguously.
+
+    The gateway is searched for the merchant reference with jittered
+    exponential backoff until ``budget`` seconds are spent. The payment is
+    sent again only once the searches confirmed ``confirmations`` times,
+    at least ``settle`` seconds apart from the failure, that the first
+    attempt never arrived; the transaction search is indexed with a short
+    delay, so a single empty answer proves nothing.
+
+    :param lookup: ``lookup()`` returns the summary of the payment, or None
+        when the gateway does not know it; any error is retried
+    :param submit: ``submit()`` sends the payment again and returns its
+        response
+    """
+
+    def __init__(self, lookup, submit, budget=20.0, settle=4.0,
+                 confirmations=2, base=0.5, cap=4.0, max_submits=1,
+                 sleep=time.sleep, clock=time.monotonic, logger=None):
+        self.lookup = lookup
+        self.submit = submit
+        self.budget = budget
+        self.settle = settle
+        self.confirmations = confirmations
+        self.delays = backoff_delays(base, cap)
+        self.max_submits = max_submits
+        self.sleep = sleep
+        self.clock = clock
+        self.logger = logger
+        self.lookups = 0
+        self.submits = 0
+
+    def _log(self, message, *args):
+        if self.logger:
+            self.logger.info(message, *args)
+
+    def recover(self):
+        """ Return ``(FOUND, summary)``, ``(RESUBMITTED, response)`` or
+        ``(UNKNOWN, None)`` when the budget is spent. """
+        deadline = self.clock() + self.budget
+        since = self.clock()
+        absent = 0
+        while True:
+            try:
+                self.lookups += 1
+                summary = self.lookup()
+            except Exception as error:  # the search is retried anyway
+                self._log("CyberSource recovery lookup failed: %s", error)
+                summary, absent = None, 0
+            else:
+                if summary is not None:
+                    return FOUND, summary
+                absent += 1
+            if (absent >= self.confirmations
+                    and self.clock() - since >= self.settle
+                    and self.submits < self.max_submits):
+                self.submits += 1
+                self._log("CyberSource recovery: payment never arrived, "
+                          "sending it again")
+                try:
+                    return RESUBMITTED, self.submit()
+                except Exception as error:
+                    if not is_ambiguous(error):
+                        raise
+                    self._log("CyberSource recovery resubmission failed: %s",
+                              error)
+                    since, absent = self.clock(), 0
+            delay = next(self.delays)
+            if self.clock() + delay >= deadline:
+                return UNKNOWN, None
+            self.sleep(delay)
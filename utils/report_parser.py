@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import csv
+import io
+import re
+import xml.etree.ElementTree as ET
+
+# Normalized report column -> aliases used by the CyberSource reports
+# (Transaction Detail and Payment Batch Detail, CSV and XML flavours). The
+# XML reports give the outcome of each application as an RCode (1 success,
+# 0 declined, -1 error) instead of a reason code.
+COLUMN_ALIASES = {
+    'reference': ('merchantreferencenumber', 'merchantrefnumber',
+                  'merchantreferencecode', 'merchantref'),
+    'request_id': ('requestid',),
+    'amount': ('amount', 'totalamount', 'grandtotalamount'),
+    'currency': ('currency', 'currencycode'),
+    'transaction_type': ('transactiontype', 'applications', 'appname'),
+    'reason_code': ('reasoncode',),
+    'rcode': ('rcode',),
+}
+_ALIAS_TO_COLUMN = {alias: column for column, aliases in COLUMN_ALIASES.items()
+                    for alias in aliases}
+_NON_ALNUM = re.compile(r'[^a-z0-9]')
+
+
+def _normalize(name):
+    return _NON_ALNUM.sub('', name.lower())
+
+
+def _iter_csv_rows(stream):
+    """ Yield the rows of a CSV report, skipping the title lines which
+    precede the header. """
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig',
+                                         newline=''))
+    columns = None
+    for values in reader:
+        if columns is None:
+            normalized = [_ALIAS_TO_COLUMN.get(_normalize(value))
+                          for value in values]
+            if 'reference' in normalized:
+                columns = [(index, column)
+                           for index, column in enumerate(normalized)
+                           if column]
+            continue
+        row = {column: values[index].strip()
+               for index, column in columns if index < len(values)}
+        if row.get('reference'):
+            yield row
+
+
+def _rcode_rank(rcode):
+    try:
+        return int(rcode)
+    except ValueError:
+        return -1
+
+
+def _iter_xml_rows(stream):
+    """ Yield the ``Request`` elements of an XML report, detaching each one
+    from the tree once read so that memory stays constant.
+
+    The names of the ``ApplicationReply`` elements make the transaction
+    type, and the worst of their RCodes the RCode of the row. """
+    ancestors = []
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            ancestors.append(element)
+            continue
+        ancestors.pop()
+        if element.tag.rpartition('}')[2] != 'Request':
+            continue
+        row = {}
+        for name, value in element.attrib.items():
+            column = _ALIAS_TO_COLUMN.get(_normalize(name))
+            if column:
+                row[column] = value.strip()
+        applications, rcodes = [], []
+        for child in element.iter():
+            tag = child.tag.rpartition('}')[2]
+            if tag == 'ApplicationReply' and child.get('Name'):
+                applications.append(child.get('Name').strip())
+                continue
+            column = _ALIAS_TO_COLUMN.get(_normalize(tag))
+            if column == 'rcode' and child.text:
+                rcodes.append(child.text.strip())
+            elif column and column not in row and child.text:
+                row[column] = child.text.strip()
+        if applications and 'transaction_type' not in row:
+            row['transaction_type'] = ','.join(applications)
+        if rcodes:
+            row['rcode'] = min(rcodes, key=_rcode_rank)
+        if ancestors:
+            ancestors[-1].remove(element)
+        if row.get('reference'):
+            yield row
+
+
+def iter_report_rows(stream):
+    """ Stream the rows of a CyberSource CSV or XML report read from the
+    binary file object ``stream`` as dicts keyed by the normalized columns
+    of :data:`COLUMN_ALIASES`. """
+    head = stream.peek(64) if hasattr(stream, 'peek') else b''
+    if not head:
+        position = stream.tell()
+        head = stream.read(64)
+        stream.seek(position)
+    if head.lstrip(b'\xef\xbb\xbf \t\r\n').startswith(b'<'):
+        return _iter_xml_rows(stream)
+    return _iter_csv_rows(stream)
+
+
+def iter_chunks(rows, size):
+    """ Group an iterable into lists of at most ``size`` items. """
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+
+
+def parse_payment_response(body, keep_body=False):
+    """ Extract the fields used by the module from the raw JSON body of a
+    CyberSource payment response, in a single ``json.loads``.
+
+    The SDK is called with ``_preload_content=False`` so that it neither
+    hydrates its response models nor converts them back with ``to_dict``.
+
+    :param body: raw response body
+    :type body: bytes or str
+    :param bool keep_body: whether to keep the decoded body, for the debug
+        logs
+    :return: ``id``, ``status``, ``reason``, ``message``,
+        ``payment_instrument_id`` and ``customer_id``, plus ``body``
+    :rtype: dict
+    """
+    try:
+        data = json.loads(body) if body else {}
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    error = data.get('errorInformation') or {}
+    token = data.get('tokenInformation') or {}
+    response = {
+        'id': data.get('id'),
+        'status': (data.get('status') or '').upper(),
+        'reason': error.get('reason') or data.get('reason'),
+        'message': error.get('message') or data.get('message'),
+        'payment_instrument_id': (token.get('paymentInstrument') or {}).get(
+            'id'),
+        'customer_id': (token.get('customer') or {}).get('id'),
+    }
+    if keep_body:
+        response['body'] = body.decode('utf-8', 'replace') if isinstance(
+            body, (bytes, bytearray)) else body
+    return response
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import gc
+import importlib
+import threading
+import time
+
+# Loading the SDK imports its whole package, some two thousand generated
+# modules: it is only done when a gateway call first needs it
+_lock = threading.Lock()
+_sdk = None
+_stats = {'loaded': 0, 'preloaded': 0, 'load_seconds': 0.0}
+
+
+def get_sdk():
+    """ Return the ``CyberSource`` package, importing it on first use. """
+    global _sdk
+    if _sdk is None:
+        with _lock:
+            if _sdk is None:
+                started = time.perf_counter()
+                sdk = importlib.import_module('CyberSource')
+                _stats['load_seconds'] = time.perf_counter() - started
+                _stats['loaded'] = 1
+                _sdk = sdk
+    return _sdk
+
+
+def build_api(api_name, config):
+    """ Return a new SDK API ``api_name`` (e.g. ``PaymentsApi``) for the
+    merchant ``config``, on its own ``ApiClient``. """
+    sdk = get_sdk()
+    return getattr(sdk, api_name)(config, sdk.ApiClient())
+
+
+def preload():
+    """ Import the SDK in the server process before the workers fork, so
+    that they share its memory pages instead of each loading a copy.
+
+    The objects created so far are moved out of the garbage collector's
+    reach, which would otherwise write to them and unshare the pages.
+    """
+    get_sdk()
+    _stats['preloaded'] = 1
+    gc.freeze()
+
+
+def sdk_stats():
+    """ Return whether the SDK was loaded (1) or preloaded (1) in this
+    process, and how long loading it took. """
+    return dict(_stats)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+###############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2024-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import base64
+import hashlib
+import hmac
+import time
+
+
+def parse_signature_header(header):
+    """ Split a ``v-c-signature`` header (``t=...,keyId=...,sig=...``) into
+    a dict. """
+    values = {}
+    for part in (header or '').replace(';', ',').split(','):
+        key, sep, value = part.strip().partition('=')
+        if sep:
+            values[key] = value
+    return values
+
+
+def verify_signature(header, body, secret, tolerance=300):
+    """ Check the HMAC-SHA256 signature of a webhook notification.
+
+    The signed message is ``<timestamp>.<body>`` and the secret is the
+    base64 encoded key shared with CyberSource. Notifications older than
+    ``tolerance`` seconds are refused to prevent replays.
+    """
+    values = parse_signature_header(header)
+    timestamp, signature = values.get('t'), values.get('sig')
+    if not (timestamp and signature and secret and timestamp.isdigit()):
+        return False
+    sent_at = int(timestamp)
+    if sent_at > 10 ** 11:  # milliseconds
+        sent_at //= 1000
+    if abs(time.time() - sent_at) > tolerance:
+        return False
+    try:
+        key = base64.b64decode(secret)
+    except ValueError:
+        return False
+    expected = base64.b64encode(hmac.new(
+        key, timestamp.encode() + b'.' + body, hashlib.sha256).digest())
+    return hmac.compare_digest(expected, signature.encode())
+
+
+def extract_event(event):
+    """ Return the ``(event_type, reference, gateway_id)`` of a webhook
+    notification; the gateway only sends the merchant reference for some
+    event types.
+
+    :raise ValueError: if the notification is not a JSON object
+    """
+    if not isinstance(event, dict):
+        raise ValueError("The notification is not a JSON object")
+    payload = event.get('payload')
+    if isinstance(payload, list):
+        payload = payload[0] if payload else {}
+    if not isinstance(payload, dict):
+        payload = {}
+    data = payload.get('data')
+    if not isinstance(data, dict):
+        data = payload
+    references = (data.get('clientReferenceInformation')
+                  or payload.get('clientReferenceInformation'))
+    reference = (references.get('code') if isinstance(references, dict)
+                 else None)
+    return event.get('eventType'), reference, data.get('id')